@@ -0,0 +1,135 @@
+"""
+Benchmark del motor de reglas de horas (services/reglas_horas.py).
+
+Genera en memoria un año de turnos para un grupo de empleados (jornadas de
+día, de tarde y de noche, con días de descanso y algunos dobles turnos) y mide
+cuántos turnos por segundo evalúa evaluar_reglas con topes diario y semanal,
+franja nocturna y festivos, y cuánto agrega la liquidación por empleado.
+
+No usa la BD. Con --bd también mide la carga real de un periodo
+(evaluar_periodo) contra la BD configurada en .env.
+
+Uso:
+    python benchmarks/bench_reglas_horas.py --empleados 120 --dias 365
+    python benchmarks/bench_reglas_horas.py --empleados 300 --json resultados.json
+    python benchmarks/bench_reglas_horas.py --bd --desde 2026-01-01 --hasta 2026-12-31
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import NOMINA_CONFIG
+from services.reglas_horas import COLUMNAS_TURNOS, evaluar_reglas, evaluar_periodo
+from services.nomina import liquidar_empleados
+
+# Hora de entrada de cada tipo de jornada: mañana, tarde y noche
+ENTRADAS = np.array([6, 14, 21])
+
+
+def generar_turnos(empleados, dias, desde, semilla=7):
+    """Turnos sintéticos con las columnas de get_turnos_periodo"""
+    rng = np.random.default_rng(semilla)
+
+    id_empleado = np.repeat(np.arange(1, empleados + 1), dias)
+    dia = np.tile(np.datetime64(desde, "D") + np.arange(dias), empleados)
+
+    # Un día de descanso por semana y algo de ausentismo
+    trabaja = ((dia.astype("int64") + id_empleado) % 7 != 0) & (rng.random(len(dia)) > 0.03)
+    id_empleado = id_empleado[trabaja]
+    dia = dia[trabaja]
+
+    entrada = ENTRADAS[rng.integers(0, len(ENTRADAS), len(dia))] * 60 + rng.integers(-20, 30, len(dia))
+    duracion = rng.normal(8.5, 1.2, len(dia)).clip(4, 14) * 60
+    hora_inicio = dia + entrada.astype("timedelta64[m]")
+    hora_salida = hora_inicio + duracion.astype("timedelta64[m]")
+
+    # Dobles turnos: un segundo turno corto el mismo día
+    dobles = rng.random(len(dia)) < 0.05
+    inicio_doble = hora_salida[dobles] + np.timedelta64(60, "m")
+    salida_doble = inicio_doble + rng.integers(120, 240, dobles.sum()).astype("timedelta64[m]")
+
+    id_empleado = np.concatenate([id_empleado, id_empleado[dobles]])
+    salario_dia = 50000.0 + (id_empleado % 10) * 2500
+    turnos = pd.DataFrame({
+        "id_turno": np.arange(1, len(id_empleado) + 1),
+        "id_empleado": id_empleado,
+        "nombre_empleado": [f"Empleado {i}" for i in id_empleado],
+        "cedula_empleado": [str(1000000 + i) for i in id_empleado],
+        "salario_dia": salario_dia,
+        "hora_inicio": np.concatenate([hora_inicio, inicio_doble]),
+        "hora_salida": np.concatenate([hora_salida, salida_doble])
+    })
+    return turnos[COLUMNAS_TURNOS]
+
+
+def cronometrar(funcion, repeticiones):
+    """Mejor tiempo (segundos) de varias ejecuciones"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--empleados", type=int, default=120)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--horas-semana", type=float, default=42, help="tope semanal para la medición (0 = sin tope)")
+    parser.add_argument("--bd", action="store_true", help="medir también la carga de un periodo desde la BD")
+    parser.add_argument("--desde", type=date.fromisoformat, default=date(2026, 1, 1))
+    parser.add_argument("--hasta", type=date.fromisoformat, default=date(2026, 12, 31))
+    parser.add_argument("--json", help="archivo donde guardar los resultados")
+    args = parser.parse_args()
+
+    config = {
+        **NOMINA_CONFIG,
+        "horas_semana": args.horas_semana,
+        "festivos": NOMINA_CONFIG["festivos"] or ["2026-01-01", "2026-05-01", "2026-07-20", "2026-08-07", "2026-12-25"]
+    }
+
+    turnos = generar_turnos(args.empleados, args.dias, args.desde)
+    print(f"{len(turnos):,} turnos de {args.empleados} empleados en {args.dias} días")
+
+    resultados = {"empleados": args.empleados, "dias": args.dias, "turnos": len(turnos)}
+
+    t_reglas = cronometrar(lambda: evaluar_reglas(turnos, config), args.repeticiones)
+    evaluados = evaluar_reglas(turnos, config)
+    t_liquidacion = cronometrar(lambda: liquidar_empleados(evaluados, config), args.repeticiones)
+
+    resultados["reglas_s"] = round(t_reglas, 4)
+    resultados["reglas_turnos_s"] = round(len(turnos) / t_reglas)
+    resultados["liquidacion_s"] = round(t_liquidacion, 4)
+    resultados["horas_extra"] = round(float(evaluados["horas_extra"].sum()), 2)
+
+    print(f"  evaluar_reglas      {t_reglas * 1000:9.1f} ms   {resultados['reglas_turnos_s']:>12,} turnos/s")
+    print(f"  liquidar_empleados  {t_liquidacion * 1000:9.1f} ms")
+    print(f"  horas extra: {resultados['horas_extra']:,} "
+          f"(diarias {evaluados['horas_extra_diaria'].sum():,.1f}, semanales {evaluados['horas_extra_semanal'].sum():,.1f})")
+
+    if args.bd:
+        inicio = time.perf_counter()
+        periodo = evaluar_periodo(args.desde, args.hasta, config=config)
+        t_bd = time.perf_counter() - inicio
+        resultados["bd_turnos"] = len(periodo)
+        resultados["bd_s"] = round(t_bd, 4)
+        print(f"  evaluar_periodo (BD) {t_bd * 1000:8.1f} ms   {len(periodo):,} turnos de {args.desde} a {args.hasta}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark de la sincronización con Alegra contra el simulador local.
+
+Genera un conjunto de datos, reemplaza la API por services/alegra_mock.py y
+mide de punta a punta (API simulada + PostgreSQL local) cada etapa:
+
+    1. initial_load / initial_load_invoices   (BD vacía)
+    2. sync_remissions / sync_invoices        (después de crear documentos nuevos)
+    3. sync_remissions_status                 (después de cerrar una parte de los abiertos)
+    4. full_sync_all
+
+Cada etapa queda registrada en sync_runs con sus métricas. Con --json se
+guardan los resultados para comparar entre versiones.
+
+ATENCIÓN: vacía las tablas de clientes, negocios, remisiones, facturas y
+sync_estado de la BD configurada en .env. Usar solo con una BD de pruebas.
+
+Uso:
+    python benchmarks/bench_sync.py --remisiones 3000 --facturas 5000 --latencia-ms 80 --si
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import DB_CONFIG, ALEGRA_CONFIG
+from data_base.connection import get_connection
+from services.alegra_mock import AlegraDataset, instalar_mock
+from services.rate_limiter import RateLimiter
+from services.sync_metrics import registrar_sync
+from services.alegra_api import (
+    initial_load,
+    initial_load_invoices,
+    sync_remissions,
+    sync_invoices,
+    sync_remissions_status,
+    full_sync_all
+)
+
+
+def vaciar_tablas():
+    """Deja la BD de pruebas sin documentos sincronizados"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("TRUNCATE remisiones, facturas, negocios, clientes, sync_estado RESTART IDENTITY CASCADE")
+        conn.commit()
+        cur.close()
+
+
+def medir(nombre, funcion, adapter):
+    """Ejecuta una etapa registrándola en sync_runs y retorna sus métricas"""
+    solicitudes_antes = adapter.solicitudes
+    respuestas_429_antes = adapter.respuestas_429
+    inicio = time.perf_counter()
+    with registrar_sync(f"bench:{nombre}") as run:
+        funcion()
+    duracion = time.perf_counter() - inicio
+
+    metricas = run.resumen()
+    return {
+        "etapa": nombre,
+        "duracion_s": round(duracion, 2),
+        "solicitudes": adapter.solicitudes - solicitudes_antes,
+        "respuestas_429": adapter.respuestas_429 - respuestas_429_antes,
+        "paginas": metricas["paginas"],
+        "documentos": metricas["documentos"],
+        "insertados": metricas["insertados"],
+        "actualizados": metricas["actualizados"],
+        "cerrados": metricas["cerrados"],
+        "tiempo_api_s": round(metricas["tiempo_api_s"], 2),
+        "tiempo_bd_s": round(metricas["tiempo_bd_s"], 2),
+        "latencia_p95_ms": round(metricas["latencia_p95_ms"] or 0, 1),
+        "errores": metricas["errores"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sincronización con Alegra (simulada)")
+    parser.add_argument("--remisiones", type=int, default=2000)
+    parser.add_argument("--facturas", type=int, default=2000)
+    parser.add_argument("--clientes", type=int, default=200)
+    parser.add_argument("--nuevos", type=int, default=200, help="Documentos nuevos antes de la etapa incremental")
+    parser.add_argument("--cerrar", type=float, default=0.2, help="Fracción de abiertos que se cierran antes de sincronizar estados")
+    parser.add_argument("--latencia-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--prob-429", type=float, default=0.0)
+    parser.add_argument("--rps", type=float, default=ALEGRA_CONFIG["requests_per_second"],
+                        help="Solicitudes por segundo permitidas (0 = sin límite)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Archivo donde guardar los resultados")
+    parser.add_argument("--si", action="store_true", help="Confirma que se puede vaciar la BD configurada")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(message)s")
+
+    if not args.si:
+        print(f"Este benchmark vacía las tablas de documentos de la BD '{DB_CONFIG['database']}'.")
+        print("Ejecute de nuevo con --si para confirmar.")
+        sys.exit(1)
+
+    dataset = AlegraDataset(
+        remisiones=args.remisiones,
+        facturas=args.facturas,
+        clientes=args.clientes,
+        seed=args.seed
+    )
+    adapter = instalar_mock(
+        dataset,
+        latencia_ms=args.latencia_ms,
+        jitter_ms=args.jitter_ms,
+        prob_429=args.prob_429,
+        limiter=RateLimiter(
+            args.rps,
+            burst=ALEGRA_CONFIG["burst"],
+            min_requests_per_second=ALEGRA_CONFIG["min_requests_per_second"]
+        )
+    )
+
+    vaciar_tablas()
+
+    resultados = [
+        medir("initial_load", initial_load, adapter),
+        medir("initial_load_invoices", initial_load_invoices, adapter),
+    ]
+
+    dataset.agregar(remisiones=args.nuevos, facturas=args.nuevos)
+    resultados.append(medir("sync_remissions", sync_remissions, adapter))
+    resultados.append(medir("sync_invoices", sync_invoices, adapter))
+
+    dataset.cerrar(args.cerrar)
+    resultados.append(medir("sync_remissions_status", sync_remissions_status, adapter))
+    resultados.append(medir("full_sync_all", full_sync_all, adapter))
+
+    columnas = ["etapa", "duracion_s", "solicitudes", "respuestas_429", "documentos",
+                "insertados", "actualizados", "cerrados", "tiempo_api_s", "tiempo_bd_s",
+                "latencia_p95_ms", "errores"]
+    anchos = [max(len(col), *(len(str(r[col])) for r in resultados)) for col in columnas]
+    print("  ".join(col.ljust(ancho) for col, ancho in zip(columnas, anchos)))
+    for r in resultados:
+        print("  ".join(str(r[col]).ljust(ancho) for col, ancho in zip(columnas, anchos)))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "parametros": vars(args),
+                "resultados": resultados,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Comprobación de planes de las consultas de cartera (EXPLAIN).
+
+Ejecuta EXPLAIN sobre las consultas de documentos abiertos de kikes.py y
+todos_clientes.py (las mismas constantes y funciones que usan los tableros) y
+verifica que cada una se resuelva con un Index Only Scan sobre los índices
+parciales de la migración 006, sin Seq Scan sobre remisiones ni facturas. Retorna código 1 si algún plan no cumple, así que
+sirve como prueba de regresión después de cambiar consultas o índices.
+
+Los escaneos secuenciales y por bitmap se desactivan durante la comprobación:
+con pocos datos el planificador los prefiere aunque el índice cubra la
+consulta, y lo que se quiere verificar es justamente que la cubre.
+
+Uso:
+    python benchmarks/explain_cartera.py            # verifica los planes
+    python benchmarks/explain_cartera.py --planes   # además imprime cada plan
+    python benchmarks/explain_cartera.py --vacuum   # VACUUM ANALYZE antes (mapa de visibilidad)
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_base.connection import get_connection, crear_conexion, _cerrar_silencioso
+from src.modules.cartera import kikes, todos_clientes
+
+# Consultas de src/modules/cartera: cada una arma (sql, params) con los parámetros de ejemplo
+CONSULTAS = [
+    {
+        "nombre": "kikes.get_remisiones_negocio",
+        "indice": "idx_remisiones_open_negocio_fecha",
+        "consulta": lambda p: (kikes.SQL_REMISIONES_NEGOCIO, (p["negocio"],)),
+    },
+    {
+        "nombre": "kikes.get_facturas_negocio",
+        "indice": "idx_facturas_open_negocio_fecha",
+        "consulta": lambda p: (kikes.SQL_FACTURAS_NEGOCIO, (p["negocio"],)),
+    },
+    {
+        "nombre": "kikes.get_evolucion_grupo",
+        "indice": "idx_remisiones_open_negocio_fecha",
+        "consulta": lambda p: (kikes.SQL_EVOLUCION_GRUPO, (p["negocios"],)),
+    },
+    {
+        "nombre": "kikes.get_evolucion_acumulada_grupo",
+        "indice": "idx_remisiones_open_negocio_fecha",
+        "consulta": lambda p: (kikes.SQL_EVOLUCION_ACUMULADA_GRUPO, (p["negocios"],)),
+    },
+    {
+        "nombre": "todos_clientes.get_remisiones_detalle (cliente)",
+        "indice": "idx_remisiones_open_cliente_fecha",
+        "consulta": lambda p: todos_clientes.consulta_remisiones_detalle(id_cliente=p["cliente"]),
+    },
+    {
+        "nombre": "todos_clientes.get_remisiones_detalle (negocio)",
+        "indice": "idx_remisiones_open_negocio_fecha",
+        "consulta": lambda p: todos_clientes.consulta_remisiones_detalle(nombre_negocio=p["negocio"]),
+    },
+    {
+        "nombre": "todos_clientes.get_facturas_detalle (cliente)",
+        "indice": "idx_facturas_open_cliente_fecha",
+        "consulta": lambda p: todos_clientes.consulta_facturas_detalle(id_cliente=p["cliente"]),
+    },
+    {
+        "nombre": "todos_clientes.get_facturas_detalle (negocio)",
+        "indice": "idx_facturas_open_negocio_fecha",
+        "consulta": lambda p: todos_clientes.consulta_facturas_detalle(nombre_negocio=p["negocio"]),
+    },
+]
+
+
+def parametros_ejemplo(cur):
+    """Toma un negocio y un cliente con documentos abiertos (o valores ficticios si no hay)"""
+    cur.execute("""
+        SELECT nombre_negocio, id_cliente FROM remisiones
+        WHERE estado_remision = 'open' AND nombre_negocio IS NOT NULL
+        LIMIT 1
+    """)
+    fila = cur.fetchone() or ("SIN DATOS", 1)
+    return {"negocio": fila[0], "negocios": (fila[0],), "cliente": fila[1]}
+
+
+def nodos(plan):
+    """Recorre el árbol de un plan JSON de EXPLAIN"""
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from nodos(hijo)
+
+
+def verificar(cur, consulta, params):
+    """Retorna (ok, plan) para una consulta"""
+    sql, valores = consulta["consulta"](params)
+    cur.execute("EXPLAIN (FORMAT JSON) " + sql, valores)
+    plan = cur.fetchone()[0][0]["Plan"]
+
+    index_only = any(
+        n["Node Type"] == "Index Only Scan" and n.get("Index Name") == consulta["indice"]
+        for n in nodos(plan)
+    )
+    seq_scan = any(
+        n["Node Type"] == "Seq Scan" and n.get("Relation Name") in ("remisiones", "facturas")
+        for n in nodos(plan)
+    )
+    return index_only and not seq_scan, plan
+
+
+def vacuum():
+    """VACUUM ANALYZE de las tablas de documentos (no puede correr dentro de una transacción)"""
+    conn = crear_conexion()
+    conn.autocommit = True
+    try:
+        cur = conn.cursor()
+        cur.execute("VACUUM ANALYZE remisiones")
+        cur.execute("VACUUM ANALYZE facturas")
+        cur.close()
+    finally:
+        _cerrar_silencioso(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica los planes de las consultas de cartera")
+    parser.add_argument("--planes", action="store_true", help="Imprime el plan de cada consulta")
+    parser.add_argument("--vacuum", action="store_true", help="Ejecuta VACUUM ANALYZE antes de verificar")
+    args = parser.parse_args()
+
+    if args.vacuum:
+        vacuum()
+
+    fallidas = 0
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SET LOCAL enable_seqscan = off")
+        cur.execute("SET LOCAL enable_bitmapscan = off")
+        params = parametros_ejemplo(cur)
+
+        for consulta in CONSULTAS:
+            ok, plan = verificar(cur, consulta, params)
+            if not ok:
+                fallidas += 1
+            print(f"{'OK   ' if ok else 'FALLA'} {consulta['nombre']} -> {consulta['indice']}")
+            if args.planes or not ok:
+                print(json.dumps(plan, indent=2, ensure_ascii=False))
+
+        conn.rollback()
+        cur.close()
+
+    print(f"\n{len(CONSULTAS) - fallidas}/{len(CONSULTAS)} consultas con Index Only Scan")
+    sys.exit(1 if fallidas else 0)
+
+
+if __name__ == "__main__":
+    main()
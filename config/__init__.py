@@ -1,6 +1,6 @@
 """
 Módulo de configuración
 """
-from config.settings import DB_CONFIG, ALEGRA_CONFIG, APP_CONFIG, TIPOS_DOCUMENTO
+from config.settings import DB_CONFIG, DB_POOL_CONFIG, ALEGRA_CONFIG, SYNC_WORKER_CONFIG, DB_LISTEN_CONFIG, NOMINA_CONFIG, APP_CONFIG, TIPOS_DOCUMENTO
 
-__all__ = ['DB_CONFIG', 'ALEGRA_CONFIG', 'APP_CONFIG', 'TIPOS_DOCUMENTO']
+__all__ = ['DB_CONFIG', 'DB_POOL_CONFIG', 'ALEGRA_CONFIG', 'SYNC_WORKER_CONFIG', 'DB_LISTEN_CONFIG', 'NOMINA_CONFIG', 'APP_CONFIG', 'TIPOS_DOCUMENTO']
@@ -32,6 +32,20 @@ DB_CONFIG = {
     "port": int(os.getenv("DB_PORT", 5432))
 }
 
+# Pool de conexiones compartido por todo el proceso
+DB_POOL_CONFIG = {
+    "minconn": int(os.getenv("DB_POOL_MIN", 1)),
+    "maxconn": int(os.getenv("DB_POOL_MAX", 10)),
+    # Segundos que se espera a que se libere una conexión si el pool está lleno
+    "timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+    # Segundos de inactividad tras los cuales se verifica la conexión con SELECT 1
+    "health_check_interval": float(os.getenv("DB_POOL_HEALTH_CHECK", 30)),
+    # Segundos sin uso tras los cuales se cierra una conexión libre (0 = nunca)
+    "idle_timeout": float(os.getenv("DB_POOL_IDLE_TIMEOUT", 300)),
+    # Segundos prestada tras los cuales una conexión se reporta como fuga (0 = desactivado)
+    "leak_timeout": float(os.getenv("DB_POOL_LEAK_TIMEOUT", 120))
+}
+
 # Validar que las credenciales estén configuradas
 def validar_db_config():
     """Valida que las credenciales de BD estén configuradas"""
@@ -47,7 +61,59 @@ def validar_db_config():
 ALEGRA_CONFIG = {
     "base_url": "https://api.alegra.com/api/v1",
     "email": os.getenv("ALEGRA_EMAIL"),
-    "api_key": os.getenv("ALEGRA_API_KEY")
+    "api_key": os.getenv("ALEGRA_API_KEY"),
+    # Descarga de páginas
+    "page_size": 30,  # Máximo permitido por Alegra
+    "timeout": 30,
+    "max_workers": int(os.getenv("ALEGRA_MAX_WORKERS", 4)),
+    "requests_per_second": float(os.getenv("ALEGRA_REQUESTS_PER_SECOND", 4)),
+    "burst": int(os.getenv("ALEGRA_BURST", 2)),
+    "min_requests_per_second": float(os.getenv("ALEGRA_MIN_REQUESTS_PER_SECOND", 0.5)),
+    "max_retries": int(os.getenv("ALEGRA_MAX_RETRIES", 3))
+}
+
+# ==================== WORKER DE SINCRONIZACIÓN ====================
+SYNC_WORKER_CONFIG = {
+    # Segundos entre revisiones de la cola de trabajos
+    "poll_interval": int(os.getenv("SYNC_POLL_INTERVAL", 5)),
+    # Sincronizaciones programadas (segundos; 0 desactiva)
+    "intervalo_incremental": int(os.getenv("SYNC_INTERVAL_INCREMENTAL", 900)),
+    "intervalo_full": int(os.getenv("SYNC_INTERVAL_FULL", 3600)),
+    # Clave del advisory lock de PostgreSQL que garantiza una sola sincronización a la vez
+    "lock_key": int(os.getenv("SYNC_LOCK_KEY", 740215)),
+    # Alerta de sincronización lenta: duración mayor a factor x mediana de las
+    # últimas ejecuciones del mismo tipo, o mayor al máximo absoluto (0 desactiva)
+    "alerta_factor": float(os.getenv("SYNC_ALERT_FACTOR", 2.0)),
+    "alerta_max_segundos": int(os.getenv("SYNC_ALERT_MAX_SECONDS", 0))
+}
+
+# ==================== AVISOS DE CAMBIOS (LISTEN/NOTIFY) ====================
+DB_LISTEN_CONFIG = {
+    # Escuchar los avisos de PostgreSQL. Requiere una conexión directa o un pooler
+    # en modo sesión (el modo transacción de Supabase, puerto 6543, no admite LISTEN)
+    "habilitado": os.getenv("DB_LISTEN_ENABLED", "true").lower() == "true",
+    # Segundos de espera antes de reconectar si se pierde la conexión de escucha
+    "reintento": int(os.getenv("DB_LISTEN_RETRY", 5)),
+    # Cada cuántos segundos el tablero revisa si llegaron avisos (no consulta la BD)
+    "refresco_tablero": int(os.getenv("DB_LISTEN_BOARD_REFRESH", 1))
+}
+
+# ==================== NÓMINA ====================
+NOMINA_CONFIG = {
+    # Liquidación (services/nomina.py). Valor hora = salario_dia / horas_jornada
+    "horas_jornada": float(os.getenv("NOMINA_HORAS_JORNADA", 8)),
+    # Tope semanal de horas ordinarias (services/reglas_horas.py); 0 = sin tope semanal
+    "horas_semana": float(os.getenv("NOMINA_HORAS_SEMANA", 0)),
+    # Festivos con recargo dominical, fechas AAAA-MM-DD separadas por coma
+    "festivos": [f.strip() for f in os.getenv("NOMINA_FESTIVOS", "").split(",") if f.strip()],
+    # Franja nocturna en hora de Colombia: desde hora_inicio_nocturna hasta hora_fin_nocturna del día siguiente
+    "hora_inicio_nocturna": int(os.getenv("NOMINA_HORA_INICIO_NOCTURNA", 19)),
+    "hora_fin_nocturna": int(os.getenv("NOMINA_HORA_FIN_NOCTURNA", 6)),
+    # Recargos sobre el valor hora (0.35 = 35 %)
+    "recargo_nocturno": float(os.getenv("NOMINA_RECARGO_NOCTURNO", 0.35)),
+    "recargo_dominical": float(os.getenv("NOMINA_RECARGO_DOMINICAL", 0.90)),
+    "recargo_extra_diurna": float(os.getenv("NOMINA_RECARGO_EXTRA_DIURNA", 0.25)),
+    "recargo_extra_nocturna": float(os.getenv("NOMINA_RECARGO_EXTRA_NOCTURNA", 0.75))
 }
 
 # ==================== APLICACIÓN ====================
@@ -1,7 +1,7 @@
 """
 Módulo de base de datos - Conexión y operaciones
 """
-from data_base.connection import get_connection
+from data_base.connection import get_connection, get_pool_stats
 from data_base.controler import (
     # Clientes
     insert_cliente,
@@ -16,6 +16,7 @@ from data_base.controler import (
     update_remision_valor,
     reset_all_remisiones_to_closed,
     upsert_remision,
+    bulk_upsert_remisiones,
     # Facturas
     get_last_invoice_number,
     insert_factura,
@@ -25,6 +26,20 @@ from data_base.controler import (
     update_factura_valor,
     reset_all_facturas_to_closed,
     upsert_factura,
+    bulk_upsert_facturas,
+    CargaEnBloque,
+    # Sincronización
+    get_sync_estado,
+    encolar_sync_job,
+    tomar_sync_job,
+    finalizar_sync_job,
+    liberar_sync_jobs_huerfanos,
+    get_sync_job,
+    get_ultimo_sync_job,
+    insert_sync_run,
+    finalizar_sync_run,
+    get_duraciones_sync_runs,
+    get_ultimo_sync_run,
     # Empleados
     insert_empleado,
     check_cedula_exists,
@@ -33,6 +48,7 @@ from data_base.controler import (
 
 __all__ = [
     'get_connection',
+    'get_pool_stats',
     'insert_cliente',
     'insert_negocio',
     'get_last_remission_number',
@@ -43,6 +59,7 @@ __all__ = [
     'update_remision_valor',
     'reset_all_remisiones_to_closed',
     'upsert_remision',
+    'bulk_upsert_remisiones',
     'get_last_invoice_number',
     'insert_factura',
     'get_all_facturas_open',
@@ -51,6 +68,19 @@ __all__ = [
     'update_factura_valor',
     'reset_all_facturas_to_closed',
     'upsert_factura',
+    'bulk_upsert_facturas',
+    'CargaEnBloque',
+    'get_sync_estado',
+    'encolar_sync_job',
+    'tomar_sync_job',
+    'finalizar_sync_job',
+    'liberar_sync_jobs_huerfanos',
+    'get_sync_job',
+    'get_ultimo_sync_job',
+    'insert_sync_run',
+    'finalizar_sync_run',
+    'get_duraciones_sync_runs',
+    'get_ultimo_sync_run',
     'insert_empleado',
     'check_cedula_exists',
     'get_all_empleados',
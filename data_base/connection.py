@@ -1,18 +1,37 @@
 """
 Conexión a la base de datos PostgreSQL
+
+Las conexiones se toman de un pool compartido por todo el proceso. Cada
+función del controlador las presta con ``with get_connection() as conn:`` y
+las devuelve al salir del bloque, evitando abrir una conexión TCP nueva por
+consulta.
 """
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+import atexit
+import logging
+import threading
+import time
+import traceback
 import sys
 import os
+from contextlib import contextmanager
 
 # Agregar el directorio raíz al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.settings import DB_CONFIG
+from config.settings import DB_CONFIG, DB_POOL_CONFIG
 
+logger = logging.getLogger(__name__)
 
-def get_connection():
-    """Crea y retorna una conexión a la base de datos"""
+
+class PoolAgotadoError(PoolError):
+    """No se liberó ninguna conexión del pool dentro del tiempo de espera"""
+
+
+def crear_conexion():
+    """Abre una conexión nueva, fuera del pool"""
     return psycopg2.connect(
         host=DB_CONFIG["host"],
         database=DB_CONFIG["database"],
@@ -20,3 +39,303 @@ def get_connection():
         password=DB_CONFIG["password"],
         port=DB_CONFIG["port"]
     )
+
+
+def _cerrar_silencioso(conn):
+    """Cierra una conexión ignorando errores (p. ej. si el servidor ya la cortó)"""
+    try:
+        conn.close()
+    except psycopg2.Error:
+        pass
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe con tamaño mínimo/máximo.
+
+    - Mantiene hasta ``maxconn`` conexiones abiertas; si todas están prestadas,
+      espera hasta ``timeout`` segundos a que se libere una.
+    - Antes de prestar una conexión que lleva más de ``health_check_interval``
+      segundos sin usarse, ejecuta ``SELECT 1``; si falla la descarta y abre
+      una nueva (reconexión automática).
+    - Al devolverla hace rollback de cualquier transacción pendiente.
+    - Un hilo de mantenimiento cierra las conexiones libres que superan
+      ``idle_timeout`` segundos sin uso (respetando ``minconn``) y reporta como
+      fuga las que llevan más de ``leak_timeout`` segundos prestadas, junto con
+      el punto del código donde se pidieron.
+    """
+
+    def __init__(self, minconn=1, maxconn=10, timeout=30, health_check_interval=30,
+                 idle_timeout=300, leak_timeout=120, reap_interval=30):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Tamaño de pool inválido: se requiere 0 <= minconn <= maxconn y maxconn >= 1")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.idle_timeout = idle_timeout
+        self.leak_timeout = leak_timeout
+
+        self._cond = threading.Condition()
+        self._libres = []      # [(conn, instante_ultimo_uso)]
+        self._en_uso = {}      # id(conn) -> (conn, instante_prestamo, origen)
+        self._fugas_reportadas = set()
+        self._total = 0
+        self._cerrado = False
+        self._metricas = {
+            "prestamos": 0,
+            "conexiones_creadas": 0,
+            "conexiones_cerradas": 0,
+            "conexiones_recicladas": 0,
+            "esperas": 0,
+            "timeouts": 0,
+            "fugas_detectadas": 0,
+            "max_en_uso": 0,
+        }
+
+        for _ in range(minconn):
+            self._libres.append((self._conectar(), time.monotonic()))
+            self._total += 1
+
+        self._detener = threading.Event()
+        if reap_interval and (idle_timeout or leak_timeout):
+            hilo = threading.Thread(
+                target=self._mantenimiento,
+                args=(reap_interval,),
+                name="db-pool-mantenimiento",
+                daemon=True
+            )
+            hilo.start()
+
+    def _conectar(self):
+        """Abre una conexión nueva y la contabiliza"""
+        conn = crear_conexion()
+        with self._cond:
+            self._metricas["conexiones_creadas"] += 1
+        return conn
+
+    def _cerrar(self, conn):
+        """Cierra una conexión y la contabiliza"""
+        _cerrar_silencioso(conn)
+        with self._cond:
+            self._metricas["conexiones_cerradas"] += 1
+
+    def _esta_sana(self, conn, ultimo_uso):
+        """Verifica que la conexión siga viva antes de prestarla"""
+        if conn.closed:
+            return False
+        if time.monotonic() - ultimo_uso < self.health_check_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Toma una conexión del pool (o abre una nueva si hay cupo)"""
+        limite = time.monotonic() + self.timeout
+
+        with self._cond:
+            while True:
+                if self._cerrado:
+                    raise PoolAgotadoError("El pool de conexiones está cerrado")
+                if self._libres:
+                    conn, ultimo_uso = self._libres.pop()
+                    break
+                if self._total < self.maxconn:
+                    self._total += 1
+                    conn, ultimo_uso = None, None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._metricas["timeouts"] += 1
+                    raise PoolAgotadoError(
+                        f"No hay conexiones disponibles (máximo {self.maxconn}) "
+                        f"después de esperar {self.timeout}s"
+                    )
+                self._metricas["esperas"] += 1
+                self._cond.wait(restante)
+
+        try:
+            if conn is not None and not self._esta_sana(conn, ultimo_uso):
+                self._cerrar(conn)
+                with self._cond:
+                    self._metricas["conexiones_recicladas"] += 1
+                conn = None
+            if conn is None:
+                conn = self._conectar()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        # Solo se captura la pila si la detección de fugas está activa
+        origen = traceback.extract_stack(limit=8)[:-2] if self.leak_timeout else None
+
+        with self._cond:
+            self._en_uso[id(conn)] = (conn, time.monotonic(), origen)
+            self._metricas["prestamos"] += 1
+            self._metricas["max_en_uso"] = max(self._metricas["max_en_uso"], len(self._en_uso))
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Devuelve una conexión al pool; la cierra si quedó en mal estado"""
+        with self._cond:
+            self._en_uso.pop(id(conn), None)
+            self._fugas_reportadas.discard(id(conn))
+
+        reutilizable = not close and not conn.closed and not self._cerrado
+        if reutilizable:
+            estado = conn.info.transaction_status
+            if estado == extensions.TRANSACTION_STATUS_UNKNOWN:
+                reutilizable = False
+            elif estado != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    reutilizable = False
+
+        if not reutilizable:
+            self._cerrar(conn)
+
+        with self._cond:
+            if reutilizable:
+                self._libres.append((conn, time.monotonic()))
+            else:
+                self._total -= 1
+            self._cond.notify()
+
+    def _mantenimiento(self, intervalo):
+        """Hilo de fondo: cierra conexiones inactivas y reporta fugas"""
+        while not self._detener.wait(intervalo):
+            try:
+                self.cerrar_inactivas()
+                self.detectar_fugas()
+            except Exception:
+                logger.exception("Error en el mantenimiento del pool de conexiones")
+
+    def cerrar_inactivas(self):
+        """Cierra las conexiones libres inactivas por más de idle_timeout (deja minconn abiertas)"""
+        if not self.idle_timeout:
+            return 0
+
+        ahora = time.monotonic()
+        with self._cond:
+            sobrantes = max(0, self._total - self.minconn)
+            # Las más antiguas están al inicio de la lista (se presta desde el final)
+            vencidas = [
+                item for item in self._libres
+                if ahora - item[1] > self.idle_timeout
+            ][:sobrantes]
+            for item in vencidas:
+                self._libres.remove(item)
+            self._total -= len(vencidas)
+            self._cond.notify_all()
+
+        for conn, _ in vencidas:
+            self._cerrar(conn)
+        return len(vencidas)
+
+    def detectar_fugas(self):
+        """Registra una advertencia por cada conexión prestada más de leak_timeout segundos"""
+        if not self.leak_timeout:
+            return []
+
+        ahora = time.monotonic()
+        with self._cond:
+            fugas = [
+                (clave, prestada, origen)
+                for clave, (_, prestada, origen) in self._en_uso.items()
+                if ahora - prestada > self.leak_timeout and clave not in self._fugas_reportadas
+            ]
+            for clave, _, _ in fugas:
+                self._fugas_reportadas.add(clave)
+            self._metricas["fugas_detectadas"] += len(fugas)
+
+        for _, prestada, origen in fugas:
+            logger.warning(
+                "Posible fuga de conexión: prestada hace %.0fs sin devolverse. Pedida en:\n%s",
+                ahora - prestada,
+                "".join(traceback.format_list(origen)) if origen else "(desconocido)"
+            )
+        return fugas
+
+    def stats(self):
+        """Métricas del pool: conexiones prestadas, libres y contadores acumulados"""
+        with self._cond:
+            datos = dict(self._metricas)
+            datos.update({
+                "en_uso": len(self._en_uso),
+                "libres": len(self._libres),
+                "abiertas": self._total,
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+            })
+        return datos
+
+    def closeall(self):
+        """Cierra todas las conexiones libres y marca el pool como cerrado"""
+        self._detener.set()
+        with self._cond:
+            self._cerrado = True
+            libres, self._libres = self._libres, []
+            self._total -= len(libres)
+            self._cond.notify_all()
+        for conn, _ in libres:
+            self._cerrar(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Retorna el pool de conexiones del proceso (se crea en el primer uso)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    minconn=DB_POOL_CONFIG["minconn"],
+                    maxconn=DB_POOL_CONFIG["maxconn"],
+                    timeout=DB_POOL_CONFIG["timeout"],
+                    health_check_interval=DB_POOL_CONFIG["health_check_interval"],
+                    idle_timeout=DB_POOL_CONFIG["idle_timeout"],
+                    leak_timeout=DB_POOL_CONFIG["leak_timeout"]
+                )
+                atexit.register(_pool.closeall)
+    return _pool
+
+
+def get_pool_stats():
+    """Métricas del pool del proceso (conexiones prestadas, libres, fugas, etc.)"""
+    return get_pool().stats()
+
+
+@contextmanager
+def get_connection():
+    """
+    Presta una conexión del pool durante el bloque ``with``.
+
+    Si el bloque lanza una excepción se hace rollback; en todos los casos la
+    conexión vuelve al pool al salir.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        raise
+    finally:
+        pool.putconn(conn)
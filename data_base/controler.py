@@ -1,385 +1,864 @@
 """
 Controlador de operaciones de base de datos
 """
+import time
 import psycopg2
-from psycopg2 import sql
-from data_base.connection import get_connection
+from psycopg2 import sql, extensions
+from psycopg2.extras import execute_values
+from data_base.connection import get_connection, crear_conexion, _cerrar_silencioso
 
 
 def get_last_remission_number():
     """Obtiene el número de la última remisión guardada"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT MAX(numero_remision) FROM remisiones")
-    result = cur.fetchone()[0]
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT MAX(numero_remision) FROM remisiones")
+        result = cur.fetchone()[0]
+        
+        cur.close()
     
     return result or 0
 
 
 def insert_cliente(nit, nombre):
     """Inserta un cliente si no existe y retorna su id"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Verificar si el cliente ya existe
-    cur.execute("SELECT id_cliente FROM clientes WHERE nit_cliente = %s", (nit,))
-    result = cur.fetchone()
-    
-    if result:
-        id_cliente = result[0]
-    else:
-        cur.execute(
-            "INSERT INTO clientes (nit_cliente, nombre_cliente) VALUES (%s, %s) RETURNING id_cliente",
-            (nit, nombre)
-        )
-        id_cliente = cur.fetchone()[0]
-        conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Verificar si el cliente ya existe
+        cur.execute("SELECT id_cliente FROM clientes WHERE nit_cliente = %s", (nit,))
+        result = cur.fetchone()
+        
+        if result:
+            id_cliente = result[0]
+        else:
+            cur.execute(
+                "INSERT INTO clientes (nit_cliente, nombre_cliente) VALUES (%s, %s) RETURNING id_cliente",
+                (nit, nombre)
+            )
+            id_cliente = cur.fetchone()[0]
+            conn.commit()
+        
+        cur.close()
     
     return id_cliente
 
 
 def insert_negocio(id_cliente, nombre_negocio):
     """Inserta un negocio si no existe"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Verificar si el negocio ya existe
-    cur.execute(
-        "SELECT id_negocio FROM negocios WHERE id_cliente = %s AND nombre_negocio = %s",
-        (id_cliente, nombre_negocio)
-    )
-    result = cur.fetchone()
-    
-    if not result:
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Verificar si el negocio ya existe
         cur.execute(
-            "INSERT INTO negocios (id_cliente, nombre_negocio) VALUES (%s, %s)",
+            "SELECT id_negocio FROM negocios WHERE id_cliente = %s AND nombre_negocio = %s",
             (id_cliente, nombre_negocio)
         )
-        conn.commit()
-    
-    cur.close()
-    conn.close()
+        result = cur.fetchone()
+        
+        if not result:
+            cur.execute(
+                "INSERT INTO negocios (id_cliente, nombre_negocio) VALUES (%s, %s)",
+                (id_cliente, nombre_negocio)
+            )
+            conn.commit()
+        
+        cur.close()
 
 
 def insert_remision(numero_remision, id_cliente, fecha, estado, valor):
     """Inserta una remisión si no existe"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Verificar si la remisión ya existe
-    cur.execute("SELECT remision_id FROM remisiones WHERE numero_remision = %s", (numero_remision,))
-    result = cur.fetchone()
-    
-    if not result:
-        cur.execute(
-            """INSERT INTO remisiones (numero_remision, id_cliente, fecha, estado_remision, valor_remsion) 
-               VALUES (%s, %s, %s, %s, %s)""",
-            (numero_remision, id_cliente, fecha, estado, valor)
-        )
-        conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Verificar si la remisión ya existe
+        cur.execute("SELECT remision_id FROM remisiones WHERE numero_remision = %s", (numero_remision,))
+        result = cur.fetchone()
+        
+        if not result:
+            cur.execute(
+                """INSERT INTO remisiones (numero_remision, id_cliente, fecha, estado_remision, valor_remsion) 
+                   VALUES (%s, %s, %s, %s, %s)""",
+                (numero_remision, id_cliente, fecha, estado, valor)
+            )
+            conn.commit()
+        
+        cur.close()
 
 
 def get_last_invoice_number():
     """Obtiene el número de la última factura guardada"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT MAX(numero_factura) FROM facturas")
-    result = cur.fetchone()[0]
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT MAX(numero_factura) FROM facturas")
+        result = cur.fetchone()[0]
+        
+        cur.close()
     
     return result or ""
 
 
 def insert_factura(numero_factura, id_cliente, fecha, estado, valor):
     """Inserta una factura si no existe"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Verificar si la factura ya existe
-    cur.execute("SELECT factura_id FROM facturas WHERE numero_factura = %s", (numero_factura,))
-    result = cur.fetchone()
-    
-    if not result:
-        cur.execute(
-            """INSERT INTO facturas (numero_factura, id_cliente, fecha, estado_factura, valor_factura) 
-               VALUES (%s, %s, %s, %s, %s)""",
-            (numero_factura, id_cliente, fecha, estado, valor)
-        )
-        conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Verificar si la factura ya existe
+        cur.execute("SELECT factura_id FROM facturas WHERE numero_factura = %s", (numero_factura,))
+        result = cur.fetchone()
+        
+        if not result:
+            cur.execute(
+                """INSERT INTO facturas (numero_factura, id_cliente, fecha, estado_factura, valor_factura) 
+                   VALUES (%s, %s, %s, %s, %s)""",
+                (numero_factura, id_cliente, fecha, estado, valor)
+            )
+            conn.commit()
+        
+        cur.close()
 
 
 # ==================== FUNCIONES DE ACTUALIZACIÓN ====================
 
 def get_all_remisiones_open():
     """Obtiene todas las remisiones con estado 'open'"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT numero_remision, estado_remision FROM remisiones WHERE estado_remision = 'open'")
-    result = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT numero_remision, estado_remision FROM remisiones WHERE estado_remision = 'open'")
+        result = cur.fetchall()
+        
+        cur.close()
     
     return result
 
 
 def update_remision_estado(numero_remision, nuevo_estado):
     """Actualiza el estado de una remisión"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute(
-        "UPDATE remisiones SET estado_remision = %s WHERE numero_remision = %s",
-        (nuevo_estado, numero_remision)
-    )
-    conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            "UPDATE remisiones SET estado_remision = %s WHERE numero_remision = %s",
+            (nuevo_estado, numero_remision)
+        )
+        conn.commit()
+        
+        cur.close()
 
 
 def get_all_facturas_open():
     """Obtiene todas las facturas con estado 'open'"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT numero_factura, estado_factura FROM facturas WHERE estado_factura = 'open'")
-    result = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT numero_factura, estado_factura FROM facturas WHERE estado_factura = 'open'")
+        result = cur.fetchall()
+        
+        cur.close()
     
     return result
 
 
 def update_factura_estado(numero_factura, nuevo_estado):
     """Actualiza el estado de una factura"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute(
-        "UPDATE facturas SET estado_factura = %s WHERE numero_factura = %s",
-        (nuevo_estado, numero_factura)
-    )
-    conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            "UPDATE facturas SET estado_factura = %s WHERE numero_factura = %s",
+            (nuevo_estado, numero_factura)
+        )
+        conn.commit()
+        
+        cur.close()
 
 
 def update_remision_valor(numero_remision, nuevo_valor):
     """Actualiza el valor de una remisión"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute(
-        "UPDATE remisiones SET valor_remsion = %s WHERE numero_remision = %s",
-        (nuevo_valor, numero_remision)
-    )
-    conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            "UPDATE remisiones SET valor_remsion = %s WHERE numero_remision = %s",
+            (nuevo_valor, numero_remision)
+        )
+        conn.commit()
+        
+        cur.close()
 
 
 def update_factura_valor(numero_factura, nuevo_valor):
     """Actualiza el valor de una factura"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute(
-        "UPDATE facturas SET valor_factura = %s WHERE numero_factura = %s",
-        (nuevo_valor, numero_factura)
-    )
-    conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            "UPDATE facturas SET valor_factura = %s WHERE numero_factura = %s",
+            (nuevo_valor, numero_factura)
+        )
+        conn.commit()
+        
+        cur.close()
 
 
 def get_all_remisiones_open_with_value():
     """Obtiene todas las remisiones abiertas con su valor actual"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT numero_remision, estado_remision, valor_remsion FROM remisiones WHERE estado_remision = 'open'")
-    result = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT numero_remision, estado_remision, valor_remsion FROM remisiones WHERE estado_remision = 'open'")
+        result = cur.fetchall()
+        
+        cur.close()
     
     return result
 
 
 def get_all_facturas_open_with_value():
     """Obtiene todas las facturas abiertas con su valor actual"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT numero_factura, estado_factura, valor_factura FROM facturas WHERE estado_factura = 'open'")
-    result = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT numero_factura, estado_factura, valor_factura FROM facturas WHERE estado_factura = 'open'")
+        result = cur.fetchall()
+        
+        cur.close()
     
     return result
 
 
 def reset_all_remisiones_to_closed():
     """Marca todas las remisiones abiertas como cerradas (para sincronización completa)"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("UPDATE remisiones SET estado_remision = 'closed' WHERE estado_remision = 'open'")
-    count = cur.rowcount
-    conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("UPDATE remisiones SET estado_remision = 'closed' WHERE estado_remision = 'open'")
+        count = cur.rowcount
+        conn.commit()
+        
+        cur.close()
     
     return count
 
 
 def reset_all_facturas_to_closed():
     """Marca todas las facturas abiertas como cerradas (para sincronización completa)"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("UPDATE facturas SET estado_factura = 'closed' WHERE estado_factura = 'open'")
-    count = cur.rowcount
-    conn.commit()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("UPDATE facturas SET estado_factura = 'closed' WHERE estado_factura = 'open'")
+        count = cur.rowcount
+        conn.commit()
+        
+        cur.close()
     
     return count
 
 
 def upsert_remision(numero_remision, id_cliente, fecha, estado, valor, nombre_negocio):
     """Inserta o actualiza una remisión"""
-    conn = get_connection()
-    cur = conn.cursor()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Verificar si existe
+        cur.execute("SELECT remision_id FROM remisiones WHERE numero_remision = %s", (numero_remision,))
+        result = cur.fetchone()
+        
+        if result:
+            # Actualizar
+            cur.execute("""
+                UPDATE remisiones 
+                SET estado_remision = %s, valor_remsion = %s, nombre_negocio = %s
+                WHERE numero_remision = %s
+            """, (estado, valor, nombre_negocio, numero_remision))
+        else:
+            # Insertar
+            cur.execute("""
+                INSERT INTO remisiones (numero_remision, id_cliente, fecha, estado_remision, valor_remsion, nombre_negocio)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (numero_remision, id_cliente, fecha, estado, valor, nombre_negocio))
+        
+        conn.commit()
+        cur.close()
     
-    # Verificar si existe
-    cur.execute("SELECT remision_id FROM remisiones WHERE numero_remision = %s", (numero_remision,))
-    result = cur.fetchone()
+    return result is None  # True si fue insertado, False si fue actualizado
+
+
+def upsert_factura(numero_factura, id_cliente, fecha, estado, valor, balance, nombre_negocio):
+    """Inserta o actualiza una factura"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Verificar si existe
+        cur.execute("SELECT factura_id FROM facturas WHERE numero_factura = %s", (numero_factura,))
+        result = cur.fetchone()
+        
+        if result:
+            # Actualizar
+            cur.execute("""
+                UPDATE facturas 
+                SET estado_factura = %s, valor_factura = %s, balance_factura = %s, nombre_negocio = %s
+                WHERE numero_factura = %s
+            """, (estado, valor, balance, nombre_negocio, numero_factura))
+        else:
+            # Insertar
+            cur.execute("""
+                INSERT INTO facturas (numero_factura, id_cliente, fecha, estado_factura, valor_factura, balance_factura, nombre_negocio)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (numero_factura, id_cliente, fecha, estado, valor, balance, nombre_negocio))
+        
+        conn.commit()
+        cur.close()
     
-    if result:
-        # Actualizar
+    return result is None  # True si fue insertado, False si fue actualizado
+
+
+def get_sync_estado(recurso):
+    """Obtiene la marca de agua de la sincronización incremental: (ultimo_id, ultimo_offset, modified_at)"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            "SELECT ultimo_id, ultimo_offset, modified_at FROM sync_estado WHERE recurso = %s",
+            (recurso,)
+        )
+        result = cur.fetchone()
+        
+        cur.close()
+    
+    return result
+
+
+def _guardar_sync_estado(cur, recurso, ultimo_id, ultimo_offset):
+    """Actualiza la marca de agua dentro de la transacción en curso"""
+    cur.execute("""
+        INSERT INTO sync_estado (recurso, ultimo_id, ultimo_offset)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (recurso) DO UPDATE
+        SET ultimo_id = EXCLUDED.ultimo_id,
+            ultimo_offset = EXCLUDED.ultimo_offset,
+            modified_at = CURRENT_TIMESTAMP
+    """, (recurso, ultimo_id, ultimo_offset))
+
+
+def encolar_sync_job(tipo, solicitado_por=None):
+    """
+    Encola una sincronización y retorna (id_job, error).
+    
+    Si ya hay un trabajo pendiente retorna su id; pedir 'full' lo convierte en
+    completo, porque la sincronización completa incluye a la incremental.
+    Con ON CONFLICT DO UPDATE siempre retorna una fila, aunque el worker tome
+    el pendiente al mismo tiempo (en ese caso se inserta uno nuevo).
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute("""
+                INSERT INTO sync_jobs (tipo, solicitado_por)
+                VALUES (%s, %s)
+                ON CONFLICT (estado) WHERE estado = 'pendiente' DO UPDATE
+                SET tipo = CASE WHEN EXCLUDED.tipo = 'full' THEN 'full' ELSE sync_jobs.tipo END
+                RETURNING id_job
+            """, (tipo, solicitado_por))
+            id_job = cur.fetchone()[0]
+            conn.commit()
+            return id_job, None
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
+
+
+def tomar_sync_job():
+    """Marca 'en_curso' el trabajo pendiente más antiguo y retorna (id_job, tipo), o None"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
         cur.execute("""
-            UPDATE remisiones 
-            SET estado_remision = %s, valor_remsion = %s, nombre_negocio = %s
-            WHERE numero_remision = %s
-        """, (estado, valor, nombre_negocio, numero_remision))
-    else:
-        # Insertar
+            UPDATE sync_jobs
+            SET estado = 'en_curso', inicio_at = CURRENT_TIMESTAMP
+            WHERE id_job = (
+                SELECT id_job FROM sync_jobs
+                WHERE estado = 'pendiente'
+                ORDER BY create_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id_job, tipo
+        """)
+        result = cur.fetchone()
+        conn.commit()
+        
+        cur.close()
+    
+    return result
+
+
+def finalizar_sync_job(id_job, estado, mensaje=None):
+    """Registra el resultado de un trabajo ('completado' o 'error')"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
         cur.execute("""
-            INSERT INTO remisiones (numero_remision, id_cliente, fecha, estado_remision, valor_remsion, nombre_negocio)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (numero_remision, id_cliente, fecha, estado, valor, nombre_negocio))
+            UPDATE sync_jobs
+            SET estado = %s, mensaje = %s, fin_at = CURRENT_TIMESTAMP
+            WHERE id_job = %s
+        """, (estado, mensaje, id_job))
+        conn.commit()
+        
+        cur.close()
+
+
+def liberar_sync_jobs_huerfanos():
+    """Marca como 'error' los trabajos que quedaron 'en_curso' (el worker se detuvo a mitad)"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            UPDATE sync_jobs
+            SET estado = 'error', mensaje = 'Interrumpido: el worker se detuvo', fin_at = CURRENT_TIMESTAMP
+            WHERE estado = 'en_curso'
+        """)
+        count = cur.rowcount
+        conn.commit()
+        
+        cur.close()
+    
+    return count
+
+
+def get_sync_job(id_job):
+    """Obtiene un trabajo: (id_job, tipo, estado, mensaje, create_at, inicio_at, fin_at)"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT id_job, tipo, estado, mensaje, create_at, inicio_at, fin_at
+            FROM sync_jobs WHERE id_job = %s
+        """, (id_job,))
+        result = cur.fetchone()
+        
+        cur.close()
     
-    conn.commit()
-    cur.close()
-    conn.close()
+    return result
+
+
+def get_ultimo_sync_job():
+    """Obtiene el trabajo de sincronización más reciente (mismo formato que get_sync_job)"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT id_job, tipo, estado, mensaje, create_at, inicio_at, fin_at
+            FROM sync_jobs
+            ORDER BY create_at DESC, id_job DESC
+            LIMIT 1
+        """)
+        result = cur.fetchone()
+        
+        cur.close()
     
-    return result is None  # True si fue insertado, False si fue actualizado
+    return result
+
+
+def insert_sync_run(tipo, id_job=None):
+    """Registra el inicio de una ejecución de sincronización y retorna su id"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            "INSERT INTO sync_runs (tipo, id_job) VALUES (%s, %s) RETURNING id_run",
+            (tipo, id_job)
+        )
+        id_run = cur.fetchone()[0]
+        conn.commit()
+        
+        cur.close()
+    
+    return id_run
+
+
+def finalizar_sync_run(id_run, metricas):
+    """Guarda las métricas finales de una ejecución (dict con las columnas de sync_runs)"""
+    columnas = [
+        "estado", "duracion_s", "paginas", "solicitudes", "latencia_p50_ms",
+        "latencia_p95_ms", "latencia_max_ms", "tiempo_api_s", "tiempo_bd_s",
+        "documentos", "insertados", "actualizados", "cerrados", "errores",
+        "lenta", "mensaje"
+    ]
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            sql.SQL("UPDATE sync_runs SET {}, fin_at = CURRENT_TIMESTAMP WHERE id_run = %s").format(
+                sql.SQL(", ").join(
+                    sql.SQL("{} = %s").format(sql.Identifier(col)) for col in columnas
+                )
+            ),
+            [metricas.get(col) for col in columnas] + [id_run]
+        )
+        conn.commit()
+        
+        cur.close()
+
+
+def get_duraciones_sync_runs(tipo, limit=10):
+    """Duración (s) de las últimas ejecuciones completadas de un tipo, la más reciente primero"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT duracion_s FROM sync_runs
+            WHERE tipo = %s AND estado = 'completado'
+            ORDER BY inicio_at DESC
+            LIMIT %s
+        """, (tipo, limit))
+        result = [float(row[0]) for row in cur.fetchall()]
+        
+        cur.close()
+    
+    return result
+
+
+def get_ultimo_sync_run():
+    """
+    Obtiene la última ejecución terminada:
+    (tipo, estado, inicio_at, fin_at, duracion_s, documentos, paginas, latencia_p95_ms, lenta)
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT tipo, estado, inicio_at, fin_at, duracion_s, documentos, paginas, latencia_p95_ms, lenta
+            FROM sync_runs
+            WHERE estado <> 'en_curso'
+            ORDER BY inicio_at DESC
+            LIMIT 1
+        """)
+        result = cur.fetchone()
+        
+        cur.close()
+    
+    return result
+
+
+# Definición de la carga en bloque por tipo de documento. Las filas llegan como
+# tuplas en el orden de "columnas"; "orden" se agrega al cargarlas.
+_CARGA_DOCUMENTOS = {
+    "remisiones": {
+        "staging": "staging_remisiones",
+        "columnas": """
+            numero_remision INT,
+            fecha DATE,
+            estado_remision VARCHAR(50),
+            valor NUMERIC(15,2),
+            nit_cliente VARCHAR(50),
+            nombre_cliente VARCHAR(255),
+            orden INT
+        """,
+        "upsert": """
+            INSERT INTO remisiones (numero_remision, id_cliente, fecha, estado_remision, valor_remsion, nombre_negocio)
+            SELECT s.numero_remision, c.id_cliente, s.fecha, s.estado_remision, ROUND(s.valor), s.nombre_cliente
+            FROM (
+                -- Un documento puede repetirse entre páginas: gana la última versión
+                SELECT DISTINCT ON (numero_remision) *
+                FROM staging_remisiones
+                ORDER BY numero_remision, orden DESC
+            ) s
+            JOIN clientes c ON c.nit_cliente = s.nit_cliente
+            ON CONFLICT (numero_remision) DO UPDATE
+            SET estado_remision = EXCLUDED.estado_remision,
+                valor_remsion = EXCLUDED.valor_remsion,
+                nombre_negocio = EXCLUDED.nombre_negocio
+            WHERE (remisiones.estado_remision, remisiones.valor_remsion, remisiones.nombre_negocio)
+                  IS DISTINCT FROM (EXCLUDED.estado_remision, EXCLUDED.valor_remsion, EXCLUDED.nombre_negocio)
+            RETURNING (xmax = 0)
+        """,
+        "cerrar": """
+            UPDATE remisiones r
+            SET estado_remision = 'closed'
+            WHERE r.estado_remision = 'open'
+              AND NOT EXISTS (
+                  SELECT 1 FROM staging_remisiones s
+                  WHERE s.numero_remision = r.numero_remision
+              )
+        """,
+    },
+    "facturas": {
+        "staging": "staging_facturas",
+        "columnas": """
+            numero_factura VARCHAR(50),
+            fecha DATE,
+            estado_factura VARCHAR(50),
+            valor NUMERIC(15,2),
+            balance NUMERIC(15,2),
+            nit_cliente VARCHAR(50),
+            nombre_cliente VARCHAR(255),
+            orden INT
+        """,
+        "upsert": """
+            INSERT INTO facturas (numero_factura, id_cliente, fecha, estado_factura, valor_factura, balance_factura, nombre_negocio)
+            SELECT s.numero_factura, c.id_cliente, s.fecha, s.estado_factura, ROUND(s.valor), s.balance, s.nombre_cliente
+            FROM (
+                -- Un documento puede repetirse entre páginas: gana la última versión
+                SELECT DISTINCT ON (numero_factura) *
+                FROM staging_facturas
+                ORDER BY numero_factura, orden DESC
+            ) s
+            JOIN clientes c ON c.nit_cliente = s.nit_cliente
+            ON CONFLICT (numero_factura) DO UPDATE
+            SET estado_factura = EXCLUDED.estado_factura,
+                valor_factura = EXCLUDED.valor_factura,
+                balance_factura = EXCLUDED.balance_factura,
+                nombre_negocio = EXCLUDED.nombre_negocio
+            WHERE (facturas.estado_factura, facturas.valor_factura, facturas.balance_factura, facturas.nombre_negocio)
+                  IS DISTINCT FROM (EXCLUDED.estado_factura, EXCLUDED.valor_factura, EXCLUDED.balance_factura, EXCLUDED.nombre_negocio)
+            RETURNING (xmax = 0)
+        """,
+        "cerrar": """
+            UPDATE facturas f
+            SET estado_factura = 'closed'
+            WHERE f.estado_factura = 'open'
+              AND NOT EXISTS (
+                  SELECT 1 FROM staging_facturas s
+                  WHERE s.numero_factura = f.numero_factura
+              )
+        """,
+    },
+}
+
+
+class CargaEnBloque:
+    """
+    Carga de remisiones o facturas por lotes en una tabla temporal.
+
+    Las filas se acumulan hasta ``tamano_lote`` y se envían con execute_values
+    a la tabla temporal, así la memoria del proceso no crece con el número de
+    documentos. ``aplicar()`` hace en la misma transacción el upsert de
+    clientes, negocios y documentos (y opcionalmente cierra los que faltan).
+
+    Sin ``conn`` usa una conexión propia fuera del pool, pensada para cargas
+    que duran lo que dura una descarga completa.
+
+        with CargaEnBloque("remisiones") as carga:
+            for fila in filas:
+                carga.agregar(fila)
+            result, error = carga.aplicar(cerrar_faltantes=True)
+    """
+
+    def __init__(self, tipo, tamano_lote=500, conn=None):
+        self.config = _CARGA_DOCUMENTOS[tipo]
+        self.tamano_lote = tamano_lote
+        self._propia = conn is None
+        self.conn = conn if conn is not None else crear_conexion()
+        self.cur = self.conn.cursor()
+        self._lote = []
+        self.filas = 0
+        self.segundos = 0.0
+
+        try:
+            self.cur.execute(
+                sql.SQL("CREATE TEMP TABLE {} ({}) ON COMMIT DROP").format(
+                    sql.Identifier(self.config["staging"]), sql.SQL(self.config["columnas"])
+                )
+            )
+        except Exception:
+            self.cerrar()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def agregar(self, fila):
+        """Agrega una fila; se envía a la BD cuando se completa el lote"""
+        self._lote.append(tuple(fila) + (self.filas,))
+        self.filas += 1
+        if len(self._lote) >= self.tamano_lote:
+            self._enviar_lote()
+
+    def agregar_todas(self, filas):
+        for fila in filas:
+            self.agregar(fila)
+
+    def _enviar_lote(self):
+        if not self._lote:
+            return
+        inicio = time.perf_counter()
+        execute_values(
+            self.cur,
+            sql.SQL("INSERT INTO {} VALUES %s").format(sql.Identifier(self.config["staging"])).as_string(self.cur),
+            self._lote,
+            page_size=self.tamano_lote
+        )
+        self.segundos += time.perf_counter() - inicio
+        self._lote = []
+
+    def aplicar(self, cerrar_faltantes=False, marca_sync=None):
+        """
+        Aplica la carga en una sola transacción y hace commit.
+
+        Con cerrar_faltantes=True marca 'closed' los documentos abiertos que no
+        vinieron en la carga. Con marca_sync=(recurso, ultimo_id, ultimo_offset)
+        avanza la marca de agua de sync_estado junto con los datos.
+        Retorna ((insertadas, actualizadas, cerradas), error).
+        """
+        try:
+            self._enviar_lote()
+            inicio = time.perf_counter()
+
+            _bulk_insert_clientes_negocios(self.cur, self.config["staging"])
+
+            self.cur.execute(self.config["upsert"])
+            resultados = [row[0] for row in self.cur.fetchall()]
+
+            cerradas = 0
+            if cerrar_faltantes:
+                self.cur.execute(self.config["cerrar"])
+                cerradas = self.cur.rowcount
+
+            if marca_sync:
+                _guardar_sync_estado(self.cur, *marca_sync)
+
+            self.conn.commit()
+            self.segundos += time.perf_counter() - inicio
+
+            insertadas = sum(resultados)
+            return (insertadas, len(resultados) - insertadas, cerradas), None
+        except Exception as e:
+            self.conn.rollback()
+            return None, str(e)
+
+    def cerrar(self):
+        """
+        Descarta lo no aplicado y libera la conexión propia.
+
+        No lanza excepciones: se llama desde __exit__, y si la conexión se cayó
+        a mitad de la carga un error del rollback ocultaría el original.
+        """
+        try:
+            self.cur.close()
+            if not self.conn.closed and self.conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                self.conn.rollback()
+        except psycopg2.Error:
+            pass
+        finally:
+            if self._propia:
+                _cerrar_silencioso(self.conn)
+
+
+def _bulk_insert_clientes_negocios(cur, staging):
+    """Inserta en bloque los clientes y negocios que aparecen en la tabla staging"""
+    # Un solo nombre por NIT (el primero que llegó), igual que insert_cliente
+    cur.execute(sql.SQL("""
+        INSERT INTO clientes (nit_cliente, nombre_cliente)
+        SELECT DISTINCT ON (nit_cliente) nit_cliente, nombre_cliente
+        FROM {staging}
+        ORDER BY nit_cliente, orden
+        ON CONFLICT (nit_cliente) DO NOTHING
+    """).format(staging=sql.Identifier(staging)))
+
+    cur.execute(sql.SQL("""
+        INSERT INTO negocios (id_cliente, nombre_negocio)
+        SELECT DISTINCT c.id_cliente, s.nombre_cliente
+        FROM {staging} s
+        JOIN clientes c ON c.nit_cliente = s.nit_cliente
+        WHERE NOT EXISTS (
+            SELECT 1 FROM negocios n
+            WHERE n.id_cliente = c.id_cliente AND n.nombre_negocio = s.nombre_cliente
+        )
+    """).format(staging=sql.Identifier(staging)))
 
 
-def upsert_factura(numero_factura, id_cliente, fecha, estado, valor, balance, nombre_negocio):
-    """Inserta o actualiza una factura"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Verificar si existe
-    cur.execute("SELECT factura_id FROM facturas WHERE numero_factura = %s", (numero_factura,))
-    result = cur.fetchone()
-    
-    if result:
-        # Actualizar
-        cur.execute("""
-            UPDATE facturas 
-            SET estado_factura = %s, valor_factura = %s, balance_factura = %s, nombre_negocio = %s
-            WHERE numero_factura = %s
-        """, (estado, valor, balance, nombre_negocio, numero_factura))
-    else:
-        # Insertar
-        cur.execute("""
-            INSERT INTO facturas (numero_factura, id_cliente, fecha, estado_factura, valor_factura, balance_factura, nombre_negocio)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (numero_factura, id_cliente, fecha, estado, valor, balance, nombre_negocio))
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    
-    return result is None  # True si fue insertado, False si fue actualizado
+def bulk_upsert_remisiones(remisiones, cerrar_faltantes=False, marca_sync=None):
+    """
+    Inserta o actualiza remisiones en bloque, en una sola transacción.
+
+    Recibe tuplas (numero_remision, fecha, estado, valor, nit_cliente, nombre_cliente).
+    Crea los clientes y negocios que falten y solo reescribe las filas que
+    cambiaron. Con cerrar_faltantes=True marca 'closed' las remisiones abiertas
+    que no vienen en el lote (sincronización completa), en la misma
+    transacción. Con marca_sync=(recurso, ultimo_id, ultimo_offset) avanza la
+    marca de agua de sync_estado junto con los datos.
+    Retorna ((insertadas, actualizadas, cerradas), error).
+    """
+    with get_connection() as conn:
+        with CargaEnBloque("remisiones", conn=conn) as carga:
+            try:
+                carga.agregar_todas(remisiones)
+            except Exception as e:
+                return None, str(e)
+            return carga.aplicar(cerrar_faltantes, marca_sync)
+
+
+def bulk_upsert_facturas(facturas, cerrar_faltantes=False, marca_sync=None):
+    """
+    Inserta o actualiza facturas en bloque, en una sola transacción.
+
+    Recibe tuplas (numero_factura, fecha, estado, valor, balance, nit_cliente, nombre_cliente).
+    Igual que bulk_upsert_remisiones. Retorna ((insertadas, actualizadas, cerradas), error).
+    """
+    with get_connection() as conn:
+        with CargaEnBloque("facturas", conn=conn) as carga:
+            try:
+                carga.agregar_todas(facturas)
+            except Exception as e:
+                return None, str(e)
+            return carga.aplicar(cerrar_faltantes, marca_sync)
 
 
 # ==================== FUNCIONES DE EMPLEADOS ====================
 
 def insert_empleado(nombre_empleado, tipo_documento, cedula_empleado, salario_dia):
     """Inserta un nuevo empleado en la base de datos"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute(
-            """INSERT INTO empleados (nombre_empleado, tipo_documento, cedula_empleado, salario_dia)
-               VALUES (%s, %s, %s, %s) RETURNING id_empleado""",
-            (nombre_empleado, tipo_documento, cedula_empleado, salario_dia)
-        )
-        id_empleado = cur.fetchone()[0]
-        conn.commit()
-        return id_empleado, None
-    except Exception as e:
-        conn.rollback()
-        return None, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute(
+                """INSERT INTO empleados (nombre_empleado, tipo_documento, cedula_empleado, salario_dia)
+                   VALUES (%s, %s, %s, %s) RETURNING id_empleado""",
+                (nombre_empleado, tipo_documento, cedula_empleado, salario_dia)
+            )
+            id_empleado = cur.fetchone()[0]
+            conn.commit()
+            return id_empleado, None
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
 
 
 def check_cedula_exists(cedula_empleado):
     """Verifica si ya existe un empleado con esa cédula"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT id_empleado FROM empleados WHERE cedula_empleado = %s", (cedula_empleado,))
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT id_empleado FROM empleados WHERE cedula_empleado = %s", (cedula_empleado,))
+        result = cur.fetchone()
+        
+        cur.close()
     
     return result is not None
 
 
 def get_all_empleados():
     """Obtiene todos los empleados"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT id_empleado, nombre_empleado, tipo_documento, cedula_empleado, salario_dia, create_at FROM empleados ORDER BY nombre_empleado")
-    result = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT id_empleado, nombre_empleado, tipo_documento, cedula_empleado, salario_dia, create_at FROM empleados ORDER BY nombre_empleado")
+        result = cur.fetchall()
+        
+        cur.close()
     
     return result
 
@@ -388,17 +867,16 @@ def get_all_empleados():
 
 def get_empleado_by_cedula(cedula):
     """Obtiene un empleado por su número de cédula"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute(
-        "SELECT id_empleado, nombre_empleado, tipo_documento, cedula_empleado, salario_dia FROM empleados WHERE cedula_empleado = %s",
-        (cedula,)
-    )
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            "SELECT id_empleado, nombre_empleado, tipo_documento, cedula_empleado, salario_dia FROM empleados WHERE cedula_empleado = %s",
+            (cedula,)
+        )
+        result = cur.fetchone()
+        
+        cur.close()
     
     if result:
         return {
@@ -413,23 +891,23 @@ def get_empleado_by_cedula(cedula):
 
 def get_turno_abierto_hoy(id_empleado):
     """Verifica si el empleado tiene un turno abierto hoy (sin hora_salida) - Usando zona horaria Colombia"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Usar zona horaria de Colombia para comparar fechas
-    cur.execute("""
-        SELECT id_turno, hora_inicio, hora_salida 
-        FROM turnos 
-        WHERE id_empleado = %s 
-          AND DATE(hora_inicio AT TIME ZONE 'America/Bogota') = (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE
-          AND hora_salida IS NULL
-        ORDER BY hora_inicio DESC
-        LIMIT 1
-    """, (id_empleado,))
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Día de hoy en Colombia como rango sobre hora_inicio (usa idx_turnos_empleado_inicio_id)
+        cur.execute("""
+            SELECT id_turno, hora_inicio, hora_salida 
+            FROM turnos 
+            WHERE id_empleado = %s 
+              AND hora_inicio >= inicio_dia_local(hoy_local())
+              AND hora_inicio < inicio_dia_local(hoy_local() + 1)
+              AND hora_salida IS NULL
+            ORDER BY hora_inicio DESC
+            LIMIT 1
+        """, (id_empleado,))
+        result = cur.fetchone()
+        
+        cur.close()
     
     if result:
         return {
@@ -442,23 +920,23 @@ def get_turno_abierto_hoy(id_empleado):
 
 def get_turno_completo_hoy(id_empleado):
     """Obtiene todos los turnos completados hoy (con entrada y salida) - Ya no se usa para bloquear"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    # Usar zona horaria de Colombia para comparar fechas
-    cur.execute("""
-        SELECT id_turno, hora_inicio, hora_salida 
-        FROM turnos 
-        WHERE id_empleado = %s 
-          AND DATE(hora_inicio AT TIME ZONE 'America/Bogota') = (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE
-          AND hora_salida IS NOT NULL
-        ORDER BY hora_inicio DESC
-        LIMIT 1
-    """, (id_empleado,))
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Día de hoy en Colombia como rango sobre hora_inicio (usa idx_turnos_empleado_inicio_id)
+        cur.execute("""
+            SELECT id_turno, hora_inicio, hora_salida 
+            FROM turnos 
+            WHERE id_empleado = %s 
+              AND hora_inicio >= inicio_dia_local(hoy_local())
+              AND hora_inicio < inicio_dia_local(hoy_local() + 1)
+              AND hora_salida IS NOT NULL
+            ORDER BY hora_inicio DESC
+            LIMIT 1
+        """, (id_empleado,))
+        result = cur.fetchone()
+        
+        cur.close()
     
     if result:
         return {
@@ -471,84 +949,177 @@ def get_turno_completo_hoy(id_empleado):
 
 def registrar_entrada(id_empleado):
     """Registra la entrada de un empleado (crea un nuevo turno) - Usando zona horaria Colombia"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        # Guardar timestamp con zona horaria de Colombia
-        cur.execute(
-            "INSERT INTO turnos (id_empleado, hora_inicio) VALUES (%s, NOW()) RETURNING id_turno, hora_inicio",
-            (id_empleado,)
-        )
-        result = cur.fetchone()
-        conn.commit()
-        return {'id_turno': result[0], 'hora_inicio': result[1]}, None
-    except Exception as e:
-        conn.rollback()
-        return None, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            # Guardar timestamp con zona horaria de Colombia
+            cur.execute(
+                "INSERT INTO turnos (id_empleado, hora_inicio) VALUES (%s, NOW()) RETURNING id_turno, hora_inicio",
+                (id_empleado,)
+            )
+            result = cur.fetchone()
+            conn.commit()
+            return {'id_turno': result[0], 'hora_inicio': result[1]}, None
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
 
 
 def registrar_salida(id_turno):
     """Registra la salida de un empleado (actualiza hora_salida del turno)"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute(
-            "UPDATE turnos SET hora_salida = NOW() WHERE id_turno = %s RETURNING hora_salida",
-            (id_turno,)
-        )
-        result = cur.fetchone()
-        conn.commit()
-        return {'hora_salida': result[0]}, None
-    except Exception as e:
-        conn.rollback()
-        return None, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute(
+                "UPDATE turnos SET hora_salida = NOW() WHERE id_turno = %s RETURNING hora_salida",
+                (id_turno,)
+            )
+            result = cur.fetchone()
+            conn.commit()
+            return {'hora_salida': result[0]}, None
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
 
 
 def get_turnos_empleado_hoy(id_empleado):
     """Obtiene todos los turnos del empleado del día de hoy - Usando zona horaria Colombia"""
-    conn = get_connection()
-    cur = conn.cursor()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        # Día de hoy en Colombia como rango sobre hora_inicio (usa idx_turnos_empleado_inicio_id)
+        cur.execute("""
+            SELECT id_turno, hora_inicio, hora_salida 
+            FROM turnos 
+            WHERE id_empleado = %s 
+              AND hora_inicio >= inicio_dia_local(hoy_local())
+              AND hora_inicio < inicio_dia_local(hoy_local() + 1)
+            ORDER BY hora_inicio DESC
+        """, (id_empleado,))
+        results = cur.fetchall()
+        
+        cur.close()
     
-    # Usar zona horaria de Colombia para comparar fechas
-    cur.execute("""
-        SELECT id_turno, hora_inicio, hora_salida 
-        FROM turnos 
-        WHERE id_empleado = %s 
-          AND DATE(hora_inicio AT TIME ZONE 'America/Bogota') = (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE
-        ORDER BY hora_inicio DESC
-    """, (id_empleado,))
-    results = cur.fetchall()
+    return [{'id_turno': r[0], 'hora_inicio': r[1], 'hora_salida': r[2]} for r in results]
+
+
+def get_estado_turno_hoy(cedula):
+    """
+    Obtiene el empleado y sus turnos de hoy en una sola consulta (kiosco de turnos).
+    
+    Retorna None si la cédula no existe, o un dict con 'empleado', 'turnos_hoy'
+    (más reciente primero) y 'turno_abierto' (el turno de hoy sin salida, o None).
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT e.id_empleado, e.nombre_empleado, e.tipo_documento, e.cedula_empleado, e.salario_dia,
+                   t.id_turno, t.hora_inicio, t.hora_salida
+            FROM empleados e
+            LEFT JOIN turnos t
+                ON t.id_empleado = e.id_empleado
+               AND t.hora_inicio >= inicio_dia_local(hoy_local())
+               AND t.hora_inicio < inicio_dia_local(hoy_local() + 1)
+            WHERE e.cedula_empleado = %s
+            ORDER BY t.hora_inicio DESC
+        """, (cedula,))
+        results = cur.fetchall()
+        
+        cur.close()
+    
+    if not results:
+        return None
+    
+    primera = results[0]
+    turnos_hoy = [
+        {'id_turno': r[5], 'hora_inicio': r[6], 'hora_salida': r[7]}
+        for r in results if r[5] is not None
+    ]
+    return {
+        'empleado': {
+            'id_empleado': primera[0],
+            'nombre_empleado': primera[1],
+            'tipo_documento': primera[2],
+            'cedula_empleado': primera[3],
+            'salario_dia': primera[4]
+        },
+        'turnos_hoy': turnos_hoy,
+        'turno_abierto': next((t for t in turnos_hoy if t['hora_salida'] is None), None)
+    }
+
+
+def fichar_turno(cedula, accion=None):
+    """
+    Registra la entrada o la salida de un empleado en una sola operación (función fichar_turno).
     
-    cur.close()
-    conn.close()
+    La BD decide y escribe en la misma transacción con el empleado bloqueado, así
+    dos fichajes simultáneos no abren dos turnos. accion es lo que el kiosco le
+    mostró al empleado ('entrada' o 'salida'); si otro fichaje se adelantó no se
+    escribe nada y la acción retornada es 'sin_cambio'. Sin accion, decide la BD.
     
-    return [{'id_turno': r[0], 'hora_inicio': r[1], 'hora_salida': r[2]} for r in results]
+    Retorna ({'accion', 'empleado', 'turno', 'turnos_hoy'}, None) o (None, error);
+    'turno' es el turno abierto o cerrado por este fichaje.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute(
+                "SELECT accion, afectado, id_empleado, nombre_empleado, id_turno, hora_inicio, hora_salida "
+                "FROM fichar_turno(%s, %s)",
+                (cedula, accion)
+            )
+            results = cur.fetchall()
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
+    
+    if not results:
+        return None, "No se encontró ningún empleado con ese número de documento"
+    
+    turnos_hoy = []
+    turno = None
+    for r in results:
+        if r[4] is None:
+            continue
+        fila = {'id_turno': r[4], 'hora_inicio': r[5], 'hora_salida': r[6]}
+        turnos_hoy.append(fila)
+        if r[1]:
+            turno = fila
+    
+    return {
+        'accion': results[0][0],
+        'empleado': {'id_empleado': results[0][2], 'nombre_empleado': results[0][3]},
+        'turno': turno,
+        'turnos_hoy': turnos_hoy
+    }, None
 
 
 # ==================== FUNCIONES DE DIRECCIONES IP ====================
 
 def get_all_direcciones_ip():
     """Obtiene todas las direcciones IP registradas"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT id_direccion, direccion_ip, nombre_equipo, activo, create_at 
-        FROM direcciones_ip 
-        ORDER BY nombre_equipo
-    """)
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT id_direccion, direccion_ip, nombre_equipo, activo, create_at 
+            FROM direcciones_ip 
+            ORDER BY nombre_equipo
+        """)
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_direccion': r[0],
@@ -561,75 +1132,71 @@ def get_all_direcciones_ip():
 
 def insert_direccion_ip(direccion_ip, nombre_equipo):
     """Inserta una nueva dirección IP"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute(
-            "INSERT INTO direcciones_ip (direccion_ip, nombre_equipo) VALUES (%s, %s) RETURNING id_direccion",
-            (direccion_ip, nombre_equipo)
-        )
-        id_direccion = cur.fetchone()[0]
-        conn.commit()
-        return id_direccion, None
-    except Exception as e:
-        conn.rollback()
-        return None, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute(
+                "INSERT INTO direcciones_ip (direccion_ip, nombre_equipo) VALUES (%s, %s) RETURNING id_direccion",
+                (direccion_ip, nombre_equipo)
+            )
+            id_direccion = cur.fetchone()[0]
+            conn.commit()
+            return id_direccion, None
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
 
 
 def update_direccion_ip_estado(id_direccion, activo):
     """Activa o desactiva una dirección IP"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute(
-            "UPDATE direcciones_ip SET activo = %s WHERE id_direccion = %s",
-            (activo, id_direccion)
-        )
-        conn.commit()
-        return True, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute(
+                "UPDATE direcciones_ip SET activo = %s WHERE id_direccion = %s",
+                (activo, id_direccion)
+            )
+            conn.commit()
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 def delete_direccion_ip(id_direccion):
     """Elimina una dirección IP"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute("DELETE FROM direcciones_ip WHERE id_direccion = %s", (id_direccion,))
-        conn.commit()
-        return True, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute("DELETE FROM direcciones_ip WHERE id_direccion = %s", (id_direccion,))
+            conn.commit()
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 def check_ip_autorizada(ip):
     """Verifica si una IP está autorizada (activa)"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute(
-        "SELECT id_direccion, nombre_equipo FROM direcciones_ip WHERE direccion_ip = %s AND activo = true",
-        (ip,)
-    )
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(
+            "SELECT id_direccion, nombre_equipo FROM direcciones_ip WHERE direccion_ip = %s AND activo = true",
+            (ip,)
+        )
+        result = cur.fetchone()
+        
+        cur.close()
     
     if result:
         return {'id_direccion': result[0], 'nombre_equipo': result[1]}
@@ -638,34 +1205,162 @@ def check_ip_autorizada(ip):
 
 def check_ip_exists(direccion_ip):
     """Verifica si una dirección IP ya existe"""
-    conn = get_connection()
-    cur = conn.cursor()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT id_direccion FROM direcciones_ip WHERE direccion_ip = %s", (direccion_ip,))
+        result = cur.fetchone()
+        
+        cur.close()
     
-    cur.execute("SELECT id_direccion FROM direcciones_ip WHERE direccion_ip = %s", (direccion_ip,))
-    result = cur.fetchone()
+    return result is not None
+
+
+# ==================== FUNCIONES DE GRUPOS DE NEGOCIO ====================
+
+def get_grupos_negocio(solo_activos=False):
+    """Obtiene los grupos de negocio con sus negocios (en orden)"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT g.id_grupo, g.nombre_grupo, g.icono, g.activo,
+                   COALESCE(array_agg(m.nombre_negocio ORDER BY m.orden, m.nombre_negocio)
+                            FILTER (WHERE m.nombre_negocio IS NOT NULL), '{}')
+            FROM grupos_negocio g
+            LEFT JOIN grupos_negocio_miembros m ON m.id_grupo = g.id_grupo
+            WHERE g.activo OR NOT %s
+            GROUP BY g.id_grupo
+            ORDER BY g.nombre_grupo
+        """, (solo_activos,))
+        results = cur.fetchall()
+        
+        cur.close()
     
-    cur.close()
-    conn.close()
+    return [{
+        'id_grupo': r[0],
+        'nombre_grupo': r[1],
+        'icono': r[2],
+        'activo': r[3],
+        'negocios': list(r[4])
+    } for r in results]
+
+
+def get_nombres_negocio():
+    """Obtiene los nombres de negocio distintos (para armar grupos)"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT DISTINCT nombre_negocio
+            FROM negocios
+            WHERE nombre_negocio <> ''
+            ORDER BY nombre_negocio
+        """)
+        results = cur.fetchall()
+        
+        cur.close()
     
-    return result is not None
+    return [r[0] for r in results]
+
+
+def insert_grupo_negocio(nombre_grupo, negocios, icono='🏪'):
+    """Crea un grupo de negocio con sus negocios (en el orden recibido)"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute(
+                "INSERT INTO grupos_negocio (nombre_grupo, icono) VALUES (%s, %s) RETURNING id_grupo",
+                (nombre_grupo, icono)
+            )
+            id_grupo = cur.fetchone()[0]
+            _guardar_miembros_grupo(cur, id_grupo, negocios)
+            conn.commit()
+            return id_grupo, None
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
+
+
+def update_grupo_negocio(id_grupo, nombre_grupo=None, negocios=None, icono=None, activo=None):
+    """Actualiza un grupo de negocio; si se envían negocios reemplaza los actuales"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            updates = []
+            params = []
+            
+            if nombre_grupo is not None:
+                updates.append("nombre_grupo = %s")
+                params.append(nombre_grupo)
+            if icono is not None:
+                updates.append("icono = %s")
+                params.append(icono)
+            if activo is not None:
+                updates.append("activo = %s")
+                params.append(activo)
+            
+            if updates:
+                params.append(id_grupo)
+                cur.execute(f"UPDATE grupos_negocio SET {', '.join(updates)} WHERE id_grupo = %s", params)
+            
+            if negocios is not None:
+                cur.execute("DELETE FROM grupos_negocio_miembros WHERE id_grupo = %s", (id_grupo,))
+                _guardar_miembros_grupo(cur, id_grupo, negocios)
+            
+            conn.commit()
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
+
+
+def delete_grupo_negocio(id_grupo):
+    """Elimina un grupo de negocio (los documentos no se tocan)"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute("DELETE FROM grupos_negocio WHERE id_grupo = %s", (id_grupo,))
+            conn.commit()
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
+
+
+def _guardar_miembros_grupo(cur, id_grupo, negocios):
+    """Inserta los negocios de un grupo con su posición (dentro de la transacción del llamador)"""
+    execute_values(
+        cur,
+        "INSERT INTO grupos_negocio_miembros (id_grupo, nombre_negocio, orden) VALUES %s ON CONFLICT DO NOTHING",
+        [(id_grupo, negocio, orden) for orden, negocio in enumerate(negocios, start=1)]
+    )
 
 
 # ==================== FUNCIONES DE GESTIÓN DE TURNOS ====================
 
 def get_all_empleados_activos():
     """Obtiene todos los empleados activos para selección"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT id_empleado, nombre_empleado, cedula_empleado 
-        FROM empleados 
-        ORDER BY nombre_empleado
-    """)
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT id_empleado, nombre_empleado, cedula_empleado 
+            FROM empleados 
+            ORDER BY nombre_empleado
+        """)
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_empleado': r[0],
@@ -688,31 +1383,30 @@ def insert_turno_manual(id_empleado, hora_inicio, hora_salida=None):
     if hora_salida and hora_salida.tzinfo is None:
         hora_salida = tz_colombia.localize(hora_salida).astimezone(pytz.UTC)
     
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        if hora_salida:
-            cur.execute(
-                """INSERT INTO turnos (id_empleado, hora_inicio, hora_salida) 
-                   VALUES (%s, %s, %s) RETURNING id_turno""",
-                (id_empleado, hora_inicio, hora_salida)
-            )
-        else:
-            cur.execute(
-                """INSERT INTO turnos (id_empleado, hora_inicio) 
-                   VALUES (%s, %s) RETURNING id_turno""",
-                (id_empleado, hora_inicio)
-            )
-        id_turno = cur.fetchone()[0]
-        conn.commit()
-        return id_turno, None
-    except Exception as e:
-        conn.rollback()
-        return None, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            if hora_salida:
+                cur.execute(
+                    """INSERT INTO turnos (id_empleado, hora_inicio, hora_salida) 
+                       VALUES (%s, %s, %s) RETURNING id_turno""",
+                    (id_empleado, hora_inicio, hora_salida)
+                )
+            else:
+                cur.execute(
+                    """INSERT INTO turnos (id_empleado, hora_inicio) 
+                       VALUES (%s, %s) RETURNING id_turno""",
+                    (id_empleado, hora_inicio)
+                )
+            id_turno = cur.fetchone()[0]
+            conn.commit()
+            return id_turno, None
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
 
 
 def update_turno(id_turno, hora_inicio=None, hora_salida=None):
@@ -729,33 +1423,32 @@ def update_turno(id_turno, hora_inicio=None, hora_salida=None):
     if hora_salida and hora_salida.tzinfo is None:
         hora_salida = tz_colombia.localize(hora_salida).astimezone(pytz.UTC)
     
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        if hora_inicio and hora_salida:
-            cur.execute(
-                "UPDATE turnos SET hora_inicio = %s, hora_salida = %s WHERE id_turno = %s",
-                (hora_inicio, hora_salida, id_turno)
-            )
-        elif hora_inicio:
-            cur.execute(
-                "UPDATE turnos SET hora_inicio = %s WHERE id_turno = %s",
-                (hora_inicio, id_turno)
-            )
-        elif hora_salida:
-            cur.execute(
-                "UPDATE turnos SET hora_salida = %s WHERE id_turno = %s",
-                (hora_salida, id_turno)
-            )
-        conn.commit()
-        return True, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            if hora_inicio and hora_salida:
+                cur.execute(
+                    "UPDATE turnos SET hora_inicio = %s, hora_salida = %s WHERE id_turno = %s",
+                    (hora_inicio, hora_salida, id_turno)
+                )
+            elif hora_inicio:
+                cur.execute(
+                    "UPDATE turnos SET hora_inicio = %s WHERE id_turno = %s",
+                    (hora_inicio, id_turno)
+                )
+            elif hora_salida:
+                cur.execute(
+                    "UPDATE turnos SET hora_salida = %s WHERE id_turno = %s",
+                    (hora_salida, id_turno)
+                )
+            conn.commit()
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 def cerrar_turno_abierto(id_turno, hora_salida):
@@ -769,58 +1462,55 @@ def cerrar_turno_abierto(id_turno, hora_salida):
     if hora_salida and hora_salida.tzinfo is None:
         hora_salida = tz_colombia.localize(hora_salida).astimezone(pytz.UTC)
     
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute(
-            "UPDATE turnos SET hora_salida = %s WHERE id_turno = %s AND hora_salida IS NULL",
-            (hora_salida, id_turno)
-        )
-        affected = cur.rowcount
-        conn.commit()
-        return affected > 0, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute(
+                "UPDATE turnos SET hora_salida = %s WHERE id_turno = %s AND hora_salida IS NULL",
+                (hora_salida, id_turno)
+            )
+            affected = cur.rowcount
+            conn.commit()
+            return affected > 0, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 def delete_turno(id_turno):
     """Elimina un turno"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute("DELETE FROM turnos WHERE id_turno = %s", (id_turno,))
-        conn.commit()
-        return True, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute("DELETE FROM turnos WHERE id_turno = %s", (id_turno,))
+            conn.commit()
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 def get_turnos_abiertos():
     """Obtiene todos los turnos abiertos (sin hora de salida)"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT t.id_turno, e.nombre_empleado, e.cedula_empleado, t.hora_inicio
-        FROM turnos t
-        INNER JOIN empleados e ON t.id_empleado = e.id_empleado
-        WHERE t.hora_salida IS NULL
-        ORDER BY t.hora_inicio DESC
-    """)
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT t.id_turno, e.nombre_empleado, e.cedula_empleado, t.hora_inicio
+            FROM turnos t
+            INNER JOIN empleados e ON t.id_empleado = e.id_empleado
+            WHERE t.hora_salida IS NULL
+            ORDER BY t.hora_inicio DESC
+        """)
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_turno': r[0],
@@ -830,69 +1520,99 @@ def get_turnos_abiertos():
     } for r in results]
 
 
-def get_historial_turnos(fecha_inicio=None, fecha_fin=None, id_empleado=None, limit=100):
-    """Obtiene el historial de turnos con filtros"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    query = """
-        SELECT t.id_turno, e.id_empleado, e.nombre_empleado, e.cedula_empleado, 
-               t.hora_inicio, t.hora_salida,
-               CASE WHEN t.hora_salida IS NULL THEN 'Abierto' ELSE 'Cerrado' END as estado
-        FROM turnos t
-        INNER JOIN empleados e ON t.id_empleado = e.id_empleado
-        WHERE 1=1
+# Columnas de cada fila de get_historial_turnos
+COLUMNAS_HISTORIAL_TURNOS = (
+    'id_turno', 'id_empleado', 'nombre_empleado', 'cedula_empleado',
+    'hora_inicio', 'hora_salida', 'estado'
+)
+
+
+def get_historial_turnos(fecha_inicio=None, fecha_fin=None, id_empleado=None, limit=100,
+                         cursor=None, direccion='siguiente'):
     """
-    params = []
+    Obtiene una página del historial de turnos con filtros, del más reciente al más antiguo.
     
-    if fecha_inicio:
-        query += " AND DATE(t.hora_inicio) >= %s"
-        params.append(fecha_inicio)
+    Pagina por llave sobre (hora_inicio, id_turno) en lugar de OFFSET: cada
+    página lee solo sus filas (idx_turnos_inicio_id / idx_turnos_empleado_inicio_id),
+    sin importar qué tan atrás esté en el historial.
     
-    if fecha_fin:
-        query += " AND DATE(t.hora_inicio) <= %s"
-        params.append(fecha_fin)
-    
-    if id_empleado:
-        query += " AND t.id_empleado = %s"
-        params.append(id_empleado)
+    Args:
+        fecha_inicio: Fecha inicial del filtro (opcional)
+        fecha_fin: Fecha final del filtro (opcional)
+        id_empleado: ID del empleado para filtrar (opcional)
+        limit: Turnos por página
+        cursor: (hora_inicio, id_turno) del borde de la página actual; None = primera página
+        direccion: 'siguiente' (turnos más antiguos que el cursor) o 'anterior' (más recientes)
     
-    query += " ORDER BY t.hora_inicio DESC LIMIT %s"
-    params.append(limit)
+    Returns:
+        Tupla (filas, hay_mas): filas como tuplas con COLUMNAS_HISTORIAL_TURNOS,
+        siempre de la más reciente a la más antigua, y si quedan más turnos en
+        esa dirección
+    """
+    anterior = direccion == 'anterior'
     
-    cur.execute(query, params)
-    results = cur.fetchall()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        query = """
+            SELECT t.id_turno, e.id_empleado, e.nombre_empleado, e.cedula_empleado, 
+                   t.hora_inicio, t.hora_salida,
+                   CASE WHEN t.hora_salida IS NULL THEN 'Abierto' ELSE 'Cerrado' END as estado
+            FROM turnos t
+            INNER JOIN empleados e ON t.id_empleado = e.id_empleado
+            WHERE 1=1
+        """
+        params = []
+        
+        if fecha_inicio:
+            query += " AND t.hora_inicio >= inicio_dia_local(%s)"
+            params.append(fecha_inicio)
+        
+        if fecha_fin:
+            query += " AND t.hora_inicio < inicio_dia_local(%s::DATE + 1)"
+            params.append(fecha_fin)
+        
+        if id_empleado:
+            query += " AND t.id_empleado = %s"
+            params.append(id_empleado)
+        
+        if cursor:
+            query += f" AND (t.hora_inicio, t.id_turno) {'>' if anterior else '<'} (%s, %s)"
+            params.extend(cursor)
+        
+        orden = "ASC" if anterior else "DESC"
+        # Una fila de más indica si hay otra página en esa dirección
+        query += f" ORDER BY t.hora_inicio {orden}, t.id_turno {orden} LIMIT %s"
+        params.append(limit + 1)
+        
+        cur.execute(query, params)
+        results = cur.fetchall()
+        
+        cur.close()
     
-    cur.close()
-    conn.close()
+    hay_mas = len(results) > limit
+    results = results[:limit]
+    if anterior:
+        results.reverse()
     
-    return [{
-        'id_turno': r[0],
-        'id_empleado': r[1],
-        'nombre_empleado': r[2],
-        'cedula_empleado': r[3],
-        'hora_inicio': r[4],
-        'hora_salida': r[5],
-        'estado': r[6]
-    } for r in results]
+    return results, hay_mas
 
 
 def get_turno_by_id(id_turno):
     """Obtiene un turno por su ID"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT t.id_turno, t.id_empleado, e.nombre_empleado, e.cedula_empleado,
-               t.hora_inicio, t.hora_salida
-        FROM turnos t
-        INNER JOIN empleados e ON t.id_empleado = e.id_empleado
-        WHERE t.id_turno = %s
-    """, (id_turno,))
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT t.id_turno, t.id_empleado, e.nombre_empleado, e.cedula_empleado,
+                   t.hora_inicio, t.hora_salida
+            FROM turnos t
+            INNER JOIN empleados e ON t.id_empleado = e.id_empleado
+            WHERE t.id_turno = %s
+        """, (id_turno,))
+        result = cur.fetchone()
+        
+        cur.close()
     
     if result:
         return {
@@ -917,20 +1637,19 @@ def hash_password(password):
 
 def autenticar_usuario(username, password):
     """Autentica un usuario y retorna sus datos si es válido"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    password_hash = hash_password(password)
-    
-    cur.execute("""
-        SELECT id_usuario, username, nombre_completo, es_master, es_empleado, es_admin, activo
-        FROM usuarios 
-        WHERE username = %s AND password_hash = %s AND activo = TRUE
-    """, (username, password_hash))
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        password_hash = hash_password(password)
+        
+        cur.execute("""
+            SELECT id_usuario, username, nombre_completo, es_master, es_empleado, es_admin, activo
+            FROM usuarios 
+            WHERE username = %s AND password_hash = %s AND activo = TRUE
+        """, (username, password_hash))
+        result = cur.fetchone()
+        
+        cur.close()
     
     if result:
         return {
@@ -947,20 +1666,19 @@ def autenticar_usuario(username, password):
 
 def get_modulos_usuario(id_usuario):
     """Obtiene los módulos a los que tiene acceso un usuario"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT m.id_modulo, m.nombre_modulo, m.descripcion, m.icono, um.puede_ver, um.puede_editar
-        FROM usuarios_modulos um
-        INNER JOIN modulos_sistema m ON um.id_modulo = m.id_modulo
-        WHERE um.id_usuario = %s AND um.puede_ver = TRUE
-        ORDER BY m.orden
-    """, (id_usuario,))
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT m.id_modulo, m.nombre_modulo, m.descripcion, m.icono, um.puede_ver, um.puede_editar
+            FROM usuarios_modulos um
+            INNER JOIN modulos_sistema m ON um.id_modulo = m.id_modulo
+            WHERE um.id_usuario = %s AND um.puede_ver = TRUE
+            ORDER BY m.orden
+        """, (id_usuario,))
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_modulo': r[0],
@@ -974,18 +1692,17 @@ def get_modulos_usuario(id_usuario):
 
 def get_all_usuarios():
     """Obtiene todos los usuarios"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT id_usuario, username, nombre_completo, es_master, es_empleado, es_admin, activo, create_at
-        FROM usuarios 
-        ORDER BY es_master DESC, es_admin DESC, nombre_completo
-    """)
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT id_usuario, username, nombre_completo, es_master, es_empleado, es_admin, activo, create_at
+            FROM usuarios 
+            ORDER BY es_master DESC, es_admin DESC, nombre_completo
+        """)
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_usuario': r[0],
@@ -1001,18 +1718,17 @@ def get_all_usuarios():
 
 def get_usuario_by_id(id_usuario):
     """Obtiene un usuario por su ID"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT id_usuario, username, nombre_completo, es_master, es_empleado, es_admin, activo
-        FROM usuarios 
-        WHERE id_usuario = %s
-    """, (id_usuario,))
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT id_usuario, username, nombre_completo, es_master, es_empleado, es_admin, activo
+            FROM usuarios 
+            WHERE id_usuario = %s
+        """, (id_usuario,))
+        result = cur.fetchone()
+        
+        cur.close()
     
     if result:
         return {
@@ -1029,136 +1745,130 @@ def get_usuario_by_id(id_usuario):
 
 def insert_usuario(username, password, nombre_completo, es_master=False, es_empleado=False, es_admin=False):
     """Inserta un nuevo usuario"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        password_hash = hash_password(password)
-        cur.execute(
-            """INSERT INTO usuarios (username, password_hash, nombre_completo, es_master, es_empleado, es_admin)
-               VALUES (%s, %s, %s, %s, %s, %s) RETURNING id_usuario""",
-            (username, password_hash, nombre_completo, es_master, es_empleado, es_admin)
-        )
-        id_usuario = cur.fetchone()[0]
-        conn.commit()
-        return id_usuario, None
-    except Exception as e:
-        conn.rollback()
-        return None, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            password_hash = hash_password(password)
+            cur.execute(
+                """INSERT INTO usuarios (username, password_hash, nombre_completo, es_master, es_empleado, es_admin)
+                   VALUES (%s, %s, %s, %s, %s, %s) RETURNING id_usuario""",
+                (username, password_hash, nombre_completo, es_master, es_empleado, es_admin)
+            )
+            id_usuario = cur.fetchone()[0]
+            conn.commit()
+            return id_usuario, None
+        except Exception as e:
+            conn.rollback()
+            return None, str(e)
+        finally:
+            cur.close()
 
 
 def update_usuario(id_usuario, username=None, nombre_completo=None, es_master=None, es_empleado=None, es_admin=None, activo=None):
     """Actualiza un usuario existente"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        updates = []
-        params = []
-        
-        if username is not None:
-            updates.append("username = %s")
-            params.append(username)
-        if nombre_completo is not None:
-            updates.append("nombre_completo = %s")
-            params.append(nombre_completo)
-        if es_master is not None:
-            updates.append("es_master = %s")
-            params.append(es_master)
-        if es_empleado is not None:
-            updates.append("es_empleado = %s")
-            params.append(es_empleado)
-        if es_admin is not None:
-            updates.append("es_admin = %s")
-            params.append(es_admin)
-        if activo is not None:
-            updates.append("activo = %s")
-            params.append(activo)
-        
-        if updates:
-            params.append(id_usuario)
-            query = f"UPDATE usuarios SET {', '.join(updates)} WHERE id_usuario = %s"
-            cur.execute(query, params)
-            conn.commit()
+    with get_connection() as conn:
+        cur = conn.cursor()
         
-        return True, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+        try:
+            updates = []
+            params = []
+            
+            if username is not None:
+                updates.append("username = %s")
+                params.append(username)
+            if nombre_completo is not None:
+                updates.append("nombre_completo = %s")
+                params.append(nombre_completo)
+            if es_master is not None:
+                updates.append("es_master = %s")
+                params.append(es_master)
+            if es_empleado is not None:
+                updates.append("es_empleado = %s")
+                params.append(es_empleado)
+            if es_admin is not None:
+                updates.append("es_admin = %s")
+                params.append(es_admin)
+            if activo is not None:
+                updates.append("activo = %s")
+                params.append(activo)
+            
+            if updates:
+                params.append(id_usuario)
+                query = f"UPDATE usuarios SET {', '.join(updates)} WHERE id_usuario = %s"
+                cur.execute(query, params)
+                conn.commit()
+            
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 def update_usuario_password(id_usuario, new_password):
     """Actualiza la contraseña de un usuario"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        password_hash = hash_password(new_password)
-        cur.execute(
-            "UPDATE usuarios SET password_hash = %s WHERE id_usuario = %s",
-            (password_hash, id_usuario)
-        )
-        conn.commit()
-        return True, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            password_hash = hash_password(new_password)
+            cur.execute(
+                "UPDATE usuarios SET password_hash = %s WHERE id_usuario = %s",
+                (password_hash, id_usuario)
+            )
+            conn.commit()
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 def delete_usuario(id_usuario):
     """Elimina un usuario"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute("DELETE FROM usuarios WHERE id_usuario = %s AND es_master = FALSE", (id_usuario,))
-        affected = cur.rowcount
-        conn.commit()
-        return affected > 0, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute("DELETE FROM usuarios WHERE id_usuario = %s AND es_master = FALSE", (id_usuario,))
+            affected = cur.rowcount
+            conn.commit()
+            return affected > 0, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 def check_username_exists(username, exclude_id=None):
     """Verifica si un nombre de usuario ya existe"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    if exclude_id:
-        cur.execute("SELECT id_usuario FROM usuarios WHERE username = %s AND id_usuario != %s", (username, exclude_id))
-    else:
-        cur.execute("SELECT id_usuario FROM usuarios WHERE username = %s", (username,))
-    result = cur.fetchone()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        if exclude_id:
+            cur.execute("SELECT id_usuario FROM usuarios WHERE username = %s AND id_usuario != %s", (username, exclude_id))
+        else:
+            cur.execute("SELECT id_usuario FROM usuarios WHERE username = %s", (username,))
+        result = cur.fetchone()
+        
+        cur.close()
     
     return result is not None
 
 
 def get_all_modulos():
     """Obtiene todos los módulos del sistema"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("SELECT id_modulo, nombre_modulo, descripcion, icono, orden FROM modulos_sistema ORDER BY orden")
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("SELECT id_modulo, nombre_modulo, descripcion, icono, orden FROM modulos_sistema ORDER BY orden")
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_modulo': r[0],
@@ -1171,21 +1881,20 @@ def get_all_modulos():
 
 def get_permisos_usuario(id_usuario):
     """Obtiene los permisos de módulos de un usuario"""
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT m.id_modulo, m.nombre_modulo, 
-               COALESCE(um.puede_ver, FALSE) as puede_ver, 
-               COALESCE(um.puede_editar, FALSE) as puede_editar
-        FROM modulos_sistema m
-        LEFT JOIN usuarios_modulos um ON m.id_modulo = um.id_modulo AND um.id_usuario = %s
-        ORDER BY m.orden
-    """, (id_usuario,))
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT m.id_modulo, m.nombre_modulo, 
+                   COALESCE(um.puede_ver, FALSE) as puede_ver, 
+                   COALESCE(um.puede_editar, FALSE) as puede_editar
+            FROM modulos_sistema m
+            LEFT JOIN usuarios_modulos um ON m.id_modulo = um.id_modulo AND um.id_usuario = %s
+            ORDER BY m.orden
+        """, (id_usuario,))
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_modulo': r[0],
@@ -1199,30 +1908,29 @@ def set_permisos_usuario(id_usuario, permisos):
     """Establece los permisos de módulos para un usuario
     permisos: lista de dict con {id_modulo, puede_ver, puede_editar}
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        # Eliminar permisos existentes
-        cur.execute("DELETE FROM usuarios_modulos WHERE id_usuario = %s", (id_usuario,))
-        
-        # Insertar nuevos permisos
-        for perm in permisos:
-            if perm.get('puede_ver', False):
-                cur.execute(
-                    """INSERT INTO usuarios_modulos (id_usuario, id_modulo, puede_ver, puede_editar)
-                       VALUES (%s, %s, %s, %s)""",
-                    (id_usuario, perm['id_modulo'], perm['puede_ver'], perm.get('puede_editar', False))
-                )
+    with get_connection() as conn:
+        cur = conn.cursor()
         
-        conn.commit()
-        return True, None
-    except Exception as e:
-        conn.rollback()
-        return False, str(e)
-    finally:
-        cur.close()
-        conn.close()
+        try:
+            # Eliminar permisos existentes
+            cur.execute("DELETE FROM usuarios_modulos WHERE id_usuario = %s", (id_usuario,))
+            
+            # Insertar nuevos permisos
+            for perm in permisos:
+                if perm.get('puede_ver', False):
+                    cur.execute(
+                        """INSERT INTO usuarios_modulos (id_usuario, id_modulo, puede_ver, puede_editar)
+                           VALUES (%s, %s, %s, %s)""",
+                        (id_usuario, perm['id_modulo'], perm['puede_ver'], perm.get('puede_editar', False))
+                    )
+            
+            conn.commit()
+            return True, None
+        except Exception as e:
+            conn.rollback()
+            return False, str(e)
+        finally:
+            cur.close()
 
 
 # ==================== FUNCIONES DE TOTAL HORAS (NÓMINA) ====================
@@ -1240,45 +1948,44 @@ def get_total_horas_por_fecha(fecha_inicio=None, fecha_fin=None, id_empleado=Non
     Returns:
         Lista de diccionarios con información de turnos y horas trabajadas
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    query = """
-        SELECT 
-            t.id_turno,
-            e.id_empleado,
-            e.nombre_empleado,
-            e.cedula_empleado,
-            DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') as fecha,
-            t.hora_inicio AT TIME ZONE 'America/Bogota' as hora_entrada,
-            t.hora_salida AT TIME ZONE 'America/Bogota' as hora_salida,
-            EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 as total_horas
-        FROM turnos t
-        INNER JOIN empleados e ON t.id_empleado = e.id_empleado
-        WHERE t.hora_salida IS NOT NULL
-    """
-    
-    params = []
-    
-    if fecha_inicio:
-        query += " AND DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') >= %s"
-        params.append(fecha_inicio)
-    
-    if fecha_fin:
-        query += " AND DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') <= %s"
-        params.append(fecha_fin)
-    
-    if id_empleado:
-        query += " AND t.id_empleado = %s"
-        params.append(id_empleado)
-    
-    query += " ORDER BY t.hora_inicio DESC"
-    
-    cur.execute(query, params)
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        query = """
+            SELECT 
+                t.id_turno,
+                e.id_empleado,
+                e.nombre_empleado,
+                e.cedula_empleado,
+                DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') as fecha,
+                t.hora_inicio AT TIME ZONE 'America/Bogota' as hora_entrada,
+                t.hora_salida AT TIME ZONE 'America/Bogota' as hora_salida,
+                EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 as total_horas
+            FROM turnos t
+            INNER JOIN empleados e ON t.id_empleado = e.id_empleado
+            WHERE t.hora_salida IS NOT NULL
+        """
+        
+        params = []
+        
+        if fecha_inicio:
+            query += " AND t.hora_inicio >= inicio_dia_local(%s)"
+            params.append(fecha_inicio)
+        
+        if fecha_fin:
+            query += " AND t.hora_inicio < inicio_dia_local(%s::DATE + 1)"
+            params.append(fecha_fin)
+        
+        if id_empleado:
+            query += " AND t.id_empleado = %s"
+            params.append(id_empleado)
+        
+        query += " ORDER BY t.hora_inicio DESC"
+        
+        cur.execute(query, params)
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_turno': r[0],
@@ -1303,45 +2010,44 @@ def get_resumen_horas_por_empleado(fecha_inicio=None, fecha_fin=None):
     Returns:
         Lista de diccionarios con resumen por empleado
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    query = """
-        SELECT 
-            e.id_empleado,
-            e.nombre_empleado,
-            e.cedula_empleado,
-            COUNT(t.id_turno) as total_turnos,
-            SUM(EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600) as total_horas
-        FROM empleados e
-        LEFT JOIN turnos t ON e.id_empleado = t.id_empleado 
-            AND t.hora_salida IS NOT NULL
-    """
-    
-    params = []
-    conditions = []
-    
-    if fecha_inicio:
-        conditions.append("DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') >= %s")
-        params.append(fecha_inicio)
-    
-    if fecha_fin:
-        conditions.append("DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') <= %s")
-        params.append(fecha_fin)
-    
-    if conditions:
-        query += " AND " + " AND ".join(conditions)
-    
-    query += """
-        GROUP BY e.id_empleado, e.nombre_empleado, e.cedula_empleado
-        ORDER BY e.nombre_empleado
-    """
-    
-    cur.execute(query, params)
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        query = """
+            SELECT 
+                e.id_empleado,
+                e.nombre_empleado,
+                e.cedula_empleado,
+                COUNT(t.id_turno) as total_turnos,
+                SUM(EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600) as total_horas
+            FROM empleados e
+            LEFT JOIN turnos t ON e.id_empleado = t.id_empleado 
+                AND t.hora_salida IS NOT NULL
+        """
+        
+        params = []
+        conditions = []
+        
+        if fecha_inicio:
+            conditions.append("t.hora_inicio >= inicio_dia_local(%s)")
+            params.append(fecha_inicio)
+        
+        if fecha_fin:
+            conditions.append("t.hora_inicio < inicio_dia_local(%s::DATE + 1)")
+            params.append(fecha_fin)
+        
+        if conditions:
+            query += " AND " + " AND ".join(conditions)
+        
+        query += """
+            GROUP BY e.id_empleado, e.nombre_empleado, e.cedula_empleado
+            ORDER BY e.nombre_empleado
+        """
+        
+        cur.execute(query, params)
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
         'id_empleado': r[0],
@@ -1352,264 +2058,248 @@ def get_resumen_horas_por_empleado(fecha_inicio=None, fecha_fin=None):
     } for r in results]
 
 
-def insertar_total_horas(id_turno, fecha, total_horas):
-    """
-    Inserta o actualiza el registro de total de horas para un turno.
-    
-    Args:
-        id_turno: ID del turno
-        fecha: Fecha del turno
-        total_horas: Total de horas trabajadas
-    
-    Returns:
-        Tupla (id_registro, error)
-    """
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        # Verificar si ya existe un registro para este turno
-        cur.execute("SELECT id FROM total_horas WHERE id_turno = %s", (id_turno,))
-        result = cur.fetchone()
-        
-        if result:
-            # Actualizar registro existente
-            cur.execute(
-                "UPDATE total_horas SET fecha = %s, total_horas = %s WHERE id_turno = %s RETURNING id",
-                (fecha, total_horas, id_turno)
-            )
-        else:
-            # Insertar nuevo registro
-            cur.execute(
-                "INSERT INTO total_horas (id_turno, fecha, total_horas) VALUES (%s, %s, %s) RETURNING id",
-                (id_turno, fecha, total_horas)
-            )
-        
-        id_registro = cur.fetchone()[0]
-        conn.commit()
-        return id_registro, None
-    except Exception as e:
-        conn.rollback()
-        return None, str(e)
-    finally:
-        cur.close()
-        conn.close()
+# ==================== FUNCIONES DE LIQUIDACIÓN DE NÓMINA ====================
+
+# Columnas calculadas de nomina_periodo (en el orden de guardar_nomina_periodo)
+COLUMNAS_NOMINA_PERIODO = (
+    'id_empleado', 'salario_dia', 'turnos',
+    'horas_ordinarias', 'horas_nocturnas', 'horas_dominicales',
+    'horas_extra_diurnas', 'horas_extra_nocturnas',
+    'pago_ordinario', 'recargo_nocturno', 'recargo_dominical', 'pago_extra', 'total_pagar'
+)
 
 
-def sincronizar_total_horas():
+def get_turnos_periodo(fecha_inicio, fecha_fin, id_empleado=None):
     """
-    Sincroniza la tabla total_horas con los turnos completados.
-    Calcula y guarda las horas trabajadas de todos los turnos con hora_salida.
+    Obtiene los turnos completados de un periodo con el salario del empleado.
+    Las horas vienen en hora de Colombia (sin zona horaria) para el motor de
+    reglas y la liquidación.
     
     Returns:
-        Tupla (cantidad_sincronizados, error)
+        Lista de tuplas (id_turno, id_empleado, nombre_empleado, cedula_empleado,
+        salario_dia, hora_inicio, hora_salida)
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        # Obtener todos los turnos completados que no estén en total_horas
-        cur.execute("""
-            INSERT INTO total_horas (id_turno, fecha, total_horas)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        query = """
             SELECT 
                 t.id_turno,
-                DATE(t.hora_inicio AT TIME ZONE 'America/Bogota'),
-                EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600
+                e.id_empleado,
+                e.nombre_empleado,
+                e.cedula_empleado,
+                e.salario_dia,
+                t.hora_inicio AT TIME ZONE 'America/Bogota' as hora_inicio,
+                t.hora_salida AT TIME ZONE 'America/Bogota' as hora_salida
             FROM turnos t
+            INNER JOIN empleados e ON t.id_empleado = e.id_empleado
             WHERE t.hora_salida IS NOT NULL
-              AND NOT EXISTS (
-                  SELECT 1 FROM total_horas th WHERE th.id_turno = t.id_turno
-              )
-            RETURNING id
-        """)
+              AND t.hora_inicio >= inicio_dia_local(%s)
+              AND t.hora_inicio < inicio_dia_local(%s::DATE + 1)
+        """
+        
+        params = [fecha_inicio, fecha_fin]
+        
+        if id_empleado:
+            query += " AND t.id_empleado = %s"
+            params.append(id_empleado)
+        
+        query += " ORDER BY e.id_empleado, t.hora_inicio"
+        
+        cur.execute(query, params)
+        results = cur.fetchall()
         
-        insertados = len(cur.fetchall())
-        conn.commit()
-        return insertados, None
-    except Exception as e:
-        conn.rollback()
-        return 0, str(e)
-    finally:
         cur.close()
-        conn.close()
-
+    
+    return results
 
-# ==================== FUNCIONES DE HORAS EXTRA ====================
 
-def get_horas_extra(fecha_inicio=None, fecha_fin=None, id_empleado=None):
+def get_nomina_periodo(fecha_inicio, fecha_fin):
     """
-    Obtiene los turnos con horas extra (más de 8 horas trabajadas).
-    
-    Args:
-        fecha_inicio: Fecha inicial del filtro (opcional)
-        fecha_fin: Fecha final del filtro (opcional)
-        id_empleado: ID del empleado para filtrar (opcional)
+    Obtiene la liquidación guardada de un periodo (una fila por empleado).
     
     Returns:
-        Lista de diccionarios con información de turnos y horas extra
+        Lista de diccionarios con las columnas de nomina_periodo más nombre y cédula
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    query = """
-        SELECT 
-            t.id_turno,
-            th.id_hora,
-            e.id_empleado,
-            e.nombre_empleado,
-            DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') as fecha,
-            t.hora_inicio AT TIME ZONE 'America/Bogota' as hora_entrada,
-            t.hora_salida AT TIME ZONE 'America/Bogota' as hora_salida,
-            EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 as total_horas,
-            CASE 
-                WHEN EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 > 8 
-                THEN EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 - 8
-                ELSE 0
-            END as horas_extra
-        FROM turnos t
-        INNER JOIN empleados e ON t.id_empleado = e.id_empleado
-        LEFT JOIN total_horas th ON t.id_turno = th.id_turno
-        WHERE t.hora_salida IS NOT NULL
-          AND EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 > 8
-    """
-    
-    params = []
-    
-    if fecha_inicio:
-        query += " AND DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') >= %s"
-        params.append(fecha_inicio)
-    
-    if fecha_fin:
-        query += " AND DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') <= %s"
-        params.append(fecha_fin)
-    
-    if id_empleado:
-        query += " AND t.id_empleado = %s"
-        params.append(id_empleado)
-    
-    query += " ORDER BY t.hora_inicio DESC"
-    
-    cur.execute(query, params)
-    results = cur.fetchall()
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute(f"""
+            SELECT 
+                e.nombre_empleado,
+                e.cedula_empleado,
+                {', '.join('np.' + c for c in COLUMNAS_NOMINA_PERIODO)},
+                np.cerrado,
+                np.cerrado_at
+            FROM nomina_periodo np
+            INNER JOIN empleados e ON e.id_empleado = np.id_empleado
+            WHERE np.fecha_inicio = %s AND np.fecha_fin = %s
+            ORDER BY e.nombre_empleado
+        """, (fecha_inicio, fecha_fin))
+        columnas = [d[0] for d in cur.description]
+        results = cur.fetchall()
+        
+        cur.close()
     
-    cur.close()
-    conn.close()
+    return [dict(zip(columnas, r)) for r in results]
+
+
+def get_periodos_nomina(limit=24):
+    """Obtiene los últimos periodos liquidados con su total y si están cerrados"""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        cur.execute("""
+            SELECT 
+                fecha_inicio,
+                fecha_fin,
+                COUNT(*) as empleados,
+                SUM(total_pagar) as total_pagar,
+                BOOL_AND(cerrado) as cerrado
+            FROM nomina_periodo
+            GROUP BY fecha_inicio, fecha_fin
+            ORDER BY fecha_inicio DESC, fecha_fin DESC
+            LIMIT %s
+        """, (limit,))
+        results = cur.fetchall()
+        
+        cur.close()
     
     return [{
-        'id_turno': r[0],
-        'id_hora': r[1],
-        'id_empleado': r[2],
-        'nombre_empleado': r[3],
-        'fecha': r[4],
-        'hora_entrada': r[5],
-        'hora_salida': r[6],
-        'total_horas': round(r[7], 2) if r[7] else 0,
-        'horas_extra': round(r[8], 2) if r[8] else 0
+        'fecha_inicio': r[0],
+        'fecha_fin': r[1],
+        'empleados': r[2],
+        'total_pagar': r[3],
+        'cerrado': r[4]
     } for r in results]
 
 
-def sincronizar_horas_extra():
+def _periodo_cerrado_solapado(cur, fecha_inicio, fecha_fin):
+    """(fecha_inicio, fecha_fin) de un periodo cerrado distinto que se cruza con el dado, o None"""
+    cur.execute("""
+        SELECT fecha_inicio, fecha_fin FROM nomina_periodo
+        WHERE cerrado
+          AND fecha_inicio <= %s AND fecha_fin >= %s
+          AND (fecha_inicio, fecha_fin) <> (%s, %s)
+        ORDER BY fecha_inicio
+        LIMIT 1
+    """, (fecha_fin, fecha_inicio, fecha_inicio, fecha_fin))
+    return cur.fetchone()
+
+
+def _error_periodo_solapado(periodo):
+    """Mensaje de error para un periodo cerrado que se cruza con el que se quiere escribir"""
+    return f"El periodo se cruza con el periodo cerrado {periodo[0]:%d/%m/%Y} - {periodo[1]:%d/%m/%Y}"
+
+
+def get_periodo_cerrado_solapado(fecha_inicio, fecha_fin):
     """
-    Sincroniza la tabla horas_extra con los turnos que tienen más de 8 horas.
+    Obtiene un periodo cerrado (distinto del dado) que comparte días con el rango.
+    
+    Sus turnos ya se pagaron: liquidar el rango los pagaría otra vez.
     
     Returns:
-        Tupla (cantidad_sincronizados, error)
+        Tupla (fecha_inicio, fecha_fin) del periodo cerrado, o None
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
-        # Insertar horas extra para turnos que trabajaron más de 8 horas
-        cur.execute("""
-            INSERT INTO horas_extra (id_turno, id_hora, total_horas_extra)
-            SELECT 
-                t.id_turno,
-                th.id_hora,
-                EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 - 8
-            FROM turnos t
-            INNER JOIN total_horas th ON t.id_turno = th.id_turno
-            WHERE t.hora_salida IS NOT NULL
-              AND EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 > 8
-              AND NOT EXISTS (
-                  SELECT 1 FROM horas_extra he WHERE he.id_turno = t.id_turno
-              )
-            RETURNING id
-        """)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        periodo = _periodo_cerrado_solapado(cur, fecha_inicio, fecha_fin)
         
-        insertados = len(cur.fetchall())
-        conn.commit()
-        return insertados, None
-    except Exception as e:
-        conn.rollback()
-        return 0, str(e)
-    finally:
         cur.close()
-        conn.close()
+    
+    return periodo
 
 
-def get_resumen_horas_extra_por_empleado(fecha_inicio=None, fecha_fin=None):
+def guardar_nomina_periodo(fecha_inicio, fecha_fin, filas):
     """
-    Obtiene el resumen de horas extra por empleado.
+    Guarda la liquidación de un periodo (reemplaza la anterior si no está cerrado).
     
     Args:
-        fecha_inicio: Fecha inicial del filtro (opcional)
-        fecha_fin: Fecha final del filtro (opcional)
+        filas: Tuplas con los valores de COLUMNAS_NOMINA_PERIODO
     
     Returns:
-        Lista de diccionarios con resumen por empleado
+        Tupla (cantidad_guardados, error). Si el periodo está cerrado, o se
+        cruza con otro periodo cerrado, no se escribe nada y el error lo indica.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    query = """
-        SELECT 
-            e.id_empleado,
-            e.nombre_empleado,
-            COUNT(t.id_turno) as total_turnos_extra,
-            SUM(
-                CASE 
-                    WHEN EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 > 8 
-                    THEN EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 - 8
-                    ELSE 0
-                END
-            ) as total_horas_extra
-        FROM empleados e
-        INNER JOIN turnos t ON e.id_empleado = t.id_empleado
-        WHERE t.hora_salida IS NOT NULL
-          AND EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 > 8
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            # Un solo escritor a la vez (guardar y cerrar): nadie cierra un
+            # periodo que se cruce con este mientras se guarda
+            cur.execute("LOCK TABLE nomina_periodo IN SHARE ROW EXCLUSIVE MODE")
+            
+            cur.execute(
+                "SELECT BOOL_OR(cerrado) FROM nomina_periodo WHERE fecha_inicio = %s AND fecha_fin = %s",
+                (fecha_inicio, fecha_fin)
+            )
+            if cur.fetchone()[0]:
+                conn.rollback()
+                return 0, "El periodo está cerrado"
+            
+            solapado = _periodo_cerrado_solapado(cur, fecha_inicio, fecha_fin)
+            if solapado:
+                conn.rollback()
+                return 0, _error_periodo_solapado(solapado)
+            
+            # Empleados que ya no tienen turnos en el periodo
+            cur.execute(
+                "DELETE FROM nomina_periodo WHERE fecha_inicio = %s AND fecha_fin = %s AND NOT (id_empleado = ANY(%s))",
+                (fecha_inicio, fecha_fin, [f[0] for f in filas])
+            )
+            
+            columnas = ', '.join(COLUMNAS_NOMINA_PERIODO)
+            actualizar = ', '.join(f"{c} = EXCLUDED.{c}" for c in COLUMNAS_NOMINA_PERIODO[1:])
+            execute_values(
+                cur,
+                f"""
+                INSERT INTO nomina_periodo (fecha_inicio, fecha_fin, {columnas})
+                VALUES %s
+                ON CONFLICT (fecha_inicio, fecha_fin, id_empleado) DO UPDATE
+                SET {actualizar}
+                """,
+                [(fecha_inicio, fecha_fin) + tuple(f) for f in filas],
+                page_size=500
+            )
+            conn.commit()
+            return len(filas), None
+        except Exception as e:
+            conn.rollback()
+            return 0, str(e)
+        finally:
+            cur.close()
+
+
+def cerrar_nomina_periodo(fecha_inicio, fecha_fin):
     """
+    Cierra un periodo liquidado: sus filas ya no se vuelven a calcular.
+    No se cierra si se cruza con otro periodo cerrado.
     
-    params = []
-    
-    if fecha_inicio:
-        query += " AND DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') >= %s"
-        params.append(fecha_inicio)
-    
-    if fecha_fin:
-        query += " AND DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') <= %s"
-        params.append(fecha_fin)
-    
-    query += """
-        GROUP BY e.id_empleado, e.nombre_empleado
-        HAVING SUM(
-            CASE 
-                WHEN EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 > 8 
-                THEN EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600 - 8
-                ELSE 0
-            END
-        ) > 0
-        ORDER BY total_horas_extra DESC
+    Returns:
+        Tupla (cantidad_cerrados, error)
     """
-    
-    cur.execute(query, params)
-    results = cur.fetchall()
-    
-    cur.close()
-    conn.close()
-    
-    return [{
-        'id_empleado': r[0],
-        'nombre_empleado': r[1],
-        'total_turnos_extra': r[2] or 0,
-        'total_horas_extra': round(r[3], 2) if r[3] else 0
-    } for r in results]
\ No newline at end of file
+    with get_connection() as conn:
+        cur = conn.cursor()
+        
+        try:
+            cur.execute("LOCK TABLE nomina_periodo IN SHARE ROW EXCLUSIVE MODE")
+            
+            solapado = _periodo_cerrado_solapado(cur, fecha_inicio, fecha_fin)
+            if solapado:
+                conn.rollback()
+                return 0, _error_periodo_solapado(solapado)
+            
+            cur.execute("""
+                UPDATE nomina_periodo
+                SET cerrado = TRUE, cerrado_at = CURRENT_TIMESTAMP
+                WHERE fecha_inicio = %s AND fecha_fin = %s AND NOT cerrado
+            """, (fecha_inicio, fecha_fin))
+            cerrados = cur.rowcount
+            conn.commit()
+            return cerrados, None
+        except Exception as e:
+            conn.rollback()
+            return 0, str(e)
+        finally:
+            cur.close()
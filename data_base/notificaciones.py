@@ -0,0 +1,97 @@
+"""
+Escucha de avisos de PostgreSQL (LISTEN/NOTIFY)
+
+Un hilo con una conexión propia (fuera del pool: queda abierta todo el tiempo)
+escucha un canal y lleva un contador de versión que aumenta con cada aviso.
+Quien muestra datos de ese canal usa la versión como parte de la llave de su
+caché: mientras no cambie, no vuelve a consultar la BD.
+
+    escucha = EscuchaCambios("turnos_cambios").iniciar()
+    df = get_datos(escucha.version)
+"""
+import select
+import logging
+import threading
+import sys
+import os
+
+from psycopg2 import sql, extensions
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import DB_LISTEN_CONFIG
+from data_base.connection import crear_conexion, _cerrar_silencioso
+
+logger = logging.getLogger(__name__)
+
+CANAL_TURNOS = "turnos_cambios"
+
+
+class EscuchaCambios:
+    """Contador de versión de un canal de NOTIFY, actualizado por un hilo en segundo plano"""
+
+    def __init__(self, canal, reintento=None):
+        self.canal = canal
+        self.reintento = reintento or DB_LISTEN_CONFIG["reintento"]
+        self.version = 0
+        self.avisos = 0
+        # True mientras la conexión de escucha está abierta
+        self.activa = False
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        """Arranca el hilo de escucha (una sola vez). Retorna self"""
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._escuchar,
+                    name=f"escucha-{self.canal}",
+                    daemon=True
+                )
+                self._hilo.start()
+        return self
+
+    def detener(self):
+        """Pide al hilo que termine (cierra su conexión en la siguiente vuelta)"""
+        self._detener.set()
+
+    def _nueva_version(self):
+        with self._lock:
+            self.version += 1
+
+    def _escuchar(self):
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = crear_conexion()
+                conn.set_isolation_level(extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cur = conn.cursor()
+                cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.canal)))
+                cur.close()
+                self.activa = True
+                logger.info("Escuchando avisos en el canal %s", self.canal)
+
+                # Lo que haya cambiado mientras no se escuchaba (arranque o reconexión)
+                self._nueva_version()
+
+                while not self._detener.is_set():
+                    # Despierta cada tanto para revisar si se pidió detener
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if conn.notifies:
+                        with self._lock:
+                            self.avisos += len(conn.notifies)
+                        conn.notifies.clear()
+                        self._nueva_version()
+            except Exception as e:
+                logger.warning("Escucha del canal %s interrumpida: %s", self.canal, e)
+            finally:
+                self.activa = False
+                if conn is not None:
+                    _cerrar_silencioso(conn)
+
+            self._detener.wait(self.reintento)
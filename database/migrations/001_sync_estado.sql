@@ -0,0 +1,18 @@
+-- =====================================================
+-- MIGRACIÓN 001: Marca de agua para la sincronización incremental con Alegra
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS sync_estado (
+    recurso VARCHAR(50) PRIMARY KEY,
+    ultimo_id INT NOT NULL DEFAULT 0,
+    ultimo_offset INT NOT NULL DEFAULT 0,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP TRIGGER IF EXISTS trigger_actualizar_modified_at_sync_estado ON sync_estado;
+CREATE TRIGGER trigger_actualizar_modified_at_sync_estado
+    BEFORE UPDATE ON sync_estado
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
@@ -0,0 +1,30 @@
+-- =====================================================
+-- MIGRACIÓN 002: Cola de trabajos de sincronización con Alegra
+-- La interfaz encola trabajos y el worker (services/sync_worker.py) los ejecuta.
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS sync_jobs (
+    id_job INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    tipo VARCHAR(20) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+    solicitado_por VARCHAR(100),
+    mensaje TEXT,
+    inicio_at TIMESTAMP,
+    fin_at TIMESTAMP,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT check_sync_jobs_tipo CHECK (tipo IN ('full', 'incremental')),
+    CONSTRAINT check_sync_jobs_estado CHECK (estado IN ('pendiente', 'en_curso', 'completado', 'error'))
+);
+
+DROP TRIGGER IF EXISTS trigger_actualizar_modified_at_sync_jobs ON sync_jobs;
+CREATE TRIGGER trigger_actualizar_modified_at_sync_jobs
+    BEFORE UPDATE ON sync_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
+
+-- Como máximo un trabajo pendiente: pulsar "Sincronizar" varias veces no encola duplicados;
+-- pedir una completa con una incremental pendiente la convierte en completa (encolar_sync_job)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sync_jobs_un_pendiente ON sync_jobs(estado) WHERE estado = 'pendiente';
+CREATE INDEX IF NOT EXISTS idx_sync_jobs_create_at ON sync_jobs(create_at);
@@ -0,0 +1,42 @@
+-- =====================================================
+-- MIGRACIÓN 003: Registro de ejecuciones de sincronización con Alegra
+-- Una fila por ejecución con sus métricas (páginas, latencias, filas, tiempos).
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id_run INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    id_job INT,
+    tipo VARCHAR(30) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'en_curso',
+    inicio_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    fin_at TIMESTAMP,
+    duracion_s NUMERIC(10,2),
+    paginas INT NOT NULL DEFAULT 0,
+    solicitudes INT NOT NULL DEFAULT 0,
+    latencia_p50_ms NUMERIC(10,1),
+    latencia_p95_ms NUMERIC(10,1),
+    latencia_max_ms NUMERIC(10,1),
+    tiempo_api_s NUMERIC(10,2),
+    tiempo_bd_s NUMERIC(10,2),
+    documentos INT NOT NULL DEFAULT 0,
+    insertados INT NOT NULL DEFAULT 0,
+    actualizados INT NOT NULL DEFAULT 0,
+    cerrados INT NOT NULL DEFAULT 0,
+    errores INT NOT NULL DEFAULT 0,
+    lenta BOOLEAN NOT NULL DEFAULT FALSE,
+    mensaje TEXT,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_sync_runs_job FOREIGN KEY (id_job)
+        REFERENCES sync_jobs(id_job) ON DELETE SET NULL,
+    CONSTRAINT check_sync_runs_estado CHECK (estado IN ('en_curso', 'completado', 'error'))
+);
+
+DROP TRIGGER IF EXISTS trigger_actualizar_modified_at_sync_runs ON sync_runs;
+CREATE TRIGGER trigger_actualizar_modified_at_sync_runs
+    BEFORE UPDATE ON sync_runs
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
+
+CREATE INDEX IF NOT EXISTS idx_sync_runs_tipo_inicio ON sync_runs(tipo, inicio_at);
@@ -0,0 +1,163 @@
+-- =====================================================
+-- MIGRACIÓN 004: Resumen de cartera precalculado
+-- Una fila por (cliente, negocio) con la cantidad y el total de remisiones
+-- y facturas abiertas. Lo mantienen triggers sobre remisiones y facturas,
+-- así que los tableros de cartera leen unas cuantas filas en lugar de
+-- agregar todos los documentos abiertos.
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS cartera_resumen (
+    id_cliente INT NOT NULL,
+    -- '' cuando el documento no tiene negocio (no se admite NULL en la llave)
+    nombre_negocio VARCHAR(255) NOT NULL DEFAULT '',
+    remisiones_abiertas INT NOT NULL DEFAULT 0,
+    total_remisiones BIGINT NOT NULL DEFAULT 0,
+    facturas_abiertas INT NOT NULL DEFAULT 0,
+    total_facturas NUMERIC(15,2) NOT NULL DEFAULT 0,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_cliente, nombre_negocio),
+    CONSTRAINT fk_cartera_resumen_cliente FOREIGN KEY (id_cliente)
+        REFERENCES clientes(id_cliente) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_cartera_resumen_negocio ON cartera_resumen(nombre_negocio);
+
+-- Suma (o resta) la contribución de un documento a su fila del resumen
+CREATE OR REPLACE FUNCTION cartera_resumen_sumar(
+    p_id_cliente INT,
+    p_nombre_negocio VARCHAR,
+    p_remisiones INT,
+    p_total_remisiones BIGINT,
+    p_facturas INT,
+    p_total_facturas NUMERIC
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO cartera_resumen AS cr (
+        id_cliente, nombre_negocio,
+        remisiones_abiertas, total_remisiones, facturas_abiertas, total_facturas
+    )
+    VALUES (
+        p_id_cliente, COALESCE(p_nombre_negocio, ''),
+        p_remisiones, p_total_remisiones, p_facturas, p_total_facturas
+    )
+    ON CONFLICT (id_cliente, nombre_negocio) DO UPDATE SET
+        remisiones_abiertas = cr.remisiones_abiertas + EXCLUDED.remisiones_abiertas,
+        total_remisiones = cr.total_remisiones + EXCLUDED.total_remisiones,
+        facturas_abiertas = cr.facturas_abiertas + EXCLUDED.facturas_abiertas,
+        total_facturas = cr.total_facturas + EXCLUDED.total_facturas,
+        modified_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cartera_resumen_remisiones()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.estado_remision = 'open' THEN
+        PERFORM cartera_resumen_sumar(OLD.id_cliente, OLD.nombre_negocio, -1, -OLD.valor_remsion::BIGINT, 0, 0);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.estado_remision = 'open' THEN
+        PERFORM cartera_resumen_sumar(NEW.id_cliente, NEW.nombre_negocio, 1, NEW.valor_remsion::BIGINT, 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cartera_resumen_facturas()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.estado_factura = 'open' THEN
+        PERFORM cartera_resumen_sumar(OLD.id_cliente, OLD.nombre_negocio, 0, 0, -1, -COALESCE(OLD.balance_factura, 0));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.estado_factura = 'open' THEN
+        PERFORM cartera_resumen_sumar(NEW.id_cliente, NEW.nombre_negocio, 0, 0, 1, COALESCE(NEW.balance_factura, 0));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reconstruye el resumen completo a partir de los documentos
+CREATE OR REPLACE FUNCTION recalcular_cartera_resumen()
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM cartera_resumen;
+    INSERT INTO cartera_resumen (
+        id_cliente, nombre_negocio,
+        remisiones_abiertas, total_remisiones, facturas_abiertas, total_facturas
+    )
+    SELECT id_cliente, nombre_negocio,
+           SUM(remisiones), SUM(total_remisiones), SUM(facturas), SUM(total_facturas)
+    FROM (
+        SELECT id_cliente, COALESCE(nombre_negocio, '') AS nombre_negocio,
+               COUNT(*) AS remisiones, SUM(valor_remsion)::BIGINT AS total_remisiones,
+               0 AS facturas, 0::NUMERIC AS total_facturas
+        FROM remisiones
+        WHERE estado_remision = 'open'
+        GROUP BY 1, 2
+        UNION ALL
+        SELECT id_cliente, COALESCE(nombre_negocio, ''),
+               0, 0, COUNT(*), COALESCE(SUM(balance_factura), 0)
+        FROM facturas
+        WHERE estado_factura = 'open'
+        GROUP BY 1, 2
+    ) documentos
+    GROUP BY id_cliente, nombre_negocio;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cartera_resumen_truncate()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM recalcular_cartera_resumen();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Solo las actualizaciones que cambian el aporte del documento al resumen
+DROP TRIGGER IF EXISTS trigger_cartera_resumen_remisiones ON remisiones;
+CREATE TRIGGER trigger_cartera_resumen_remisiones
+    AFTER INSERT OR DELETE ON remisiones
+    FOR EACH ROW
+    EXECUTE FUNCTION cartera_resumen_remisiones();
+
+DROP TRIGGER IF EXISTS trigger_cartera_resumen_remisiones_update ON remisiones;
+CREATE TRIGGER trigger_cartera_resumen_remisiones_update
+    AFTER UPDATE ON remisiones
+    FOR EACH ROW
+    WHEN (OLD.estado_remision IS DISTINCT FROM NEW.estado_remision
+          OR OLD.valor_remsion IS DISTINCT FROM NEW.valor_remsion
+          OR OLD.id_cliente IS DISTINCT FROM NEW.id_cliente
+          OR OLD.nombre_negocio IS DISTINCT FROM NEW.nombre_negocio)
+    EXECUTE FUNCTION cartera_resumen_remisiones();
+
+DROP TRIGGER IF EXISTS trigger_cartera_resumen_remisiones_truncate ON remisiones;
+CREATE TRIGGER trigger_cartera_resumen_remisiones_truncate
+    AFTER TRUNCATE ON remisiones
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION cartera_resumen_truncate();
+
+DROP TRIGGER IF EXISTS trigger_cartera_resumen_facturas ON facturas;
+CREATE TRIGGER trigger_cartera_resumen_facturas
+    AFTER INSERT OR DELETE ON facturas
+    FOR EACH ROW
+    EXECUTE FUNCTION cartera_resumen_facturas();
+
+DROP TRIGGER IF EXISTS trigger_cartera_resumen_facturas_update ON facturas;
+CREATE TRIGGER trigger_cartera_resumen_facturas_update
+    AFTER UPDATE ON facturas
+    FOR EACH ROW
+    WHEN (OLD.estado_factura IS DISTINCT FROM NEW.estado_factura
+          OR OLD.balance_factura IS DISTINCT FROM NEW.balance_factura
+          OR OLD.id_cliente IS DISTINCT FROM NEW.id_cliente
+          OR OLD.nombre_negocio IS DISTINCT FROM NEW.nombre_negocio)
+    EXECUTE FUNCTION cartera_resumen_facturas();
+
+DROP TRIGGER IF EXISTS trigger_cartera_resumen_facturas_truncate ON facturas;
+CREATE TRIGGER trigger_cartera_resumen_facturas_truncate
+    AFTER TRUNCATE ON facturas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION cartera_resumen_truncate();
+
+-- Carga inicial con los documentos existentes
+SELECT recalcular_cartera_resumen();
@@ -0,0 +1,47 @@
+-- =====================================================
+-- MIGRACIÓN 005: Grupos de negocios para los tableros de cartera
+-- Un grupo (p. ej. Kikes) reúne varios nombre_negocio y tiene su propio
+-- tablero en Cartera. Se configuran desde Configuración > Grupos de Negocio.
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS grupos_negocio (
+    id_grupo INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    nombre_grupo VARCHAR(100) NOT NULL,
+    icono VARCHAR(10) NOT NULL DEFAULT '🏪',
+    activo BOOLEAN NOT NULL DEFAULT TRUE,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_nombre_grupo UNIQUE (nombre_grupo)
+);
+
+DROP TRIGGER IF EXISTS trigger_actualizar_modified_at_grupos_negocio ON grupos_negocio;
+CREATE TRIGGER trigger_actualizar_modified_at_grupos_negocio
+    BEFORE UPDATE ON grupos_negocio
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
+
+CREATE TABLE IF NOT EXISTS grupos_negocio_miembros (
+    id_grupo INT NOT NULL,
+    nombre_negocio VARCHAR(255) NOT NULL,
+    orden INT NOT NULL DEFAULT 0,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_grupo, nombre_negocio),
+    CONSTRAINT fk_grupos_negocio_miembros_grupo FOREIGN KEY (id_grupo)
+        REFERENCES grupos_negocio(id_grupo) ON DELETE CASCADE
+);
+
+-- Grupo que antes estaba fijo en el código
+INSERT INTO grupos_negocio (nombre_grupo, icono) VALUES ('Kikes', '🍕')
+ON CONFLICT DO NOTHING;
+
+INSERT INTO grupos_negocio_miembros (id_grupo, nombre_negocio, orden)
+SELECT g.id_grupo, m.nombre_negocio, m.orden
+FROM grupos_negocio g
+CROSS JOIN (VALUES
+    ('COMIDAS RAPIDAS KIKE', 1),
+    ('COMIDAS RAPIDAS KIKE 2', 2),
+    ('KIKES PIZZA', 3)
+) AS m(nombre_negocio, orden)
+WHERE g.nombre_grupo = 'Kikes'
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,34 @@
+-- =====================================================
+-- MIGRACIÓN 006: Índices parciales para las consultas de deuda abierta
+-- Las consultas de cartera filtran documentos abiertos por negocio o por
+-- cliente y ordenan por fecha. Estos índices solo contienen los documentos
+-- abiertos e incluyen las columnas que se leen, así que esas consultas se
+-- resuelven con un Index Only Scan sin tocar la tabla.
+-- Comprobación: python benchmarks/explain_cartera.py
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- (En una BD grande en producción se pueden crear con CREATE INDEX CONCURRENTLY,
+--  ejecutando cada sentencia por separado fuera de una transacción.)
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS idx_remisiones_open_negocio_fecha
+    ON remisiones (nombre_negocio, fecha)
+    INCLUDE (numero_remision, valor_remsion, estado_remision, id_cliente)
+    WHERE estado_remision = 'open';
+
+CREATE INDEX IF NOT EXISTS idx_remisiones_open_cliente_fecha
+    ON remisiones (id_cliente, fecha)
+    INCLUDE (numero_remision, valor_remsion, estado_remision, nombre_negocio)
+    WHERE estado_remision = 'open';
+
+CREATE INDEX IF NOT EXISTS idx_facturas_open_negocio_fecha
+    ON facturas (nombre_negocio, fecha)
+    INCLUDE (numero_factura, balance_factura, estado_factura, id_cliente)
+    WHERE estado_factura = 'open';
+
+CREATE INDEX IF NOT EXISTS idx_facturas_open_cliente_fecha
+    ON facturas (id_cliente, fecha)
+    INCLUDE (numero_factura, balance_factura, estado_factura, nombre_negocio)
+    WHERE estado_factura = 'open';
+
+ANALYZE remisiones;
+ANALYZE facturas;
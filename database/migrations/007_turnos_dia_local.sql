@@ -0,0 +1,24 @@
+-- =====================================================
+-- MIGRACIÓN 007: Filtros por día local (Colombia) que usan índices
+-- Las consultas de turnos filtraban con DATE(hora_inicio AT TIME ZONE ...),
+-- una expresión sobre la columna que impide usar idx_turnos_fecha y obliga
+-- a recorrer todo el historial. Ahora se comparan rangos:
+--     hora_inicio >= inicio_dia_local(hoy_local())
+--     AND hora_inicio < inicio_dia_local(hoy_local() + 1)
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+-- Fecha de hoy en Colombia
+CREATE OR REPLACE FUNCTION hoy_local()
+RETURNS DATE AS $$
+    SELECT (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE
+$$ LANGUAGE sql STABLE;
+
+-- Instante en que empieza un día en Colombia
+CREATE OR REPLACE FUNCTION inicio_dia_local(fecha DATE)
+RETURNS TIMESTAMPTZ AS $$
+    SELECT fecha::TIMESTAMP AT TIME ZONE 'America/Bogota'
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Turnos de un empleado en un rango de fechas (kiosco de entrada/salida)
+CREATE INDEX IF NOT EXISTS idx_turnos_empleado_inicio ON turnos(id_empleado, hora_inicio);
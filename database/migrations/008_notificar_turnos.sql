@@ -0,0 +1,23 @@
+-- =====================================================
+-- MIGRACIÓN 008: Aviso de cambios en turnos (LISTEN/NOTIFY)
+-- Cualquier INSERT/UPDATE/DELETE sobre turnos (kiosco, edición manual...)
+-- envía una notificación en el canal 'turnos_cambios' al confirmarse la
+-- transacción. El tablero de Turnos de Hoy la escucha y solo entonces
+-- vuelve a consultar el día.
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION notificar_cambio_turnos()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('turnos_cambios', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Por sentencia: una notificación aunque la sentencia toque muchas filas
+DROP TRIGGER IF EXISTS trigger_notificar_cambio_turnos ON turnos;
+CREATE TRIGGER trigger_notificar_cambio_turnos
+    AFTER INSERT OR UPDATE OR DELETE ON turnos
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notificar_cambio_turnos();
@@ -0,0 +1,80 @@
+-- =====================================================
+-- MIGRACIÓN 009: Fichaje de entrada/salida en una sola operación
+-- El kiosco de turnos consultaba el turno abierto y después insertaba o
+-- cerraba en otra conexión; entre la consulta y la escritura dos fichajes
+-- del mismo empleado (doble clic, dos equipos) podían abrir dos turnos.
+-- fichar_turno() decide y escribe en una transacción, con el empleado
+-- bloqueado, y retorna los turnos del día ya actualizados.
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+-- p_accion: 'entrada' / 'salida' = lo que el kiosco mostró al empleado; si
+-- ya no corresponde (otro fichaje se adelantó) no escribe y retorna
+-- 'sin_cambio'. NULL = decide sola (entrada si no hay turno abierto hoy).
+-- Retorna una fila por turno de hoy (al menos una, con el turno en NULL si
+-- no hay) y ninguna si la cédula no existe.
+CREATE OR REPLACE FUNCTION fichar_turno(p_cedula VARCHAR, p_accion VARCHAR DEFAULT NULL)
+RETURNS TABLE (
+    accion TEXT,
+    afectado BOOLEAN,
+    id_empleado INT,
+    nombre_empleado TEXT,
+    id_turno INT,
+    hora_inicio TIMESTAMPTZ,
+    hora_salida TIMESTAMPTZ
+) AS $$
+#variable_conflict use_column
+DECLARE
+    v_id_empleado INT;
+    v_nombre TEXT;
+    v_id_turno INT;
+    v_accion TEXT;
+BEGIN
+    -- Los fichajes simultáneos del mismo empleado se atienden uno tras otro
+    SELECT e.id_empleado, e.nombre_empleado INTO v_id_empleado, v_nombre
+    FROM empleados e
+    WHERE e.cedula_empleado = p_cedula
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    SELECT t.id_turno INTO v_id_turno
+    FROM turnos t
+    WHERE t.id_empleado = v_id_empleado
+      AND t.hora_inicio >= inicio_dia_local(hoy_local())
+      AND t.hora_inicio < inicio_dia_local(hoy_local() + 1)
+      AND t.hora_salida IS NULL
+    ORDER BY t.hora_inicio DESC
+    LIMIT 1;
+
+    v_accion := CASE WHEN v_id_turno IS NULL THEN 'entrada' ELSE 'salida' END;
+
+    IF p_accion IS NOT NULL AND p_accion <> v_accion THEN
+        v_accion := 'sin_cambio';
+    ELSIF v_accion = 'entrada' THEN
+        INSERT INTO turnos (id_empleado, hora_inicio)
+        VALUES (v_id_empleado, NOW())
+        RETURNING turnos.id_turno INTO v_id_turno;
+    ELSE
+        UPDATE turnos SET hora_salida = NOW() WHERE turnos.id_turno = v_id_turno;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        v_accion,
+        v_accion <> 'sin_cambio' AND t.id_turno IS NOT DISTINCT FROM v_id_turno,
+        v_id_empleado,
+        v_nombre,
+        t.id_turno::INT,
+        t.hora_inicio::TIMESTAMPTZ,
+        t.hora_salida::TIMESTAMPTZ
+    FROM (SELECT 1) AS uno
+    LEFT JOIN turnos t
+        ON t.id_empleado = v_id_empleado
+       AND t.hora_inicio >= inicio_dia_local(hoy_local())
+       AND t.hora_inicio < inicio_dia_local(hoy_local() + 1)
+    ORDER BY t.hora_inicio DESC;
+END;
+$$ LANGUAGE plpgsql;
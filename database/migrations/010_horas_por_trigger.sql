@@ -0,0 +1,71 @@
+-- =====================================================
+-- MIGRACIÓN 010: total_horas mantenida por triggers
+-- Cada INSERT/UPDATE de turnos recalcula en la misma transacción las horas
+-- del turno; al borrar un turno su fila se elimina en cascada. Las páginas
+-- de nómina ya no necesitan sincronizar antes de consultar.
+-- horas_extra se elimina: las horas extra dependen de topes diario y
+-- semanal configurables y las calcula services/reglas_horas.py, que es la
+-- fuente de verdad para las vistas de nómina y la liquidación.
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION mantener_horas_turno()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_horas NUMERIC;
+BEGIN
+    -- Turno abierto (o reabierto): no tiene horas
+    IF NEW.hora_inicio IS NULL OR NEW.hora_salida IS NULL THEN
+        DELETE FROM total_horas WHERE id_turno = NEW.id_turno;
+        RETURN NULL;
+    END IF;
+
+    v_horas := ROUND((EXTRACT(EPOCH FROM (NEW.hora_salida - NEW.hora_inicio)) / 3600)::NUMERIC, 2);
+
+    INSERT INTO total_horas (id_turno, fecha, total_horas)
+    VALUES (NEW.id_turno, DATE(NEW.hora_inicio AT TIME ZONE 'America/Bogota'), v_horas)
+    ON CONFLICT (id_turno) DO UPDATE
+    SET fecha = EXCLUDED.fecha,
+        total_horas = EXCLUDED.total_horas;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Entradas del kiosco (sin salida) no disparan nada
+DROP TRIGGER IF EXISTS trigger_mantener_horas_turno ON turnos;
+CREATE TRIGGER trigger_mantener_horas_turno
+    AFTER INSERT ON turnos
+    FOR EACH ROW
+    WHEN (NEW.hora_salida IS NOT NULL)
+    EXECUTE FUNCTION mantener_horas_turno();
+
+DROP TRIGGER IF EXISTS trigger_mantener_horas_turno_update ON turnos;
+CREATE TRIGGER trigger_mantener_horas_turno_update
+    AFTER UPDATE ON turnos
+    FOR EACH ROW
+    WHEN (OLD.hora_inicio IS DISTINCT FROM NEW.hora_inicio
+          OR OLD.hora_salida IS DISTINCT FROM NEW.hora_salida)
+    EXECUTE FUNCTION mantener_horas_turno();
+
+-- Carga inicial con los turnos existentes
+INSERT INTO total_horas (id_turno, fecha, total_horas)
+SELECT
+    t.id_turno,
+    DATE(t.hora_inicio AT TIME ZONE 'America/Bogota'),
+    ROUND((EXTRACT(EPOCH FROM (t.hora_salida - t.hora_inicio)) / 3600)::NUMERIC, 2)
+FROM turnos t
+WHERE t.hora_inicio IS NOT NULL AND t.hora_salida IS NOT NULL
+ON CONFLICT (id_turno) DO UPDATE
+SET fecha = EXCLUDED.fecha,
+    total_horas = EXCLUDED.total_horas
+WHERE (total_horas.fecha, total_horas.total_horas)
+      IS DISTINCT FROM (EXCLUDED.fecha, EXCLUDED.total_horas);
+
+DELETE FROM total_horas th
+USING turnos t
+WHERE th.id_turno = t.id_turno
+  AND (t.hora_inicio IS NULL OR t.hora_salida IS NULL);
+
+-- Sin mantenimiento sus filas quedarían desactualizadas con cada edición
+DROP TABLE IF EXISTS horas_extra;
@@ -0,0 +1,40 @@
+-- =====================================================
+-- MIGRACIÓN 011: Liquidación de nómina por periodo
+-- Una fila por empleado y periodo con las horas y los valores calculados
+-- por services/nomina.py. Un periodo cerrado no se vuelve a calcular: sus
+-- filas quedan como se pagaron aunque después se editen los turnos.
+-- Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS nomina_periodo (
+    id_nomina INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    fecha_inicio DATE NOT NULL,
+    fecha_fin DATE NOT NULL,
+    id_empleado INT NOT NULL,
+    salario_dia INT NOT NULL,
+    turnos INT NOT NULL DEFAULT 0,
+    horas_ordinarias DECIMAL(8,2) NOT NULL DEFAULT 0,
+    horas_nocturnas DECIMAL(8,2) NOT NULL DEFAULT 0,
+    horas_dominicales DECIMAL(8,2) NOT NULL DEFAULT 0,
+    horas_extra_diurnas DECIMAL(8,2) NOT NULL DEFAULT 0,
+    horas_extra_nocturnas DECIMAL(8,2) NOT NULL DEFAULT 0,
+    pago_ordinario DECIMAL(15,2) NOT NULL DEFAULT 0,
+    recargo_nocturno DECIMAL(15,2) NOT NULL DEFAULT 0,
+    recargo_dominical DECIMAL(15,2) NOT NULL DEFAULT 0,
+    pago_extra DECIMAL(15,2) NOT NULL DEFAULT 0,
+    total_pagar DECIMAL(15,2) NOT NULL DEFAULT 0,
+    cerrado BOOLEAN NOT NULL DEFAULT FALSE,
+    cerrado_at TIMESTAMP,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_nomina_periodo_empleado FOREIGN KEY (id_empleado)
+        REFERENCES empleados(id_empleado) ON DELETE CASCADE,
+    CONSTRAINT unique_nomina_periodo_empleado UNIQUE (fecha_inicio, fecha_fin, id_empleado),
+    CONSTRAINT check_nomina_periodo_fechas CHECK (fecha_fin >= fecha_inicio)
+);
+
+DROP TRIGGER IF EXISTS trigger_actualizar_modified_at_nomina_periodo ON nomina_periodo;
+CREATE TRIGGER trigger_actualizar_modified_at_nomina_periodo
+    BEFORE UPDATE ON nomina_periodo
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
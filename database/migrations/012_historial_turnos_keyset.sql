@@ -0,0 +1,18 @@
+-- =====================================================
+-- MIGRACIÓN 012: Paginación por llave del historial de turnos
+-- get_historial_turnos devolvía a lo más 200 turnos y para ver los más
+-- antiguos había que cambiar las fechas. Ahora pagina con un cursor sobre
+-- (hora_inicio, id_turno):
+--     WHERE (hora_inicio, id_turno) < (%s, %s)
+--     ORDER BY hora_inicio DESC, id_turno DESC LIMIT n
+-- que con estos índices lee solo las filas de la página, sin importar qué
+-- tan atrás esté en el historial.
+-- Reemplazan a idx_turnos_fecha e idx_turnos_empleado_inicio, que son sus
+-- prefijos. Se puede ejecutar varias veces sin efectos secundarios.
+-- =====================================================
+
+CREATE INDEX IF NOT EXISTS idx_turnos_inicio_id ON turnos(hora_inicio, id_turno);
+CREATE INDEX IF NOT EXISTS idx_turnos_empleado_inicio_id ON turnos(id_empleado, hora_inicio, id_turno);
+
+DROP INDEX IF EXISTS idx_turnos_fecha;
+DROP INDEX IF EXISTS idx_turnos_empleado_inicio;
@@ -123,6 +123,105 @@ CREATE TRIGGER trigger_actualizar_modified_at_turnos
     FOR EACH ROW
     EXECUTE FUNCTION actualizar_modified_at();
 
+-- Aviso en el canal 'turnos_cambios' ante cualquier cambio (tablero de Turnos de Hoy)
+CREATE OR REPLACE FUNCTION notificar_cambio_turnos()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('turnos_cambios', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_notificar_cambio_turnos
+    AFTER INSERT OR UPDATE OR DELETE ON turnos
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notificar_cambio_turnos();
+
+-- Fecha de hoy en Colombia y el instante en que empieza un día en Colombia.
+-- Los filtros por día comparan rangos sobre hora_inicio para usar los índices:
+--     hora_inicio >= inicio_dia_local(hoy_local()) AND hora_inicio < inicio_dia_local(hoy_local() + 1)
+CREATE OR REPLACE FUNCTION hoy_local()
+RETURNS DATE AS $$
+    SELECT (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION inicio_dia_local(fecha DATE)
+RETURNS TIMESTAMPTZ AS $$
+    SELECT fecha::TIMESTAMP AT TIME ZONE 'America/Bogota'
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Fichaje de entrada/salida del kiosco en una sola transacción.
+-- p_accion: 'entrada' / 'salida' = lo que el kiosco mostró al empleado; si
+-- ya no corresponde (otro fichaje se adelantó) no escribe y retorna
+-- 'sin_cambio'. NULL = decide sola (entrada si no hay turno abierto hoy).
+-- Retorna una fila por turno de hoy (al menos una, con el turno en NULL si
+-- no hay) y ninguna si la cédula no existe.
+CREATE OR REPLACE FUNCTION fichar_turno(p_cedula VARCHAR, p_accion VARCHAR DEFAULT NULL)
+RETURNS TABLE (
+    accion TEXT,
+    afectado BOOLEAN,
+    id_empleado INT,
+    nombre_empleado TEXT,
+    id_turno INT,
+    hora_inicio TIMESTAMPTZ,
+    hora_salida TIMESTAMPTZ
+) AS $$
+#variable_conflict use_column
+DECLARE
+    v_id_empleado INT;
+    v_nombre TEXT;
+    v_id_turno INT;
+    v_accion TEXT;
+BEGIN
+    -- Los fichajes simultáneos del mismo empleado se atienden uno tras otro
+    SELECT e.id_empleado, e.nombre_empleado INTO v_id_empleado, v_nombre
+    FROM empleados e
+    WHERE e.cedula_empleado = p_cedula
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    SELECT t.id_turno INTO v_id_turno
+    FROM turnos t
+    WHERE t.id_empleado = v_id_empleado
+      AND t.hora_inicio >= inicio_dia_local(hoy_local())
+      AND t.hora_inicio < inicio_dia_local(hoy_local() + 1)
+      AND t.hora_salida IS NULL
+    ORDER BY t.hora_inicio DESC
+    LIMIT 1;
+
+    v_accion := CASE WHEN v_id_turno IS NULL THEN 'entrada' ELSE 'salida' END;
+
+    IF p_accion IS NOT NULL AND p_accion <> v_accion THEN
+        v_accion := 'sin_cambio';
+    ELSIF v_accion = 'entrada' THEN
+        INSERT INTO turnos (id_empleado, hora_inicio)
+        VALUES (v_id_empleado, NOW())
+        RETURNING turnos.id_turno INTO v_id_turno;
+    ELSE
+        UPDATE turnos SET hora_salida = NOW() WHERE turnos.id_turno = v_id_turno;
+    END IF;
+
+    RETURN QUERY
+    SELECT
+        v_accion,
+        v_accion <> 'sin_cambio' AND t.id_turno IS NOT DISTINCT FROM v_id_turno,
+        v_id_empleado,
+        v_nombre,
+        t.id_turno::INT,
+        t.hora_inicio::TIMESTAMPTZ,
+        t.hora_salida::TIMESTAMPTZ
+    FROM (SELECT 1) AS uno
+    LEFT JOIN turnos t
+        ON t.id_empleado = v_id_empleado
+       AND t.hora_inicio >= inicio_dia_local(hoy_local())
+       AND t.hora_inicio < inicio_dia_local(hoy_local() + 1)
+    ORDER BY t.hora_inicio DESC;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ==================== TABLA: TOTAL_HORAS ====================
 CREATE TABLE IF NOT EXISTS total_horas (
     id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
@@ -144,29 +243,83 @@ CREATE TRIGGER trigger_actualizar_modified_at_total_horas
 CREATE INDEX IF NOT EXISTS idx_total_horas_fecha ON total_horas(fecha);
 CREATE INDEX IF NOT EXISTS idx_total_horas_turno ON total_horas(id_turno);
 
--- ==================== TABLA: HORAS_EXTRA ====================
-CREATE TABLE IF NOT EXISTS horas_extra (
-    id INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-    id_turno INT NOT NULL,
-    id_hora INT NOT NULL,
-    total_horas_extra DECIMAL(5,2) NOT NULL,
+-- No hay tabla de horas extra: dependen de topes configurables (diario,
+-- semanal) y las calcula services/reglas_horas.py sobre turnos
+
+-- total_horas se mantiene con cada INSERT/UPDATE de turnos (en la misma
+-- transacción); al borrar un turno su fila cae en cascada
+CREATE OR REPLACE FUNCTION mantener_horas_turno()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_horas NUMERIC;
+BEGIN
+    -- Turno abierto (o reabierto): no tiene horas
+    IF NEW.hora_inicio IS NULL OR NEW.hora_salida IS NULL THEN
+        DELETE FROM total_horas WHERE id_turno = NEW.id_turno;
+        RETURN NULL;
+    END IF;
+
+    v_horas := ROUND((EXTRACT(EPOCH FROM (NEW.hora_salida - NEW.hora_inicio)) / 3600)::NUMERIC, 2);
+
+    INSERT INTO total_horas (id_turno, fecha, total_horas)
+    VALUES (NEW.id_turno, DATE(NEW.hora_inicio AT TIME ZONE 'America/Bogota'), v_horas)
+    ON CONFLICT (id_turno) DO UPDATE
+    SET fecha = EXCLUDED.fecha,
+        total_horas = EXCLUDED.total_horas;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Entradas del kiosco (sin salida) no disparan nada
+CREATE TRIGGER trigger_mantener_horas_turno
+    AFTER INSERT ON turnos
+    FOR EACH ROW
+    WHEN (NEW.hora_salida IS NOT NULL)
+    EXECUTE FUNCTION mantener_horas_turno();
+
+CREATE TRIGGER trigger_mantener_horas_turno_update
+    AFTER UPDATE ON turnos
+    FOR EACH ROW
+    WHEN (OLD.hora_inicio IS DISTINCT FROM NEW.hora_inicio
+          OR OLD.hora_salida IS DISTINCT FROM NEW.hora_salida)
+    EXECUTE FUNCTION mantener_horas_turno();
+
+-- ==================== TABLA: NÓMINA POR PERIODO ====================
+-- Liquidación por empleado y periodo (services/nomina.py); los periodos
+-- cerrados no se vuelven a calcular
+CREATE TABLE IF NOT EXISTS nomina_periodo (
+    id_nomina INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    fecha_inicio DATE NOT NULL,
+    fecha_fin DATE NOT NULL,
+    id_empleado INT NOT NULL,
+    salario_dia INT NOT NULL,
+    turnos INT NOT NULL DEFAULT 0,
+    horas_ordinarias DECIMAL(8,2) NOT NULL DEFAULT 0,
+    horas_nocturnas DECIMAL(8,2) NOT NULL DEFAULT 0,
+    horas_dominicales DECIMAL(8,2) NOT NULL DEFAULT 0,
+    horas_extra_diurnas DECIMAL(8,2) NOT NULL DEFAULT 0,
+    horas_extra_nocturnas DECIMAL(8,2) NOT NULL DEFAULT 0,
+    pago_ordinario DECIMAL(15,2) NOT NULL DEFAULT 0,
+    recargo_nocturno DECIMAL(15,2) NOT NULL DEFAULT 0,
+    recargo_dominical DECIMAL(15,2) NOT NULL DEFAULT 0,
+    pago_extra DECIMAL(15,2) NOT NULL DEFAULT 0,
+    total_pagar DECIMAL(15,2) NOT NULL DEFAULT 0,
+    cerrado BOOLEAN NOT NULL DEFAULT FALSE,
+    cerrado_at TIMESTAMP,
     create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    CONSTRAINT fk_horas_extra_turno FOREIGN KEY (id_turno) 
-        REFERENCES turnos(id_turno) ON DELETE CASCADE,
-    CONSTRAINT fk_horas_extra_hora FOREIGN KEY (id_hora) 
-        REFERENCES total_horas(id) ON DELETE CASCADE,
-    CONSTRAINT unique_id_turno_horas_extra UNIQUE (id_turno)
+    CONSTRAINT fk_nomina_periodo_empleado FOREIGN KEY (id_empleado)
+        REFERENCES empleados(id_empleado) ON DELETE CASCADE,
+    CONSTRAINT unique_nomina_periodo_empleado UNIQUE (fecha_inicio, fecha_fin, id_empleado),
+    CONSTRAINT check_nomina_periodo_fechas CHECK (fecha_fin >= fecha_inicio)
 );
 
-CREATE TRIGGER trigger_actualizar_modified_at_horas_extra
-    BEFORE UPDATE ON horas_extra
+CREATE TRIGGER trigger_actualizar_modified_at_nomina_periodo
+    BEFORE UPDATE ON nomina_periodo
     FOR EACH ROW
     EXECUTE FUNCTION actualizar_modified_at();
 
-CREATE INDEX IF NOT EXISTS idx_horas_extra_turno ON horas_extra(id_turno);
-CREATE INDEX IF NOT EXISTS idx_horas_extra_hora ON horas_extra(id_hora);
-
 -- ==================== TABLA: USUARIOS ====================
 CREATE TABLE IF NOT EXISTS usuarios (
     id_usuario SERIAL PRIMARY KEY,
@@ -225,6 +378,262 @@ CREATE TRIGGER trigger_actualizar_modified_at_ip
     FOR EACH ROW
     EXECUTE FUNCTION actualizar_modified_at();
 
+-- ==================== TABLA: ESTADO DE SINCRONIZACIÓN ====================
+-- Marca de agua de la sincronización incremental con Alegra (por recurso):
+-- último id de Alegra guardado y offset alcanzado en el listado ordenado por id
+CREATE TABLE IF NOT EXISTS sync_estado (
+    recurso VARCHAR(50) PRIMARY KEY,
+    ultimo_id INT NOT NULL DEFAULT 0,
+    ultimo_offset INT NOT NULL DEFAULT 0,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER trigger_actualizar_modified_at_sync_estado
+    BEFORE UPDATE ON sync_estado
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
+
+-- ==================== TABLA: TRABAJOS DE SINCRONIZACIÓN ====================
+-- Cola de sincronizaciones con Alegra: la interfaz encola y services/sync_worker.py ejecuta
+CREATE TABLE IF NOT EXISTS sync_jobs (
+    id_job INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    tipo VARCHAR(20) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+    solicitado_por VARCHAR(100),
+    mensaje TEXT,
+    inicio_at TIMESTAMP,
+    fin_at TIMESTAMP,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT check_sync_jobs_tipo CHECK (tipo IN ('full', 'incremental')),
+    CONSTRAINT check_sync_jobs_estado CHECK (estado IN ('pendiente', 'en_curso', 'completado', 'error'))
+);
+
+CREATE TRIGGER trigger_actualizar_modified_at_sync_jobs
+    BEFORE UPDATE ON sync_jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
+
+-- Como máximo un trabajo pendiente; pedir una completa con una incremental
+-- pendiente la convierte en completa (encolar_sync_job)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_sync_jobs_un_pendiente ON sync_jobs(estado) WHERE estado = 'pendiente';
+CREATE INDEX IF NOT EXISTS idx_sync_jobs_create_at ON sync_jobs(create_at);
+
+-- ==================== TABLA: EJECUCIONES DE SINCRONIZACIÓN ====================
+-- Métricas de cada sincronización con Alegra (services/sync_metrics.py)
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id_run INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    id_job INT,
+    tipo VARCHAR(30) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'en_curso',
+    inicio_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    fin_at TIMESTAMP,
+    duracion_s NUMERIC(10,2),
+    paginas INT NOT NULL DEFAULT 0,
+    solicitudes INT NOT NULL DEFAULT 0,
+    latencia_p50_ms NUMERIC(10,1),
+    latencia_p95_ms NUMERIC(10,1),
+    latencia_max_ms NUMERIC(10,1),
+    tiempo_api_s NUMERIC(10,2),
+    tiempo_bd_s NUMERIC(10,2),
+    documentos INT NOT NULL DEFAULT 0,
+    insertados INT NOT NULL DEFAULT 0,
+    actualizados INT NOT NULL DEFAULT 0,
+    cerrados INT NOT NULL DEFAULT 0,
+    errores INT NOT NULL DEFAULT 0,
+    lenta BOOLEAN NOT NULL DEFAULT FALSE,
+    mensaje TEXT,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_sync_runs_job FOREIGN KEY (id_job)
+        REFERENCES sync_jobs(id_job) ON DELETE SET NULL,
+    CONSTRAINT check_sync_runs_estado CHECK (estado IN ('en_curso', 'completado', 'error'))
+);
+
+CREATE TRIGGER trigger_actualizar_modified_at_sync_runs
+    BEFORE UPDATE ON sync_runs
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
+
+CREATE INDEX IF NOT EXISTS idx_sync_runs_tipo_inicio ON sync_runs(tipo, inicio_at);
+
+-- ==================== TABLA: RESUMEN DE CARTERA ====================
+-- Cantidad y total de remisiones y facturas abiertas por (cliente, negocio),
+-- mantenido por triggers sobre remisiones y facturas (lo leen los tableros de cartera)
+CREATE TABLE IF NOT EXISTS cartera_resumen (
+    id_cliente INT NOT NULL,
+    -- '' cuando el documento no tiene negocio (no se admite NULL en la llave)
+    nombre_negocio VARCHAR(255) NOT NULL DEFAULT '',
+    remisiones_abiertas INT NOT NULL DEFAULT 0,
+    total_remisiones BIGINT NOT NULL DEFAULT 0,
+    facturas_abiertas INT NOT NULL DEFAULT 0,
+    total_facturas NUMERIC(15,2) NOT NULL DEFAULT 0,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_cliente, nombre_negocio),
+    CONSTRAINT fk_cartera_resumen_cliente FOREIGN KEY (id_cliente)
+        REFERENCES clientes(id_cliente) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_cartera_resumen_negocio ON cartera_resumen(nombre_negocio);
+
+-- Suma (o resta) la contribución de un documento a su fila del resumen
+CREATE OR REPLACE FUNCTION cartera_resumen_sumar(
+    p_id_cliente INT,
+    p_nombre_negocio VARCHAR,
+    p_remisiones INT,
+    p_total_remisiones BIGINT,
+    p_facturas INT,
+    p_total_facturas NUMERIC
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO cartera_resumen AS cr (
+        id_cliente, nombre_negocio,
+        remisiones_abiertas, total_remisiones, facturas_abiertas, total_facturas
+    )
+    VALUES (
+        p_id_cliente, COALESCE(p_nombre_negocio, ''),
+        p_remisiones, p_total_remisiones, p_facturas, p_total_facturas
+    )
+    ON CONFLICT (id_cliente, nombre_negocio) DO UPDATE SET
+        remisiones_abiertas = cr.remisiones_abiertas + EXCLUDED.remisiones_abiertas,
+        total_remisiones = cr.total_remisiones + EXCLUDED.total_remisiones,
+        facturas_abiertas = cr.facturas_abiertas + EXCLUDED.facturas_abiertas,
+        total_facturas = cr.total_facturas + EXCLUDED.total_facturas,
+        modified_at = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cartera_resumen_remisiones()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.estado_remision = 'open' THEN
+        PERFORM cartera_resumen_sumar(OLD.id_cliente, OLD.nombre_negocio, -1, -OLD.valor_remsion::BIGINT, 0, 0);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.estado_remision = 'open' THEN
+        PERFORM cartera_resumen_sumar(NEW.id_cliente, NEW.nombre_negocio, 1, NEW.valor_remsion::BIGINT, 0, 0);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cartera_resumen_facturas()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.estado_factura = 'open' THEN
+        PERFORM cartera_resumen_sumar(OLD.id_cliente, OLD.nombre_negocio, 0, 0, -1, -COALESCE(OLD.balance_factura, 0));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.estado_factura = 'open' THEN
+        PERFORM cartera_resumen_sumar(NEW.id_cliente, NEW.nombre_negocio, 0, 0, 1, COALESCE(NEW.balance_factura, 0));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reconstruye el resumen completo a partir de los documentos
+CREATE OR REPLACE FUNCTION recalcular_cartera_resumen()
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM cartera_resumen;
+    INSERT INTO cartera_resumen (
+        id_cliente, nombre_negocio,
+        remisiones_abiertas, total_remisiones, facturas_abiertas, total_facturas
+    )
+    SELECT id_cliente, nombre_negocio,
+           SUM(remisiones), SUM(total_remisiones), SUM(facturas), SUM(total_facturas)
+    FROM (
+        SELECT id_cliente, COALESCE(nombre_negocio, '') AS nombre_negocio,
+               COUNT(*) AS remisiones, SUM(valor_remsion)::BIGINT AS total_remisiones,
+               0 AS facturas, 0::NUMERIC AS total_facturas
+        FROM remisiones
+        WHERE estado_remision = 'open'
+        GROUP BY 1, 2
+        UNION ALL
+        SELECT id_cliente, COALESCE(nombre_negocio, ''),
+               0, 0, COUNT(*), COALESCE(SUM(balance_factura), 0)
+        FROM facturas
+        WHERE estado_factura = 'open'
+        GROUP BY 1, 2
+    ) documentos
+    GROUP BY id_cliente, nombre_negocio;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cartera_resumen_truncate()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM recalcular_cartera_resumen();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Solo las actualizaciones que cambian el aporte del documento al resumen
+CREATE TRIGGER trigger_cartera_resumen_remisiones
+    AFTER INSERT OR DELETE ON remisiones
+    FOR EACH ROW
+    EXECUTE FUNCTION cartera_resumen_remisiones();
+
+CREATE TRIGGER trigger_cartera_resumen_remisiones_update
+    AFTER UPDATE ON remisiones
+    FOR EACH ROW
+    WHEN (OLD.estado_remision IS DISTINCT FROM NEW.estado_remision
+          OR OLD.valor_remsion IS DISTINCT FROM NEW.valor_remsion
+          OR OLD.id_cliente IS DISTINCT FROM NEW.id_cliente
+          OR OLD.nombre_negocio IS DISTINCT FROM NEW.nombre_negocio)
+    EXECUTE FUNCTION cartera_resumen_remisiones();
+
+CREATE TRIGGER trigger_cartera_resumen_remisiones_truncate
+    AFTER TRUNCATE ON remisiones
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION cartera_resumen_truncate();
+
+CREATE TRIGGER trigger_cartera_resumen_facturas
+    AFTER INSERT OR DELETE ON facturas
+    FOR EACH ROW
+    EXECUTE FUNCTION cartera_resumen_facturas();
+
+CREATE TRIGGER trigger_cartera_resumen_facturas_update
+    AFTER UPDATE ON facturas
+    FOR EACH ROW
+    WHEN (OLD.estado_factura IS DISTINCT FROM NEW.estado_factura
+          OR OLD.balance_factura IS DISTINCT FROM NEW.balance_factura
+          OR OLD.id_cliente IS DISTINCT FROM NEW.id_cliente
+          OR OLD.nombre_negocio IS DISTINCT FROM NEW.nombre_negocio)
+    EXECUTE FUNCTION cartera_resumen_facturas();
+
+CREATE TRIGGER trigger_cartera_resumen_facturas_truncate
+    AFTER TRUNCATE ON facturas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION cartera_resumen_truncate();
+
+-- ==================== TABLA: GRUPOS DE NEGOCIO ====================
+-- Grupos de nombre_negocio con tablero propio en Cartera (p. ej. Kikes)
+CREATE TABLE IF NOT EXISTS grupos_negocio (
+    id_grupo INT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    nombre_grupo VARCHAR(100) NOT NULL,
+    icono VARCHAR(10) NOT NULL DEFAULT '🏪',
+    activo BOOLEAN NOT NULL DEFAULT TRUE,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    modified_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_nombre_grupo UNIQUE (nombre_grupo)
+);
+
+CREATE TRIGGER trigger_actualizar_modified_at_grupos_negocio
+    BEFORE UPDATE ON grupos_negocio
+    FOR EACH ROW
+    EXECUTE FUNCTION actualizar_modified_at();
+
+CREATE TABLE IF NOT EXISTS grupos_negocio_miembros (
+    id_grupo INT NOT NULL,
+    nombre_negocio VARCHAR(255) NOT NULL,
+    orden INT NOT NULL DEFAULT 0,
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id_grupo, nombre_negocio),
+    CONSTRAINT fk_grupos_negocio_miembros_grupo FOREIGN KEY (id_grupo)
+        REFERENCES grupos_negocio(id_grupo) ON DELETE CASCADE
+);
+
 -- ==================== DATOS INICIALES ====================
 
 -- Módulos del sistema
@@ -235,6 +644,21 @@ INSERT INTO modulos_sistema (nombre_modulo, descripcion, icono, orden) VALUES
     ('Nómina', 'Gestión de nómina y pagos', 'cash-stack', 4)
 ON CONFLICT DO NOTHING;
 
+-- Grupos de negocio
+INSERT INTO grupos_negocio (nombre_grupo, icono) VALUES ('Kikes', '🍕')
+ON CONFLICT DO NOTHING;
+
+INSERT INTO grupos_negocio_miembros (id_grupo, nombre_negocio, orden)
+SELECT g.id_grupo, m.nombre_negocio, m.orden
+FROM grupos_negocio g
+CROSS JOIN (VALUES
+    ('COMIDAS RAPIDAS KIKE', 1),
+    ('COMIDAS RAPIDAS KIKE 2', 2),
+    ('KIKES PIZZA', 3)
+) AS m(nombre_negocio, orden)
+WHERE g.nombre_grupo = 'Kikes'
+ON CONFLICT DO NOTHING;
+
 -- =====================================================
 -- NOTA: El usuario master inicial debe ser creado 
 -- manualmente o mediante la aplicación.
@@ -258,7 +682,27 @@ CREATE INDEX IF NOT EXISTS idx_facturas_cliente ON facturas(id_cliente);
 CREATE INDEX IF NOT EXISTS idx_facturas_fecha ON facturas(fecha);
 CREATE INDEX IF NOT EXISTS idx_facturas_estado ON facturas(estado_factura);
 
+-- Documentos abiertos por negocio / cliente (consultas de cartera, ver migración 006)
+CREATE INDEX IF NOT EXISTS idx_remisiones_open_negocio_fecha
+    ON remisiones (nombre_negocio, fecha)
+    INCLUDE (numero_remision, valor_remsion, estado_remision, id_cliente)
+    WHERE estado_remision = 'open';
+CREATE INDEX IF NOT EXISTS idx_remisiones_open_cliente_fecha
+    ON remisiones (id_cliente, fecha)
+    INCLUDE (numero_remision, valor_remsion, estado_remision, nombre_negocio)
+    WHERE estado_remision = 'open';
+CREATE INDEX IF NOT EXISTS idx_facturas_open_negocio_fecha
+    ON facturas (nombre_negocio, fecha)
+    INCLUDE (numero_factura, balance_factura, estado_factura, id_cliente)
+    WHERE estado_factura = 'open';
+CREATE INDEX IF NOT EXISTS idx_facturas_open_cliente_fecha
+    ON facturas (id_cliente, fecha)
+    INCLUDE (numero_factura, balance_factura, estado_factura, nombre_negocio)
+    WHERE estado_factura = 'open';
+
 CREATE INDEX IF NOT EXISTS idx_turnos_empleado ON turnos(id_empleado);
-CREATE INDEX IF NOT EXISTS idx_turnos_fecha ON turnos(hora_inicio);
+-- (hora_inicio, id_turno): cursor del historial paginado
+CREATE INDEX IF NOT EXISTS idx_turnos_inicio_id ON turnos(hora_inicio, id_turno);
+CREATE INDEX IF NOT EXISTS idx_turnos_empleado_inicio_id ON turnos(id_empleado, hora_inicio, id_turno);
 
 CREATE INDEX IF NOT EXISTS idx_usuarios_activo ON usuarios(activo);
@@ -1,49 +1,33 @@
 import os
-import base64
-import requests
 import time
+import logging
 from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data_base.controler import (
-    get_last_remission_number,
     insert_cliente,
     insert_negocio,
     insert_remision,
-    get_last_invoice_number,
     insert_factura,
-    get_all_remisiones_open,
-    update_remision_estado,
-    get_all_facturas_open,
-    update_factura_estado,
-    update_remision_valor,
-    update_factura_valor,
-    get_all_remisiones_open_with_value,
-    get_all_facturas_open_with_value,
-    reset_all_remisiones_to_closed,
-    reset_all_facturas_to_closed,
-    upsert_remision,
-    upsert_factura
+    get_sync_estado,
+    bulk_upsert_remisiones,
+    bulk_upsert_facturas,
+    CargaEnBloque
 )
+from services.alegra_fetcher import iter_pages, AlegraFetchError
+from services.alegra_client import get_client
+from services.sync_metrics import (
+    registrar_sync,
+    registrar_pagina,
+    registrar_escritura,
+    registrar_error
+)
+from config.settings import ALEGRA_CONFIG
 
 # Cargo variables de entorno
 load_dotenv()
 
-BASE_URL = "https://api.alegra.com/api/v1"
-
-
-def get_credentials():
-    """Retorna los headers con las credenciales"""
-    email = os.getenv("ALEGRA_EMAIL")
-    api_key = os.getenv("ALEGRA_API_KEY")
-    
-    credentials = f"{email}:{api_key}"
-    encoded_credentials = base64.b64encode(credentials.encode()).decode()
-    
-    return {
-        "accept": "application/json",
-        "authorization": f"Basic {encoded_credentials}"
-    }
+logger = logging.getLogger(__name__)
 
 
 def process_single_remission(remission):
@@ -82,18 +66,18 @@ def process_single_remission(remission):
     return True
 
 
-def get_total_remissions():
-    """Obtiene el total de remisiones usando metadata"""
-    headers = get_credentials()
+def get_total_remissions(filtros=None):
+    """Obtiene el total de remisiones usando metadata (opcionalmente con filtros, p. ej. status)"""
+    client = get_client()
     
     params = {
         "limit": 1,
-        "metadata": "true"
+        "metadata": "true",
+        **(filtros or {})
     }
     
-    response = requests.get(
-        f"{BASE_URL}/remissions",
-        headers=headers,
+    response = client.get(
+        "/remissions",
         params=params,
         timeout=15
     )
@@ -106,131 +90,124 @@ def get_total_remissions():
 
 def initial_load():
     """Carga inicial - descarga desde remisión 1 y guarda al mismo tiempo"""
-    headers = get_credentials()
-    
     # Obtener total de remisiones
     total_remissions = get_total_remissions()
-    print(f"Total de remisiones en Alegra: {total_remissions}")
+    logger.info("Total de remisiones en Alegra: %s", total_remissions)
     
-    start = 1  # Empezar desde la remisión 1
-    limit = 30
     request_count = 0
     saved_count = 0
     start_time = time.time()
     
-    print("=" * 50)
-    print("CARGA INICIAL DE REMISIONES")
-    print("=" * 50)
-    
-    while True:
-        params = {
-            "start": start,
-            "limit": limit,
-            "order_direction": "ASC",
-            "order_field": "id"
-        }
-        
-        request_count += 1
-        print(f"\n[Solicitud #{request_count}] Desde remisión: {start}...")
-        
-        try:
-            response = requests.get(
-                f"{BASE_URL}/remissions",
-                headers=headers,
-                params=params,
-                timeout=15
-            )
-            
-            if response.status_code != 200:
-                print(f"  ✗ Error: {response.status_code} - {response.text}")
-                break
-            
-            remissions = response.json()
+    logger.info("Carga inicial de remisiones")
+    
+    # Las páginas se descargan en paralelo y llegan en orden
+    params = {
+        "order_direction": "ASC",
+        "order_field": "id"
+    }
+    
+    try:
+        for start, remissions in iter_pages("/remissions", params,
+                                            total=total_remissions, start=1):
+            registrar_pagina(len(remissions))
+            request_count += 1
+            logger.info("Solicitud #%s: desde remisión %s", request_count, start)
             
             if not remissions:
-                print("  → No hay más remisiones")
+                logger.info("No hay más remisiones")
                 break
             
             # Guardar cada remisión inmediatamente
+            inicio_bd = time.perf_counter()
+            guardadas_antes = saved_count
             for remission in remissions:
                 numero = int(remission.get("number", 0))
                 if process_single_remission(remission):
                     saved_count += 1
-                    print(f"    ✓ Remisión #{numero} guardada")
-            
-            print(f"  → Total guardadas: {saved_count}")
+                    logger.debug("Remisión #%s guardada", numero)
             
-            # Siguiente página: avanzar 30 remisiones
-            start += limit
-            
-            # Si ya pasamos el total, terminar
-            if start > total_remissions:
-                print("  → Todas las remisiones procesadas")
-                break
-            
-        except Exception as e:
-            print(f"  ✗ Error: {str(e)}")
-            break
+            registrar_escritura(saved_count - guardadas_antes, segundos=time.perf_counter() - inicio_bd)
+            logger.info("Total guardadas: %s", saved_count)
+        
+        logger.info("Todas las remisiones procesadas")
+    except Exception as e:
+        registrar_error(f"Error: {str(e)}")
     
     total_time = time.time() - start_time
-    print("\n" + "=" * 50)
-    print(f"COMPLETADO")
-    print(f"  Remisiones guardadas: {saved_count}")
-    print(f"  Solicitudes: {request_count}")
-    print(f"  Tiempo: {total_time:.2f}s")
-    print("=" * 50)
+    logger.info(
+        "Carga inicial de remisiones completada: %s guardadas, %s solicitudes, %.2fs",
+        saved_count, request_count, total_time
+    )
+
+
+def remission_to_row(remission, estado=None):
+    """Convierte una remisión de Alegra en la tupla que recibe bulk_upsert_remisiones (None si no tiene cliente)"""
+    client = remission.get("client", {})
+    nit = client.get("identification")
+    nombre = (client.get("name") or "").strip()
+    
+    if not nit or not nombre:
+        return None
+    
+    return (
+        int(remission.get("number", 0)),
+        remission.get("date"),
+        estado or get_remission_real_status(remission),
+        float(remission.get("total", 0)),
+        nit,
+        nombre
+    )
 
 
 def sync_remissions():
-    """Sincroniza solo remisiones nuevas desde la última guardada"""
-    headers = get_credentials()
-    last_number = get_last_remission_number()
-    
-    print("=" * 50)
-    print("SINCRONIZANDO REMISIONES NUEVAS")
-    print(f"Última remisión en BD: {last_number}")
-    print("=" * 50)
-    
-    # Empezar desde la siguiente remisión
-    start = last_number + 1
-    limit = 30
+    """
+    Sincroniza las remisiones nuevas desde la marca de agua guardada en sync_estado.
+    
+    Recorre el listado de Alegra ordenado por id a partir del último offset
+    alcanzado y guarda solo las remisiones con id mayor al último visto. Cada
+    página se guarda junto con la nueva marca en la misma transacción, así que
+    una sincronización interrumpida continúa donde quedó.
+    """
+    estado = get_sync_estado("remisiones")
+    ultimo_id, ultimo_offset = (estado[0], estado[1]) if estado else (0, 0)
+    
+    logger.info("Sincronizando remisiones nuevas desde el id %s (offset %s)", ultimo_id, ultimo_offset)
+    
+    limit = ALEGRA_CONFIG["page_size"]
+    # Se repite una página para tolerar documentos eliminados en Alegra
+    start = max(0, ultimo_offset - limit)
+    total = get_total_remissions()
     saved_count = 0
     
-    while True:
-        params = {
-            "start": start,
-            "limit": limit,
-            "order_direction": "ASC",
-            "order_field": "id"
-        }
-        
-        print(f"\n[Buscando desde remisión #{start}]...")
-        
-        response = requests.get(
-            f"{BASE_URL}/remissions",
-            headers=headers,
-            params=params,
-            timeout=15
-        )
-        
-        if response.status_code != 200:
-            print(f"  ✗ Error: {response.status_code}")
-            break
-        
-        remissions = response.json()
-        
-        if not remissions:
-            break
-        
-        for remission in remissions:
-            numero = int(remission.get("number", 0))
-            if process_single_remission(remission):
-                saved_count += 1
-                print(f"  ✓ Nueva remisión #{numero} guardada")
-        
-        start += limit
+    params = {
+        "order_direction": "ASC",
+        "order_field": "id"
+    }
+    
+    try:
+        for offset, remissions in iter_pages("/remissions", params, total=max(0, total - start), start=start):
+            registrar_pagina(len(remissions))
+            nuevas = [rem for rem in remissions if int(rem.get("id", 0)) > ultimo_id]
+            if nuevas:
+                ultimo_id = max(int(rem["id"]) for rem in nuevas)
+            
+            filas = [fila for fila in map(remission_to_row, nuevas) if fila]
+            marca = ("remisiones", ultimo_id, max(ultimo_offset, offset + len(remissions)))
+            inicio_bd = time.perf_counter()
+            result, error = bulk_upsert_remisiones(filas, marca_sync=marca)
+            if error:
+                registrar_error(f"Error guardando remisiones: {error}")
+                return
+            registrar_escritura(*result, segundos=time.perf_counter() - inicio_bd)
+            
+            ultimo_offset = marca[2]
+            saved_count += result[0]
+            if nuevas:
+                logger.info("Desde #%s: %s nuevas (hasta id %s)", offset, len(nuevas), ultimo_id)
+    except AlegraFetchError as e:
+        registrar_error(f"Error: {e}")
     
-    print(f"\n✓ Sincronización completada. Nuevas: {saved_count}")
+    logger.info("Sincronización de remisiones completada. Nuevas: %s", saved_count)
 
 
 # ==================== FACTURAS ====================
@@ -272,18 +249,18 @@ def process_single_invoice(invoice):
     return True
 
 
-def get_total_invoices():
-    """Obtiene el total de facturas usando metadata"""
-    headers = get_credentials()
+def get_total_invoices(filtros=None):
+    """Obtiene el total de facturas usando metadata (opcionalmente con filtros, p. ej. status)"""
+    client = get_client()
     
     params = {
         "limit": 1,
-        "metadata": "true"
+        "metadata": "true",
+        **(filtros or {})
     }
     
-    response = requests.get(
-        f"{BASE_URL}/invoices",
-        headers=headers,
+    response = client.get(
+        "/invoices",
         params=params,
         timeout=15
     )
@@ -296,145 +273,133 @@ def get_total_invoices():
 
 def initial_load_invoices():
     """Carga inicial de facturas"""
-    headers = get_credentials()
-    
     total_invoices = get_total_invoices()
-    print(f"Total de facturas en Alegra: {total_invoices}")
+    logger.info("Total de facturas en Alegra: %s", total_invoices)
     
-    start = 1
-    limit = 30
     request_count = 0
     saved_count = 0
     skipped_count = 0
     start_time = time.time()
     
-    print("=" * 50)
-    print("CARGA INICIAL DE FACTURAS")
-    print("=" * 50)
-    
-    while True:
-        params = {
-            "start": start,
-            "limit": limit,
-            "order_direction": "ASC",
-            "order_field": "id"
-        }
-        
-        request_count += 1
-        print(f"\n[Solicitud #{request_count}] Desde factura: {start}...")
-        
-        try:
-            response = requests.get(
-                f"{BASE_URL}/invoices",
-                headers=headers,
-                params=params,
-                timeout=15
-            )
-            
-            if response.status_code != 200:
-                print(f"  ✗ Error: {response.status_code} - {response.text}")
-                break
-            
-            invoices = response.json()
+    logger.info("Carga inicial de facturas")
+    
+    params = {
+        "order_direction": "ASC",
+        "order_field": "id"
+    }
+    
+    try:
+        for start, invoices in iter_pages("/invoices", params,
+                                          total=total_invoices, start=1):
+            registrar_pagina(len(invoices))
+            request_count += 1
+            logger.info("Solicitud #%s: desde factura %s", request_count, start)
             
             if not invoices:
-                print("  → No hay más facturas")
+                logger.info("No hay más facturas")
                 break
             
+            inicio_bd = time.perf_counter()
+            guardadas_antes = saved_count
             for invoice in invoices:
                 number_template = invoice.get("numberTemplate", {})
                 numero = number_template.get("fullNumber", "")
                 if process_single_invoice(invoice):
                     saved_count += 1
-                    print(f"    ✓ Factura {numero} guardada")
+                    logger.debug("Factura %s guardada", numero)
                 else:
                     skipped_count += 1
             
-            print(f"  → Guardadas: {saved_count} | Omitidas: {skipped_count}")
-            
-            start += limit
-            
-            if start > total_invoices:
-                print("  → Todas las facturas procesadas")
-                break
-            
-        except Exception as e:
-            print(f"  ✗ Error: {str(e)}")
-            break
+            registrar_escritura(saved_count - guardadas_antes, segundos=time.perf_counter() - inicio_bd)
+            logger.info("Guardadas: %s | Omitidas: %s", saved_count, skipped_count)
+        
+        logger.info("Todas las facturas procesadas")
+    except Exception as e:
+        registrar_error(f"Error: {str(e)}")
     
     total_time = time.time() - start_time
-    print("\n" + "=" * 50)
-    print(f"COMPLETADO")
-    print(f"  Facturas guardadas: {saved_count}")
-    print(f"  Facturas omitidas (Consumidor Final): {skipped_count}")
-    print(f"  Solicitudes: {request_count}")
-    print(f"  Tiempo: {total_time:.2f}s")
-    print("=" * 50)
+    logger.info(
+        "Carga inicial de facturas completada: %s guardadas, %s omitidas (Consumidor Final), %s solicitudes, %.2fs",
+        saved_count, skipped_count, request_count, total_time
+    )
+
+
+def invoice_to_row(invoice, estado=None):
+    """Convierte una factura de Alegra en la tupla que recibe bulk_upsert_facturas (None si se omite)"""
+    client = invoice.get("client", {})
+    nit = client.get("identification")
+    nombre = (client.get("name") or "").strip()
+    
+    # Omitir Consumidor Final y documentos sin cliente
+    if nit == "222222222222" or nombre == "Consumidor Final":
+        return None
+    if not nit or not nombre:
+        return None
+    
+    numero_factura = invoice.get("numberTemplate", {}).get("fullNumber", "")
+    if not numero_factura:
+        return None
+    
+    return (
+        numero_factura,
+        invoice.get("date"),
+        estado or invoice.get("status", "unknown"),
+        float(invoice.get("total", 0)),
+        float(invoice.get("balance", 0)),
+        nit,
+        nombre
+    )
 
 
 def sync_invoices():
-    """Sincroniza solo facturas nuevas desde la última guardada"""
-    headers = get_credentials()
-    last_number = get_last_invoice_number()
+    """
+    Sincroniza las facturas nuevas desde la marca de agua guardada en sync_estado.
+    
+    Igual que sync_remissions: listado ordenado por id desde el último offset,
+    guardando cada página junto con la marca en la misma transacción.
+    """
+    estado = get_sync_estado("facturas")
+    ultimo_id, ultimo_offset = (estado[0], estado[1]) if estado else (0, 0)
     
-    print("=" * 50)
-    print("SINCRONIZANDO FACTURAS NUEVAS")
-    print(f"Última factura en BD: {last_number}")
-    print("=" * 50)
+    logger.info("Sincronizando facturas nuevas desde el id %s (offset %s)", ultimo_id, ultimo_offset)
     
-    start = 1
-    limit = 30
+    limit = ALEGRA_CONFIG["page_size"]
+    # Se repite una página para tolerar documentos eliminados en Alegra
+    start = max(0, ultimo_offset - limit)
+    total = get_total_invoices()
     saved_count = 0
     skipped_count = 0
     
-    while True:
-        params = {
-            "start": start,
-            "limit": limit,
-            "order_direction": "DESC",
-            "order_field": "id"
-        }
-        
-        print(f"\n[Buscando facturas nuevas...]")
-        
-        response = requests.get(
-            f"{BASE_URL}/invoices",
-            headers=headers,
-            params=params,
-            timeout=15
-        )
-        
-        if response.status_code != 200:
-            print(f"  ✗ Error: {response.status_code}")
-            break
-        
-        invoices = response.json()
-        
-        if not invoices:
-            break
-        
-        found_existing = False
-        for invoice in invoices:
-            number_template = invoice.get("numberTemplate", {})
-            numero = number_template.get("fullNumber", "")
+    params = {
+        "order_direction": "ASC",
+        "order_field": "id"
+    }
+    
+    try:
+        for offset, invoices in iter_pages("/invoices", params, total=max(0, total - start), start=start):
+            registrar_pagina(len(invoices))
+            nuevas = [inv for inv in invoices if int(inv.get("id", 0)) > ultimo_id]
+            if nuevas:
+                ultimo_id = max(int(inv["id"]) for inv in nuevas)
             
-            # Si encontramos la última factura guardada, terminamos
-            if numero == last_number:
-                found_existing = True
-                break
+            filas = [fila for fila in map(invoice_to_row, nuevas) if fila]
+            skipped_count += len(nuevas) - len(filas)
+            marca = ("facturas", ultimo_id, max(ultimo_offset, offset + len(invoices)))
+            inicio_bd = time.perf_counter()
+            result, error = bulk_upsert_facturas(filas, marca_sync=marca)
+            if error:
+                registrar_error(f"Error guardando facturas: {error}")
+                return
+            registrar_escritura(*result, segundos=time.perf_counter() - inicio_bd)
             
-            if process_single_invoice(invoice):
-                saved_count += 1
-                print(f"  ✓ Nueva factura {numero} guardada")
-            else:
-                skipped_count += 1
-        
-        if found_existing:
-            break
-        
-        start += limit
+            ultimo_offset = marca[2]
+            saved_count += result[0]
+            if nuevas:
+                logger.info("Desde #%s: %s nuevas (hasta id %s)", offset, len(filas), ultimo_id)
+    except AlegraFetchError as e:
+        registrar_error(f"Error: {e}")
     
-    print(f"\n✓ Sincronización completada. Nuevas: {saved_count} | Omitidas: {skipped_count}")
+    logger.info("Sincronización de facturas completada. Nuevas: %s | Omitidas: %s", saved_count, skipped_count)
 
 
 def get_remission_real_status(remission):
@@ -472,123 +437,29 @@ def get_remission_real_status(remission):
 
 
 def sync_remissions_status():
-    """Sincroniza el estado y valor de remisiones basándose en missingQuantityToBilled"""
-    headers = get_credentials()
-    
-    print("=" * 50)
-    print("SINCRONIZANDO ESTADOS Y VALORES DE REMISIONES")
-    print("(Usando missingQuantityToBilled como indicador)")
-    print("=" * 50)
-    
-    # Obtener remisiones abiertas de la BD con sus valores
-    remisiones_open = get_all_remisiones_open_with_value()
-    total = len(remisiones_open)
-    print(f"Remisiones abiertas en BD: {total}")
-    
-    if total == 0:
-        print("No hay remisiones abiertas para verificar")
-        return
-    
-    updated_estado_count = 0
-    updated_valor_count = 0
-    
-    for numero_remision, estado_actual, valor_actual in remisiones_open:
-        # Consultar remisión en la API buscando por número
-        response = requests.get(
-            f"{BASE_URL}/remissions",
-            headers=headers,
-            params={"number": numero_remision},
-            timeout=15
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data and len(data) > 0:
-                remission = data[0]
-                
-                # Calcular el estado REAL basado en missingQuantityToBilled
-                nuevo_estado = get_remission_real_status(remission)
-                
-                # Obtener valor de la API
-                nuevo_valor = float(remission.get("total", 0))
-                valor_actual_float = float(valor_actual) if valor_actual else 0
-                
-                # Actualizar estado si cambió
-                if nuevo_estado != estado_actual:
-                    update_remision_estado(numero_remision, nuevo_estado)
-                    updated_estado_count += 1
-                    print(f"  ✓ Remisión #{numero_remision}: Estado {estado_actual} → {nuevo_estado}")
-                
-                # Actualizar valor si cambió (con tolerancia de 0.01 para evitar problemas de precisión)
-                if abs(nuevo_valor - valor_actual_float) > 0.01:
-                    update_remision_valor(numero_remision, nuevo_valor)
-                    updated_valor_count += 1
-                    print(f"  ✓ Remisión #{numero_remision}: Valor ${valor_actual_float:,.2f} → ${nuevo_valor:,.2f}")
+    """
+    Sincroniza estado y valor de las remisiones abiertas.
     
-    print(f"\n✓ Estados actualizados: {updated_estado_count}")
-    print(f"✓ Valores actualizados: {updated_valor_count}")
+    En lugar de consultar cada remisión abierta de la BD por separado, descarga
+    el listado paginado de remisiones abiertas (status=open) y reconcilia en
+    bloque: ~1 solicitud por cada 30 remisiones abiertas.
+    """
+    return full_sync_remisiones_abiertas()
 
 
 def sync_invoices_status():
-    """Sincroniza el estado y valor de facturas que están 'open' en la BD"""
-    headers = get_credentials()
-    
-    print("=" * 50)
-    print("SINCRONIZANDO ESTADOS Y VALORES DE FACTURAS")
-    print("=" * 50)
-    
-    # Obtener facturas abiertas de la BD con sus valores
-    facturas_open = get_all_facturas_open_with_value()
-    total = len(facturas_open)
-    print(f"Facturas abiertas en BD: {total}")
-    
-    if total == 0:
-        print("No hay facturas abiertas para verificar")
-        return
-    
-    updated_estado_count = 0
-    updated_valor_count = 0
-    
-    for numero_factura, estado_actual, valor_actual in facturas_open:
-        # Consultar estado actual en la API por fullNumber
-        response = requests.get(
-            f"{BASE_URL}/invoices",
-            headers=headers,
-            params={"numberTemplate.fullNumber": numero_factura},
-            timeout=15
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data and len(data) > 0:
-                invoice = data[0]
-                nuevo_estado = invoice.get("status", "unknown")
-                
-                # Obtener valor de la API
-                nuevo_valor = float(invoice.get("total", 0))
-                valor_actual_float = float(valor_actual) if valor_actual else 0
-                
-                # Actualizar estado si cambió
-                if nuevo_estado != estado_actual:
-                    update_factura_estado(numero_factura, nuevo_estado)
-                    updated_estado_count += 1
-                    print(f"  ✓ Factura {numero_factura}: Estado {estado_actual} → {nuevo_estado}")
-                
-                # Actualizar valor si cambió (con tolerancia de 0.01 para evitar problemas de precisión)
-                if abs(nuevo_valor - valor_actual_float) > 0.01:
-                    update_factura_valor(numero_factura, nuevo_valor)
-                    updated_valor_count += 1
-                    print(f"  ✓ Factura {numero_factura}: Valor ${valor_actual_float:,.2f} → ${nuevo_valor:,.2f}")
+    """
+    Sincroniza estado, valor y balance de las facturas abiertas.
     
-    print(f"\n✓ Estados actualizados: {updated_estado_count}")
-    print(f"✓ Valores actualizados: {updated_valor_count}")
+    Descarga el listado paginado de facturas abiertas (status=open) y
+    reconcilia en bloque, en lugar de una solicitud por factura.
+    """
+    return full_sync_facturas_abiertas()
 
 
 def sync_all():
     """Sincroniza todo: nuevas remisiones, nuevas facturas y estados"""
-    print("\n" + "=" * 50)
-    print("SINCRONIZACIÓN COMPLETA")
-    print("=" * 50 + "\n")
+    logger.info("Sincronización completa: remisiones y facturas nuevas y sus estados")
     
     # Sincronizar nuevas remisiones
     sync_remissions()
@@ -602,9 +473,7 @@ def sync_all():
     # Sincronizar estados de facturas
     sync_invoices_status()
     
-    print("\n" + "=" * 50)
-    print("SINCRONIZACIÓN COMPLETA FINALIZADA")
-    print("=" * 50)
+    logger.info("Sincronización completa finalizada")
 
 
 def full_sync_remisiones_abiertas():
@@ -612,109 +481,76 @@ def full_sync_remisiones_abiertas():
     Sincronización COMPLETA de remisiones abiertas desde Alegra.
     
     Este método:
-    1. Descarga TODAS las remisiones abiertas desde Alegra (usando status=open)
-    2. Resetea todas las remisiones en la BD a 'closed'
-    3. Actualiza/inserta las que están abiertas en Alegra con sus valores correctos
+    1. Descarga TODAS las remisiones abiertas desde Alegra (usando status=open) y, a medida
+       que llega cada página, envía sus filas por lotes a una tabla temporal
+    2. En una sola transacción actualiza/inserta las que están abiertas en Alegra con sus valores correctos
+       y marca 'closed' solo las que dejaron de estar abiertas
     
+    Los documentos no se acumulan en memoria: solo se conserva el lote en curso.
     Es la fuente de verdad definitiva: lo que está en Alegra es lo que cuenta.
     """
-    headers = get_credentials()
-    
-    print("=" * 50)
-    print("SINCRONIZACIÓN COMPLETA DE REMISIONES ABIERTAS")
-    print("=" * 50)
-    
-    # Paso 1: Descargar TODAS las remisiones abiertas de Alegra
-    print("\n[1/3] Descargando remisiones abiertas de Alegra...")
-    
-    all_open_remissions = []
-    start = 0
-    limit = 30
-    
-    while True:
-        params = {
-            "status": "open",
-            "start": start,
-            "limit": limit
-        }
-        
-        response = requests.get(
-            f"{BASE_URL}/remissions",
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-        
-        if response.status_code != 200:
-            print(f"  ✗ Error: {response.status_code} - {response.text}")
-            return
-        
-        remissions = response.json()
-        
-        if not remissions:
-            break
-        
-        # Filtrar solo las que tienen missingQuantityToBilled > 0
-        for rem in remissions:
-            items = rem.get("items", [])
-            has_pending = any(float(item.get("missingQuantityToBilled", 0)) > 0 for item in items)
-            if has_pending:
-                all_open_remissions.append(rem)
-        
-        print(f"    Página {start//limit + 1}: {len(remissions)} descargadas, {len(all_open_remissions)} abiertas reales")
-        
-        start += limit
-        
-        # Pequeña pausa para no saturar la API
-        time.sleep(0.2)
+    logger.info("Sincronización completa de remisiones abiertas")
     
-    print(f"  ✓ Total remisiones abiertas en Alegra: {len(all_open_remissions)}")
+    # Paso 1: Descargar TODAS las remisiones abiertas de Alegra y cargarlas por lotes
+    logger.info("[1/2] Descargando remisiones abiertas de Alegra")
     
-    # Paso 2: Resetear todas las remisiones en BD a 'closed'
-    print("\n[2/3] Reseteando remisiones en BD a 'closed'...")
-    reset_count = reset_all_remisiones_to_closed()
-    print(f"  ✓ {reset_count} remisiones marcadas como 'closed'")
-    
-    # Paso 3: Actualizar/insertar las abiertas con valores correctos
-    print("\n[3/3] Actualizando remisiones abiertas...")
-    
-    updated = 0
-    inserted = 0
+    abiertas = 0
     total_valor = 0
+    filtros = {"status": "open"}
+    total = get_total_remissions(filtros)
+    limit = ALEGRA_CONFIG["page_size"]
     
-    for rem in all_open_remissions:
-        numero = int(rem.get("number", 0))
-        fecha = rem.get("date")
-        valor = float(rem.get("total", 0))
-        
-        # Obtener datos del cliente
-        client = rem.get("client", {})
-        nit_cliente = client.get("identification")
-        nombre_cliente = client.get("name", "").strip()
-        
-        # Insertar cliente si no existe y obtener ID local
-        id_cliente = insert_cliente(nit_cliente, nombre_cliente)
+    # Conexión propia: la carga dura lo que dure la descarga y no debe retener una del pool
+    with CargaEnBloque("remisiones") as carga:
+        try:
+            # Páginas en paralelo (limitadas por ALEGRA_REQUESTS_PER_SECOND), en orden
+            for start, remissions in iter_pages("/remissions", filtros, total=total):
+                registrar_pagina(len(remissions))
+                if not remissions:
+                    break
+                
+                # Solo las que tienen missingQuantityToBilled > 0
+                for rem in remissions:
+                    items = rem.get("items", [])
+                    if not any(float(item.get("missingQuantityToBilled", 0)) > 0 for item in items):
+                        continue
+                    abiertas += 1
+                    
+                    fila = remission_to_row(rem, "open")
+                    if fila:
+                        carga.agregar(fila)
+                        total_valor += fila[3]
+                
+                logger.info("Página %s: %s descargadas, %s abiertas reales", start // limit + 1, len(remissions), abiertas)
+        except AlegraFetchError as e:
+            # Sin aplicar la carga: la tabla temporal se descarta con el rollback
+            registrar_error(f"Error: {e}")
+            return
+        except Exception as e:
+            registrar_error(f"Error guardando remisiones: {e}")
+            return
         
-        # Upsert la remisión
-        was_inserted = upsert_remision(numero, id_cliente, fecha, "open", valor, nombre_cliente)
+        logger.info("Total remisiones abiertas en Alegra: %s", abiertas)
         
-        if was_inserted:
-            inserted += 1
-        else:
-            updated += 1
+        # Paso 2: Actualizar/insertar las abiertas y cerrar las que ya no lo están.
+        # Todo ocurre en una transacción corta: los dashboards nunca ven un estado intermedio
+        logger.info("[2/2] Actualizando remisiones abiertas")
         
-        total_valor += valor
+        result, error = carga.aplicar(cerrar_faltantes=True)
     
-    print(f"\n  ✓ Actualizadas: {updated}")
-    print(f"  ✓ Insertadas: {inserted}")
-    print(f"  ✓ Total remisiones abiertas: {len(all_open_remissions)}")
-    print(f"  ✓ Valor total: ${total_valor:,.2f}")
+    if error:
+        registrar_error(f"Error guardando remisiones: {error}")
+        return
+    registrar_escritura(*result, segundos=carga.segundos)
+    inserted, updated, closed = result
     
-    print("\n" + "=" * 50)
-    print("SINCRONIZACIÓN DE REMISIONES COMPLETADA")
-    print("=" * 50)
+    logger.info(
+        "Sincronización de remisiones completada: %s actualizadas, %s insertadas, "
+        "%s cerradas (ya no están abiertas en Alegra), %s abiertas por $%s",
+        updated, inserted, closed, abiertas, format(total_valor, ",.2f")
+    )
     
-    return len(all_open_remissions), total_valor
+    return abiertas, total_valor
 
 
 def full_sync_facturas_abiertas():
@@ -722,126 +558,83 @@ def full_sync_facturas_abiertas():
     Sincronización COMPLETA de facturas abiertas desde Alegra.
     
     Este método:
-    1. Descarga TODAS las facturas abiertas desde Alegra (usando status=open)
-    2. Resetea todas las facturas en la BD a 'closed'
-    3. Actualiza/inserta las que están abiertas en Alegra con sus valores y balances correctos
+    1. Descarga TODAS las facturas abiertas desde Alegra (usando status=open) y, a medida
+       que llega cada página, envía sus filas por lotes a una tabla temporal
+    2. En una sola transacción actualiza/inserta las que están abiertas en Alegra con sus valores y balances correctos
+       y marca 'closed' solo las que dejaron de estar abiertas
     
+    Los documentos no se acumulan en memoria: solo se conserva el lote en curso.
     Es la fuente de verdad definitiva: lo que está en Alegra es lo que cuenta.
     """
-    headers = get_credentials()
+    logger.info("Sincronización completa de facturas abiertas")
     
-    print("=" * 50)
-    print("SINCRONIZACIÓN COMPLETA DE FACTURAS ABIERTAS")
-    print("=" * 50)
+    # Paso 1: Descargar TODAS las facturas abiertas de Alegra y cargarlas por lotes
+    logger.info("[1/2] Descargando facturas abiertas de Alegra")
     
-    # Paso 1: Descargar TODAS las facturas abiertas de Alegra
-    print("\n[1/3] Descargando facturas abiertas de Alegra...")
-    
-    all_open_invoices = []
-    start = 0
-    limit = 30
-    
-    while True:
-        params = {
-            "status": "open",
-            "start": start,
-            "limit": limit
-        }
-        
-        response = requests.get(
-            f"{BASE_URL}/invoices",
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-        
-        if response.status_code != 200:
-            print(f"  ✗ Error: {response.status_code} - {response.text}")
-            return
-        
-        invoices = response.json()
-        
-        if not invoices:
-            break
-        
-        # Filtrar facturas con balance > 0 y no Consumidor Final
-        for inv in invoices:
-            client = inv.get("client", {})
-            nit = client.get("identification")
-            nombre = client.get("name")
-            
-            # Omitir Consumidor Final
-            if nit == "222222222222" or nombre == "Consumidor Final":
-                continue
-            
-            balance = float(inv.get("balance", 0))
-            if balance > 0:
-                all_open_invoices.append(inv)
-        
-        print(f"    Página {start//limit + 1}: {len(invoices)} descargadas, {len(all_open_invoices)} abiertas reales")
-        
-        start += limit
-        
-        # Pequeña pausa para no saturar la API
-        time.sleep(0.2)
-    
-    print(f"  ✓ Total facturas abiertas en Alegra: {len(all_open_invoices)}")
-    
-    # Paso 2: Resetear todas las facturas en BD a 'closed'
-    print("\n[2/3] Reseteando facturas en BD a 'closed'...")
-    reset_count = reset_all_facturas_to_closed()
-    print(f"  ✓ {reset_count} facturas marcadas como 'closed'")
-    
-    # Paso 3: Actualizar/insertar las abiertas con valores correctos
-    print("\n[3/3] Actualizando facturas abiertas...")
-    
-    updated = 0
-    inserted = 0
+    abiertas = 0
     total_valor = 0
     total_balance = 0
+    filtros = {"status": "open"}
+    total = get_total_invoices(filtros)
+    limit = ALEGRA_CONFIG["page_size"]
     
-    for inv in all_open_invoices:
-        # Obtener número de factura
-        number_template = inv.get("numberTemplate", {})
-        numero = number_template.get("fullNumber", "")
-        
-        if not numero:
-            continue
-        
-        fecha = inv.get("date")
-        valor = float(inv.get("total", 0))
-        balance = float(inv.get("balance", 0))
-        
-        # Obtener datos del cliente
-        client = inv.get("client", {})
-        nit_cliente = client.get("identification")
-        nombre_cliente = client.get("name", "").strip()
-        
-        # Insertar cliente si no existe y obtener ID local
-        id_cliente = insert_cliente(nit_cliente, nombre_cliente)
+    # Conexión propia: la carga dura lo que dure la descarga y no debe retener una del pool
+    with CargaEnBloque("facturas") as carga:
+        try:
+            # Páginas en paralelo (limitadas por ALEGRA_REQUESTS_PER_SECOND), en orden
+            for start, invoices in iter_pages("/invoices", filtros, total=total):
+                registrar_pagina(len(invoices))
+                if not invoices:
+                    break
+                
+                # Solo facturas con balance > 0 y que no sean de Consumidor Final
+                for inv in invoices:
+                    client = inv.get("client", {})
+                    nit = client.get("identification")
+                    nombre = client.get("name")
+                    
+                    if nit == "222222222222" or nombre == "Consumidor Final":
+                        continue
+                    if float(inv.get("balance", 0)) <= 0:
+                        continue
+                    abiertas += 1
+                    
+                    fila = invoice_to_row(inv, "open")
+                    if fila:
+                        carga.agregar(fila)
+                        total_valor += fila[3]
+                        total_balance += fila[4]
+                
+                logger.info("Página %s: %s descargadas, %s abiertas reales", start // limit + 1, len(invoices), abiertas)
+        except AlegraFetchError as e:
+            # Sin aplicar la carga: la tabla temporal se descarta con el rollback
+            registrar_error(f"Error: {e}")
+            return
+        except Exception as e:
+            registrar_error(f"Error guardando facturas: {e}")
+            return
         
-        # Upsert la factura
-        was_inserted = upsert_factura(numero, id_cliente, fecha, "open", valor, balance, nombre_cliente)
+        logger.info("Total facturas abiertas en Alegra: %s", abiertas)
         
-        if was_inserted:
-            inserted += 1
-        else:
-            updated += 1
+        # Paso 2: Actualizar/insertar las abiertas y cerrar las que ya no lo están.
+        # Todo ocurre en una transacción corta: los dashboards nunca ven un estado intermedio
+        logger.info("[2/2] Actualizando facturas abiertas")
         
-        total_valor += valor
-        total_balance += balance
+        result, error = carga.aplicar(cerrar_faltantes=True)
     
-    print(f"\n  ✓ Actualizadas: {updated}")
-    print(f"  ✓ Insertadas: {inserted}")
-    print(f"  ✓ Total facturas abiertas: {len(all_open_invoices)}")
-    print(f"  ✓ Valor total facturado: ${total_valor:,.2f}")
-    print(f"  ✓ Balance total (por cobrar): ${total_balance:,.2f}")
+    if error:
+        registrar_error(f"Error guardando facturas: {error}")
+        return
+    registrar_escritura(*result, segundos=carga.segundos)
+    inserted, updated, closed = result
     
-    print("\n" + "=" * 50)
-    print("SINCRONIZACIÓN DE FACTURAS COMPLETADA")
-    print("=" * 50)
+    logger.info(
+        "Sincronización de facturas completada: %s actualizadas, %s insertadas, "
+        "%s cerradas (ya no están abiertas en Alegra), %s abiertas por $%s, por cobrar $%s",
+        updated, inserted, closed, abiertas, format(total_valor, ",.2f"), format(total_balance, ",.2f")
+    )
     
-    return len(all_open_invoices), total_balance
+    return abiertas, total_balance
 
 
 def full_sync_all():
@@ -855,37 +648,36 @@ def full_sync_all():
     - Todas las remisiones abiertas (con sus valores)
     - Todas las facturas abiertas (con sus valores y balances)
     """
-    print("\n" + "=" * 60)
-    print("   SINCRONIZACIÓN COMPLETA DESDE ALEGRA")
-    print("=" * 60 + "\n")
+    logger.info("Sincronización completa desde Alegra")
     
     # Sincronizar remisiones
     result_rem = full_sync_remisiones_abiertas()
     
-    print("\n")
-    
     # Sincronizar facturas
     result_fac = full_sync_facturas_abiertas()
     
-    print("\n" + "=" * 60)
-    print("   RESUMEN FINAL")
-    print("=" * 60)
-    
     if result_rem:
         num_rem, valor_rem = result_rem
-        print(f"   Remisiones abiertas: {num_rem:,}")
-        print(f"   Valor remisiones: ${valor_rem:,.2f}")
+        logger.info("Resumen: %s remisiones abiertas por $%s", format(num_rem, ","), format(valor_rem, ",.2f"))
     
     if result_fac:
         num_fac, balance_fac = result_fac
-        print(f"   Facturas abiertas: {num_fac:,}")
-        print(f"   Por cobrar (balance): ${balance_fac:,.2f}")
-    
-    print("=" * 60 + "\n")
+        logger.info("Resumen: %s facturas abiertas, por cobrar $%s", format(num_fac, ","), format(balance_fac, ",.2f"))
+    
+    # Latencia de las solicitudes a Alegra (sesión persistente)
+    stats = get_client().stats()
+    if stats["solicitudes"]:
+        logger.info(
+            "Solicitudes a Alegra: %s (conexiones abiertas: %s), latencia p50/p95: %.0f / %.0f ms",
+            format(stats["solicitudes"], ","), stats["conexiones_abiertas"],
+            stats["latencia_p50"] * 1000, stats["latencia_p95"] * 1000
+        )
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     # initial_load()
     # initial_load_invoices()
     # sync_all()  # Sincronización incremental
-    full_sync_all()  # Sincronización COMPLETA desde Alegra
\ No newline at end of file
+    with registrar_sync("full"):
+        full_sync_all()  # Sincronización COMPLETA desde Alegra
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Cliente HTTP para la API de Alegra.
+
+Mantiene una única ``requests.Session`` por proceso con conexiones
+persistentes (keep-alive), compresión gzip y un pool de conexiones por host
+dimensionado para los hilos de descarga. El header de autenticación se arma
+una sola vez. Todas las solicitudes pasan por el limitador compartido y se
+registra la latencia de cada una.
+"""
+import os
+import sys
+import time
+import base64
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import ALEGRA_CONFIG
+from services.rate_limiter import get_limiter, parse_retry_after
+from services import sync_metrics
+
+
+class AlegraClient:
+    """Sesión HTTP persistente contra Alegra con reintentos y métricas de latencia"""
+
+    def __init__(self, email=None, api_key=None, base_url=None, timeout=None,
+                 max_retries=None, pool_maxsize=None, limiter=None, adapter=None):
+        self.base_url = (base_url or ALEGRA_CONFIG["base_url"]).rstrip("/")
+        self.timeout = timeout or ALEGRA_CONFIG["timeout"]
+        self.max_retries = ALEGRA_CONFIG["max_retries"] if max_retries is None else max_retries
+        self.limiter = limiter or get_limiter()
+
+        email = email or os.getenv("ALEGRA_EMAIL")
+        api_key = api_key or os.getenv("ALEGRA_API_KEY")
+        credenciales = base64.b64encode(f"{email}:{api_key}".encode()).decode()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "accept": "application/json",
+            "authorization": f"Basic {credenciales}",
+            "accept-encoding": "gzip, deflate",
+            "connection": "keep-alive",
+        })
+        # Los reintentos los maneja get() para pasar siempre por el limitador
+        self.adapter = adapter or HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize or ALEGRA_CONFIG["max_workers"],
+            max_retries=0
+        )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self._lock = threading.Lock()
+        self._latencias = deque(maxlen=1000)
+        self._metricas = {
+            "solicitudes": 0,
+            "errores": 0,
+            "reintentos": 0,
+            "tiempo_total": 0.0,
+        }
+
+    def _url(self, endpoint):
+        """Acepta rutas relativas ("/remissions") o URLs completas"""
+        if endpoint.startswith("http"):
+            return endpoint
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def _registrar(self, inicio, error=False):
+        """Acumula la latencia de una solicitud"""
+        latencia = time.perf_counter() - inicio
+        with self._lock:
+            self._latencias.append(latencia)
+            self._metricas["solicitudes"] += 1
+            self._metricas["tiempo_total"] += latencia
+            if error:
+                self._metricas["errores"] += 1
+        sync_metrics.registrar_solicitud(latencia, error)
+
+    def get(self, endpoint, params=None, timeout=None):
+        """
+        GET a la API de Alegra.
+
+        Reintenta errores de red y respuestas 429/5xx con espera exponencial (o
+        el tiempo indicado en Retry-After). Retorna la última respuesta
+        recibida; si todos los intentos fallaron por red, relanza la última
+        excepción.
+        """
+        url = self._url(endpoint)
+        timeout = timeout or self.timeout
+
+        for intento in range(self.max_retries + 1):
+            if intento:
+                with self._lock:
+                    self._metricas["reintentos"] += 1
+            self.limiter.acquire()
+            inicio = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except requests.RequestException:
+                self._registrar(inicio, error=True)
+                self.limiter.on_throttle()
+                if intento == self.max_retries:
+                    raise
+                time.sleep(0.5 * 2 ** intento)
+                continue
+
+            limitada = response.status_code == 429 or response.status_code >= 500
+            self._registrar(inicio, error=limitada)
+            if not limitada:
+                self.limiter.on_success()
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self.limiter.on_throttle(retry_after)
+            if intento < self.max_retries and not retry_after:
+                time.sleep(0.5 * 2 ** intento)
+
+        return response
+
+    def conexiones_abiertas(self):
+        """Conexiones TCP/TLS abiertas por la sesión desde su creación"""
+        pools = self.adapter.poolmanager.pools
+        return sum(pools[clave].num_connections for clave in pools.keys())
+
+    def stats(self):
+        """Latencia por solicitud (promedio, p50, p95, máx) y contadores"""
+        with self._lock:
+            datos = dict(self._metricas)
+            latencias = sorted(self._latencias)
+
+        if latencias:
+            datos.update({
+                "latencia_promedio": sum(latencias) / len(latencias),
+                "latencia_p50": latencias[len(latencias) // 2],
+                "latencia_p95": latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))],
+                "latencia_max": latencias[-1],
+            })
+        try:
+            datos["conexiones_abiertas"] = self.conexiones_abiertas()
+        except AttributeError:
+            # Adaptadores sin poolmanager (p. ej. simulados)
+            datos["conexiones_abiertas"] = None
+        return datos
+
+    def close(self):
+        """Cierra la sesión y sus conexiones"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Retorna el cliente de Alegra del proceso (se crea en el primer uso)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = AlegraClient()
+    return _client
+
+
+def set_client(client):
+    """Reemplaza el cliente del proceso (p. ej. por uno con un adaptador simulado)"""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def get_client_stats():
+    """Métricas de latencia del cliente de Alegra del proceso"""
+    return get_client().stats()
@@ -0,0 +1,105 @@
+"""
+Descarga concurrente de páginas de la API de Alegra.
+
+Cuando se conoce el total de documentos (metadata de Alegra), las páginas se
+piden en paralelo con un pool de hilos y se entregan EN ORDEN de offset.
+Todas las solicitudes pasan por el cliente compartido de
+services/alegra_client.py (sesión persistente, limitador y reintentos).
+"""
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import ALEGRA_CONFIG
+from services.alegra_client import get_client
+
+
+class AlegraFetchError(Exception):
+    """Una página no pudo descargarse después de todos los reintentos"""
+
+
+def fetch_page(endpoint, params, timeout=None, client=None):
+    """Descarga una página y retorna el JSON; lanza AlegraFetchError si no fue posible"""
+    client = client or get_client()
+    try:
+        response = client.get(endpoint, params=params, timeout=timeout)
+    except requests.RequestException as e:
+        raise AlegraFetchError(f"Error descargando {endpoint} {params}: {e}") from e
+
+    if response.status_code != 200:
+        raise AlegraFetchError(
+            f"Error descargando {endpoint} {params}: {response.status_code} - {response.text[:200]}"
+        )
+    return response.json()
+
+
+def iter_pages(endpoint, params=None, total=None, start=0, limit=None,
+               max_workers=None, client=None):
+    """
+    Genera ``(offset, documentos)`` para cada página, en orden de offset.
+
+    Args:
+        endpoint: Ruta del recurso (p. ej. "/remissions")
+        params: Filtros adicionales (status, order_field, ...)
+        total: Total de documentos reportado por la metadata. Con él se piden
+            en paralelo todas las páginas conocidas; si es None o 0 se avanza
+            de a una ventana de ``max_workers`` páginas.
+        start: Offset inicial
+        limit: Tamaño de página (Alegra permite máximo 30)
+
+    La descarga termina con la primera página que trae menos de ``limit``
+    documentos. Si el total creció durante la descarga se siguen pidiendo
+    páginas hasta encontrar una incompleta.
+    """
+    params = dict(params or {})
+    limit = limit or ALEGRA_CONFIG["page_size"]
+    max_workers = max_workers or ALEGRA_CONFIG["max_workers"]
+    client = client or get_client()
+
+    # Offset hasta el que se sabe que hay documentos
+    limite_conocido = start + total if total else start
+
+    def descargar(offset):
+        return fetch_page(endpoint, {**params, "start": offset, "limit": limit}, client=client)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pendientes = deque()
+        siguiente = start
+
+        def programar():
+            nonlocal siguiente
+            # Ventana acotada: nunca más de 2x hilos en vuelo
+            while len(pendientes) < max_workers * 2 and siguiente < max(limite_conocido, start + limit):
+                pendientes.append((siguiente, executor.submit(descargar, siguiente)))
+                siguiente += limit
+
+        programar()
+        try:
+            while pendientes:
+                offset, futuro = pendientes.popleft()
+                documentos = futuro.result()
+                yield offset, documentos
+
+                if len(documentos) < limit:
+                    break
+
+                # Página llena al final de lo conocido: puede haber más
+                if siguiente >= limite_conocido and not pendientes:
+                    limite_conocido = siguiente + limit * max_workers
+                programar()
+        finally:
+            for _, futuro in pendientes:
+                futuro.cancel()
+
+
+def fetch_all(endpoint, params=None, total=None, start=0, **kwargs):
+    """Descarga todas las páginas y retorna la lista de documentos en orden"""
+    documentos = []
+    for _, pagina in iter_pages(endpoint, params, total=total, start=start, **kwargs):
+        documentos.extend(pagina)
+    return documentos
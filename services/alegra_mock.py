@@ -0,0 +1,213 @@
+"""
+Simulador local de la API de Alegra para pruebas de rendimiento.
+
+Es un adaptador de transporte de ``requests`` que responde /remissions e
+/invoices a partir de un conjunto de datos generado, sin salir a la red:
+paginación con start/limit, metadata con el total, filtros por status,
+number y numberTemplate.fullNumber, orden por id, latencia simulada y
+respuestas 429 con Retry-After.
+
+Uso:
+    from services.alegra_mock import AlegraDataset, instalar_mock
+    dataset = AlegraDataset(remisiones=5000, facturas=8000)
+    adapter = instalar_mock(dataset, latencia_ms=120, prob_429=0.02)
+    full_sync_all()  # usa el simulador en lugar de api.alegra.com
+"""
+import os
+import sys
+import json
+import time
+import random
+import threading
+from datetime import date, timedelta
+from urllib.parse import urlparse, parse_qs
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.alegra_client import AlegraClient, set_client
+
+CONSUMIDOR_FINAL = {"id": "0", "identification": "222222222222", "name": "Consumidor Final"}
+
+
+class AlegraDataset:
+    """Remisiones y facturas generadas con una semilla fija"""
+
+    def __init__(self, remisiones=1000, facturas=1000, clientes=200, fraccion_abiertas=0.3,
+                 items_por_documento=5, seed=42):
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.items_por_documento = items_por_documento
+        self.fraccion_abiertas = fraccion_abiertas
+        self.clientes = [
+            {
+                "id": str(i),
+                "identification": str(900000000 + i),
+                "name": f"Cliente {i}" if i % 10 else f"KIKES {i}",
+            }
+            for i in range(1, clientes + 1)
+        ]
+        self.remisiones = []
+        self.facturas = []
+        self.agregar(remisiones, facturas)
+
+    def _cliente(self):
+        return self._random.choice(self.clientes)
+
+    def _fecha(self):
+        return (date(2024, 1, 1) + timedelta(days=self._random.randrange(700))).isoformat()
+
+    def _items(self, pendiente):
+        return [
+            {
+                "id": str(j),
+                "price": self._random.randint(1000, 50000),
+                "quantity": self._random.randint(1, 10),
+                "missingQuantityToBilled": (self._random.randint(1, 3) if pendiente and j == 0 else 0),
+            }
+            for j in range(self.items_por_documento)
+        ]
+
+    def _nueva_remision(self, numero):
+        abierta = self._random.random() < self.fraccion_abiertas
+        return {
+            "id": str(numero),
+            "number": str(numero),
+            "date": self._fecha(),
+            "status": "open" if abierta else self._random.choice(["closed", "closed", "void"]),
+            "total": self._random.randint(10000, 2000000),
+            "client": self._cliente(),
+            "items": self._items(abierta),
+        }
+
+    def _nueva_factura(self, numero):
+        abierta = self._random.random() < self.fraccion_abiertas
+        total = self._random.randint(10000, 2000000)
+        cliente = CONSUMIDOR_FINAL if self._random.random() < 0.1 else self._cliente()
+        return {
+            "id": str(numero),
+            "numberTemplate": {"prefix": "FE", "number": str(numero), "fullNumber": f"FE{numero}"},
+            "date": self._fecha(),
+            "status": "open" if abierta else "closed",
+            "total": total,
+            "balance": self._random.randint(1000, total) if abierta else 0,
+            "client": cliente,
+            "items": self._items(False),
+        }
+
+    def agregar(self, remisiones=0, facturas=0):
+        """Crea documentos nuevos (ids consecutivos)"""
+        with self._lock:
+            inicio = len(self.remisiones) + 1
+            self.remisiones.extend(self._nueva_remision(n) for n in range(inicio, inicio + remisiones))
+            inicio = len(self.facturas) + 1
+            self.facturas.extend(self._nueva_factura(n) for n in range(inicio, inicio + facturas))
+
+    def cerrar(self, fraccion=0.1):
+        """Cierra (factura / paga) una fracción de los documentos abiertos"""
+        with self._lock:
+            for rem in self.remisiones:
+                if rem["status"] == "open" and self._random.random() < fraccion:
+                    rem["status"] = "closed"
+                    for item in rem["items"]:
+                        item["missingQuantityToBilled"] = 0
+            for inv in self.facturas:
+                if inv["status"] == "open" and self._random.random() < fraccion:
+                    inv["status"] = "closed"
+                    inv["balance"] = 0
+
+    def consultar(self, recurso, params):
+        """Aplica filtros, orden y paginación como la API. Retorna (documentos, total)"""
+        with self._lock:
+            documentos = self.remisiones if recurso == "remissions" else self.facturas
+
+            if "status" in params:
+                documentos = [d for d in documentos if d["status"] == params["status"]]
+            if "number" in params:
+                documentos = [d for d in documentos if d.get("number") == params["number"]]
+            if "numberTemplate.fullNumber" in params:
+                documentos = [
+                    d for d in documentos
+                    if d["numberTemplate"]["fullNumber"] == params["numberTemplate.fullNumber"]
+                ]
+
+            if params.get("order_direction", "ASC").upper() == "DESC":
+                documentos = documentos[::-1]
+
+            total = len(documentos)
+            start = int(params.get("start", 0))
+            limit = min(int(params.get("limit", 30)), 30)
+            return documentos[start:start + limit], total
+
+
+class AlegraMockAdapter(BaseAdapter):
+    """Adaptador de transporte que responde con un AlegraDataset"""
+
+    def __init__(self, dataset, latencia_ms=0, jitter_ms=0, prob_429=0.0, retry_after=1, seed=7):
+        super().__init__()
+        self.dataset = dataset
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.prob_429 = prob_429
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.solicitudes = 0
+        self.respuestas_429 = 0
+
+    def _responder(self, request, status, cuerpo, headers=None):
+        response = Response()
+        response.status_code = status
+        response.request = request
+        response.url = request.url
+        response.encoding = "utf-8"
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json", **(headers or {})})
+        response._content = json.dumps(cuerpo).encode()
+        return response
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.solicitudes += 1
+            limitada = self._random.random() < self.prob_429
+            if limitada:
+                self.respuestas_429 += 1
+            espera = max(0.0, self.latencia_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+
+        if espera:
+            time.sleep(espera / 1000)
+
+        if limitada:
+            return self._responder(
+                request, 429, {"message": "Too many requests"},
+                {"Retry-After": str(self.retry_after)}
+            )
+
+        url = urlparse(request.url)
+        recurso = url.path.rstrip("/").rsplit("/", 1)[-1]
+        if recurso not in ("remissions", "invoices"):
+            return self._responder(request, 404, {"message": "Not found"})
+
+        params = {clave: valores[0] for clave, valores in parse_qs(url.query).items()}
+        documentos, total = self.dataset.consultar(recurso, params)
+
+        if params.get("metadata") == "true":
+            return self._responder(request, 200, {"metadata": {"total": total}, "data": documentos})
+        return self._responder(request, 200, documentos)
+
+    def close(self):
+        pass
+
+
+def instalar_mock(dataset, limiter=None, **kwargs):
+    """
+    Reemplaza el cliente de Alegra del proceso por uno que usa el simulador.
+
+    ``limiter`` permite usar un limitador distinto al compartido (p. ej. para
+    medir con otra tasa de solicitudes). Retorna el adaptador.
+    """
+    adapter = AlegraMockAdapter(dataset, **kwargs)
+    set_client(AlegraClient(email="mock", api_key="mock", adapter=adapter, limiter=limiter))
+    return adapter
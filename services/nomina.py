@@ -0,0 +1,131 @@
+"""
+Liquidación de nómina por periodo.
+
+Calcula el pago de cada empleado a partir de los turnos completados del
+periodo. Las horas de cada turno salen del motor de reglas
+(services/reglas_horas.py: topes diario y semanal, franja nocturna y
+festivos); el pago se calcula en una sola pasada vectorizada:
+
+- Horas ordinarias al valor hora (salario_dia / horas_jornada).
+- Horas extra diurnas o nocturnas con su recargo.
+- Recargo nocturno: horas ordinarias dentro de la franja nocturna.
+- Recargo dominical: horas trabajadas en domingo o festivo.
+
+Jornada, topes, franja y recargos salen de NOMINA_CONFIG. El resultado se
+guarda en nomina_periodo; un periodo cerrado se lee de ahí y no se vuelve a
+calcular.
+
+Uso:
+    detalle, error = liquidar_periodo(date(2026, 10, 1), date(2026, 10, 15))
+    cantidad, error = cerrar_periodo(date(2026, 10, 1), date(2026, 10, 15))
+"""
+import os
+import sys
+import logging
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import NOMINA_CONFIG
+from data_base.controler import (
+    get_nomina_periodo,
+    guardar_nomina_periodo,
+    cerrar_nomina_periodo,
+    COLUMNAS_NOMINA_PERIODO
+)
+from services.reglas_horas import evaluar_periodo
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS_HORAS = [
+    "horas_ordinarias", "horas_nocturnas", "horas_dominicales",
+    "horas_extra_diurnas", "horas_extra_nocturnas"
+]
+COLUMNAS_PAGO = ["pago_ordinario", "recargo_nocturno", "recargo_dominical", "pago_extra", "total_pagar"]
+
+
+def liquidar_turnos(turnos, config=NOMINA_CONFIG):
+    """
+    Valores de cada turno ya evaluado con reglas_horas.evaluar_reglas.
+
+    Retorna una copia de turnos con COLUMNAS_PAGO agregadas.
+    """
+    valor_hora = turnos["salario_dia"].to_numpy(dtype=float) / config["horas_jornada"]
+
+    resultado = turnos.copy()
+    resultado["pago_ordinario"] = resultado["horas_ordinarias"] * valor_hora
+    resultado["recargo_nocturno"] = resultado["horas_nocturnas"] * valor_hora * config["recargo_nocturno"]
+    resultado["recargo_dominical"] = resultado["horas_dominicales"] * valor_hora * config["recargo_dominical"]
+    resultado["pago_extra"] = valor_hora * (
+        resultado["horas_extra_diurnas"] * (1 + config["recargo_extra_diurna"])
+        + resultado["horas_extra_nocturnas"] * (1 + config["recargo_extra_nocturna"])
+    )
+    resultado["total_pagar"] = resultado[COLUMNAS_PAGO[:-1]].sum(axis=1)
+    return resultado
+
+
+def liquidar_empleados(turnos, config=NOMINA_CONFIG):
+    """Liquidación por empleado de los turnos evaluados: suma de liquidar_turnos agrupada por id_empleado"""
+    if turnos.empty:
+        return pd.DataFrame(columns=["nombre_empleado", "cedula_empleado", *COLUMNAS_NOMINA_PERIODO])
+
+    detalle = liquidar_turnos(turnos, config)
+    resumen = detalle.groupby("id_empleado", as_index=False).agg(
+        nombre_empleado=("nombre_empleado", "first"),
+        cedula_empleado=("cedula_empleado", "first"),
+        salario_dia=("salario_dia", "first"),
+        turnos=("id_turno", "count"),
+        **{c: (c, "sum") for c in COLUMNAS_HORAS + COLUMNAS_PAGO}
+    )
+    resumen[COLUMNAS_HORAS + COLUMNAS_PAGO] = resumen[COLUMNAS_HORAS + COLUMNAS_PAGO].round(2)
+    return resumen[["nombre_empleado", "cedula_empleado", *COLUMNAS_NOMINA_PERIODO]]
+
+
+def get_liquidacion_guardada(fecha_inicio, fecha_fin):
+    """Liquidación guardada del periodo como DataFrame (vacío si no se ha liquidado)"""
+    df = pd.DataFrame(get_nomina_periodo(fecha_inicio, fecha_fin))
+    if not df.empty:
+        df[COLUMNAS_HORAS + COLUMNAS_PAGO] = df[COLUMNAS_HORAS + COLUMNAS_PAGO].astype(float)
+    return df
+
+
+def liquidar_periodo(fecha_inicio, fecha_fin, guardar=True):
+    """
+    Liquida un periodo y guarda el resultado en nomina_periodo.
+
+    Si el periodo ya está cerrado retorna lo guardado sin recalcular.
+
+    Returns:
+        Tupla (DataFrame por empleado con columna 'cerrado', error)
+    """
+    guardado = get_liquidacion_guardada(fecha_inicio, fecha_fin)
+    if not guardado.empty and guardado["cerrado"].all():
+        return guardado, None
+
+    liquidacion = liquidar_empleados(evaluar_periodo(fecha_inicio, fecha_fin))
+    liquidacion["cerrado"] = False
+
+    if guardar:
+        # astype(object) deja enteros y floats de Python, que psycopg2 sabe adaptar
+        filas = liquidacion[list(COLUMNAS_NOMINA_PERIODO)].astype(object).itertuples(index=False, name=None)
+        cantidad, error = guardar_nomina_periodo(fecha_inicio, fecha_fin, list(filas))
+        if error:
+            logger.warning("No se pudo guardar la nómina %s - %s: %s", fecha_inicio, fecha_fin, error)
+            return liquidacion, error
+        logger.info("Nómina %s - %s: %s empleados liquidados", fecha_inicio, fecha_fin, cantidad)
+
+    return liquidacion, None
+
+
+def cerrar_periodo(fecha_inicio, fecha_fin):
+    """
+    Liquida el periodo con los turnos actuales y lo cierra.
+
+    Returns:
+        Tupla (cantidad_cerrados, error)
+    """
+    _, error = liquidar_periodo(fecha_inicio, fecha_fin)
+    if error:
+        return 0, error
+    return cerrar_nomina_periodo(fecha_inicio, fecha_fin)
@@ -0,0 +1,134 @@
+"""
+Limitador de solicitudes a la API de Alegra.
+
+Token bucket compartido por todos los hilos del proceso:
+- Se permiten hasta ``requests_per_second`` solicitudes por segundo, con
+  ráfagas de hasta ``burst`` solicitudes.
+- Cuando Alegra responde 429 o 5xx la tasa se reduce a la mitad (sin bajar de
+  ``min_requests_per_second``) y se recupera poco a poco con cada respuesta
+  exitosa (aumento aditivo / reducción multiplicativa).
+- Si la respuesta trae ``Retry-After`` todas las solicitudes se pausan hasta
+  que venza ese plazo.
+"""
+import os
+import sys
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import ALEGRA_CONFIG
+
+
+class RateLimiter:
+    """Token bucket thread-safe con tasa adaptativa"""
+
+    def __init__(self, requests_per_second, burst=1, min_requests_per_second=0.5,
+                 recovery_step=0.1):
+        self.max_rate = float(requests_per_second or 0)
+        self.min_rate = min(float(min_requests_per_second), self.max_rate) if self.max_rate else 0
+        self.rate = self.max_rate
+        self.burst = max(1, int(burst))
+        self.recovery_step = recovery_step
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._ultimo = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._metricas = {
+            "solicitudes": 0,
+            "limitadas": 0,
+            "espera_total": 0.0,
+        }
+
+    def _recargar(self, ahora):
+        """Suma los tokens generados desde la última recarga (con el lock tomado)"""
+        self._tokens = min(self.burst, self._tokens + (ahora - self._ultimo) * self.rate)
+        self._ultimo = ahora
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible y lo consume"""
+        if not self.max_rate:
+            return
+        esperado = 0.0
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                if ahora < self._pausa_hasta:
+                    espera = self._pausa_hasta - ahora
+                else:
+                    self._recargar(ahora)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self._metricas["solicitudes"] += 1
+                        self._metricas["espera_total"] += esperado
+                        return
+                    espera = (1 - self._tokens) / self.rate
+            time.sleep(espera)
+            esperado += espera
+
+    def on_success(self):
+        """Respuesta correcta: recupera gradualmente la tasa configurada"""
+        if not self.max_rate:
+            return
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._recargar(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+    def on_throttle(self, retry_after=None):
+        """Respuesta 429/5xx: reduce la tasa a la mitad y respeta Retry-After"""
+        with self._lock:
+            ahora = time.monotonic()
+            self._metricas["limitadas"] += 1
+            if self.max_rate:
+                self._recargar(ahora)
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._pausa_hasta = max(self._pausa_hasta, ahora + retry_after)
+
+    def stats(self):
+        """Tasa actual y contadores acumulados"""
+        with self._lock:
+            datos = dict(self._metricas)
+            datos.update({
+                "rate": self.rate,
+                "max_rate": self.max_rate,
+                "pausado": max(0.0, self._pausa_hasta - time.monotonic()),
+            })
+        return datos
+
+
+def parse_retry_after(valor):
+    """Convierte el header Retry-After (segundos o fecha HTTP) a segundos"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, fecha.timestamp() - time.time())
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Retorna el limitador compartido por todas las solicitudes a Alegra"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    requests_per_second=ALEGRA_CONFIG["requests_per_second"],
+                    burst=ALEGRA_CONFIG["burst"],
+                    min_requests_per_second=ALEGRA_CONFIG["min_requests_per_second"]
+                )
+    return _limiter
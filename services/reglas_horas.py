@@ -0,0 +1,208 @@
+"""
+Motor de reglas de horas de nómina.
+
+Carga los turnos completados de un periodo en una sola consulta, los pasa a
+arreglos por columna (NumPy) y evalúa todas las reglas de forma vectorizada,
+sin recorrer turno por turno:
+
+- Tope diario: las horas de un empleado en un mismo día (día de inicio del
+  turno, hora de Colombia) que pasan de ``horas_jornada`` son extra. Con
+  varios turnos en el día se acumulan en orden de entrada.
+- Tope semanal: las horas ordinarias de la semana (lunes a domingo) que
+  pasan de ``horas_semana`` también son extra. 0 desactiva la regla.
+- Franja nocturna: las horas entre ``hora_inicio_nocturna`` y
+  ``hora_fin_nocturna`` separan las ordinarias nocturnas y las extra
+  nocturnas. Las primeras horas del turno son las ordinarias; las extra son
+  el final del turno.
+- Festivos: las horas en domingo o en una fecha de ``festivos`` son
+  dominicales.
+
+Los parámetros salen de NOMINA_CONFIG. Es la única fuente de las horas
+extra: la vista de horas extra y la liquidación (services/nomina.py) usan
+este motor.
+
+Uso:
+    turnos = evaluar_periodo(date(2026, 10, 1), date(2026, 10, 15))
+    detalle = get_horas_extra(date(2026, 10, 1), date(2026, 10, 15))
+    resumen = resumir_horas_extra(detalle)
+"""
+import os
+import sys
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import NOMINA_CONFIG
+from data_base.controler import get_turnos_periodo
+
+HORA = np.timedelta64(1, "h")
+DIA = np.timedelta64(1, "D")
+
+# Columnas de get_turnos_periodo
+COLUMNAS_TURNOS = [
+    "id_turno", "id_empleado", "nombre_empleado", "cedula_empleado",
+    "salario_dia", "hora_inicio", "hora_salida"
+]
+
+# Columnas que agrega evaluar_reglas
+COLUMNAS_REGLAS = [
+    "total_horas", "horas_ordinarias", "horas_nocturnas", "horas_dominicales",
+    "horas_extra_diaria", "horas_extra_semanal", "horas_extra",
+    "horas_extra_diurnas", "horas_extra_nocturnas"
+]
+
+
+def _solape_horas(inicio, fin, desde, hasta):
+    """Horas de cada intervalo [inicio, fin) que caen dentro de [desde, hasta)"""
+    solape = (np.minimum(fin, hasta) - np.maximum(inicio, desde)) / HORA
+    return np.maximum(solape, 0.0)
+
+
+def _dia_semana(dias):
+    """Día de la semana (lunes = 0) de un arreglo datetime64[D]; el 1970-01-01 fue jueves"""
+    return (dias.astype("int64") + 3) % 7
+
+
+def _acumulado_previo(valores, nuevo_grupo):
+    """
+    Suma de los valores anteriores dentro de cada grupo.
+
+    Los valores deben venir ordenados por grupo; nuevo_grupo marca la primera
+    posición de cada uno.
+    """
+    acumulado = np.cumsum(valores) - valores
+    inicios = np.flatnonzero(nuevo_grupo)
+    tamanos = np.diff(np.append(inicios, len(valores)))
+    return acumulado - np.repeat(acumulado[inicios], tamanos)
+
+
+def _nuevo_grupo(*claves):
+    """Marca las posiciones donde cambia alguna de las claves (arreglos ya ordenados)"""
+    nuevo = np.zeros(len(claves[0]), dtype=bool)
+    if len(nuevo):
+        nuevo[0] = True
+    for clave in claves:
+        nuevo[1:] |= clave[1:] != clave[:-1]
+    return nuevo
+
+
+def horas_nocturnas(inicio, fin, config=NOMINA_CONFIG):
+    """
+    Horas de cada intervalo dentro de la franja nocturna.
+
+    La franja de un día va de hora_inicio_nocturna hasta hora_fin_nocturna del
+    día siguiente; se revisan las franjas del día anterior, del mismo día y del
+    siguiente al de inicio, lo que cubre turnos de hasta 24 horas.
+    """
+    dia = inicio.astype("datetime64[D]")
+    desde = np.timedelta64(config["hora_inicio_nocturna"], "h")
+    hasta = DIA + np.timedelta64(config["hora_fin_nocturna"], "h")
+
+    total = np.zeros(len(inicio))
+    for desplazamiento in (-1, 0, 1):
+        base = dia + desplazamiento * DIA
+        total += _solape_horas(inicio, fin, base + desde, base + hasta)
+    return total
+
+
+def horas_dominicales(inicio, fin, festivos=()):
+    """Horas de cada intervalo (de hasta 24 horas) trabajadas en domingo o festivo"""
+    dia = inicio.astype("datetime64[D]")
+    festivos = np.asarray(festivos, dtype="datetime64[D]")
+
+    total = np.zeros(len(inicio))
+    for desplazamiento in (0, 1):
+        base = dia + desplazamiento * DIA
+        descanso = (_dia_semana(base) == 6) | np.isin(base, festivos)
+        total += np.where(descanso, _solape_horas(inicio, fin, base, base + DIA), 0.0)
+    return total
+
+
+def evaluar_reglas(turnos, config=NOMINA_CONFIG):
+    """
+    Aplica las reglas a todos los turnos (DataFrame con COLUMNAS_TURNOS, horas en hora de Colombia).
+
+    Retorna una copia ordenada por empleado y hora de inicio con COLUMNAS_REGLAS agregadas.
+    """
+    id_empleado = turnos["id_empleado"].to_numpy()
+    inicio = turnos["hora_inicio"].to_numpy(dtype="datetime64[ns]")
+    orden = np.lexsort((inicio, id_empleado))
+
+    resultado = turnos.iloc[orden].reset_index(drop=True)
+    id_empleado = id_empleado[orden]
+    inicio = inicio[orden]
+    fin = resultado["hora_salida"].to_numpy(dtype="datetime64[ns]")
+
+    duracion = np.maximum((fin - inicio) / HORA, 0.0)
+    dia = inicio.astype("datetime64[D]")
+
+    # Tope diario: lo trabajado antes en el mismo día cuenta para la jornada
+    previas_dia = _acumulado_previo(duracion, _nuevo_grupo(id_empleado, dia))
+    ordinarias = np.clip(config["horas_jornada"] - previas_dia, 0.0, duracion)
+    extra_diaria = duracion - ordinarias
+
+    # Tope semanal sobre las horas que quedaron ordinarias
+    extra_semanal = np.zeros(len(duracion))
+    if config["horas_semana"] > 0:
+        lunes = dia - _dia_semana(dia) * DIA
+        previas_semana = _acumulado_previo(ordinarias, _nuevo_grupo(id_empleado, lunes))
+        extra_semanal = np.clip(previas_semana + ordinarias - config["horas_semana"], 0.0, ordinarias)
+        ordinarias = ordinarias - extra_semanal
+
+    # Las ordinarias son el comienzo del turno; el resto es extra
+    fin_ordinario = inicio + (ordinarias * 3600e9).astype("timedelta64[ns]")
+    nocturnas = horas_nocturnas(inicio, fin_ordinario, config)
+    extra_nocturnas = horas_nocturnas(inicio, fin, config) - nocturnas
+    extra = extra_diaria + extra_semanal
+
+    resultado["hora_inicio"] = inicio
+    resultado["hora_salida"] = fin
+    resultado["total_horas"] = duracion
+    resultado["horas_ordinarias"] = ordinarias
+    resultado["horas_nocturnas"] = nocturnas
+    resultado["horas_dominicales"] = horas_dominicales(inicio, fin, config["festivos"])
+    resultado["horas_extra_diaria"] = extra_diaria
+    resultado["horas_extra_semanal"] = extra_semanal
+    resultado["horas_extra"] = extra
+    resultado["horas_extra_diurnas"] = np.maximum(extra - extra_nocturnas, 0.0)
+    resultado["horas_extra_nocturnas"] = extra_nocturnas
+    return resultado
+
+
+def evaluar_periodo(fecha_inicio, fecha_fin, id_empleado=None, config=NOMINA_CONFIG):
+    """
+    Carga los turnos completados del periodo y les aplica las reglas.
+
+    Con tope semanal se cargan también los turnos desde el lunes de la semana
+    de fecha_inicio, que cuentan para el tope pero no se retornan.
+    """
+    desde = fecha_inicio
+    if config["horas_semana"] > 0:
+        desde = fecha_inicio - timedelta(days=fecha_inicio.weekday())
+
+    turnos = pd.DataFrame.from_records(get_turnos_periodo(desde, fecha_fin, id_empleado), columns=COLUMNAS_TURNOS)
+    resultado = evaluar_reglas(turnos, config)
+    return resultado[resultado["hora_inicio"] >= pd.Timestamp(fecha_inicio)].reset_index(drop=True)
+
+
+def get_horas_extra(fecha_inicio, fecha_fin, id_empleado=None, config=NOMINA_CONFIG):
+    """Turnos del periodo con horas extra, del más reciente al más antiguo"""
+    turnos = evaluar_periodo(fecha_inicio, fecha_fin, id_empleado, config)
+    extra = turnos[turnos["horas_extra"] > 0].sort_values("hora_inicio", ascending=False)
+    extra = extra.rename(columns={"hora_inicio": "hora_entrada"})
+    extra.insert(3, "fecha", extra["hora_entrada"].dt.date)
+    extra[COLUMNAS_REGLAS] = extra[COLUMNAS_REGLAS].round(2)
+    return extra.reset_index(drop=True)
+
+
+def resumir_horas_extra(detalle):
+    """Resumen por empleado del detalle de get_horas_extra, de más a menos horas extra"""
+    resumen = detalle.groupby(["id_empleado", "nombre_empleado"], as_index=False).agg(
+        total_turnos_extra=("id_turno", "count"),
+        total_horas_extra=("horas_extra", "sum"),
+        horas_extra_nocturnas=("horas_extra_nocturnas", "sum")
+    )
+    return resumen.sort_values("total_horas_extra", ascending=False).round(2).reset_index(drop=True)
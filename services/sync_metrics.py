@@ -0,0 +1,189 @@
+"""
+Métricas de las ejecuciones de sincronización con Alegra.
+
+``registrar_sync`` abre una ejecución (fila en sync_runs) y la deja activa
+para el proceso; mientras dura, el cliente HTTP reporta la latencia de cada
+solicitud y las funciones de sincronización reportan páginas, filas escritas,
+tiempo en la BD y errores. Al terminar se guardan los totales y se registra
+una advertencia si la ejecución fue anormalmente lenta.
+
+Las funciones ``registrar_*`` no hacen nada si no hay una ejecución activa.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+import statistics
+from contextlib import contextmanager
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import SYNC_WORKER_CONFIG
+from data_base.controler import insert_sync_run, finalizar_sync_run, get_duraciones_sync_runs
+
+logger = logging.getLogger(__name__)
+
+
+class SyncRun:
+    """Acumulador thread-safe de las métricas de una ejecución"""
+
+    def __init__(self, tipo, id_job=None):
+        self.tipo = tipo
+        self.id_job = id_job
+        self.id_run = None
+        self.inicio = time.perf_counter()
+        self.paginas = 0
+        self.documentos = 0
+        self.insertados = 0
+        self.actualizados = 0
+        self.cerrados = 0
+        self.errores = []
+        self.latencias = []
+        self.errores_http = 0
+        self.tiempo_bd = 0.0
+        self._lock = threading.Lock()
+
+    def registrar_solicitud(self, latencia, error=False):
+        with self._lock:
+            self.latencias.append(latencia)
+            if error:
+                self.errores_http += 1
+
+    def registrar_pagina(self, documentos):
+        with self._lock:
+            self.paginas += 1
+            self.documentos += documentos
+
+    def registrar_escritura(self, insertados=0, actualizados=0, cerrados=0, segundos=0.0):
+        with self._lock:
+            self.insertados += insertados
+            self.actualizados += actualizados
+            self.cerrados += cerrados
+            self.tiempo_bd += segundos
+
+    def registrar_error(self, mensaje):
+        with self._lock:
+            self.errores.append(mensaje)
+
+    def resumen(self):
+        """Totales de la ejecución con las columnas de sync_runs"""
+        with self._lock:
+            latencias = sorted(self.latencias)
+            duracion = time.perf_counter() - self.inicio
+
+            def percentil(p):
+                if not latencias:
+                    return None
+                return latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000
+
+            return {
+                "estado": "error" if self.errores else "completado",
+                "duracion_s": duracion,
+                "paginas": self.paginas,
+                "solicitudes": len(latencias),
+                "latencia_p50_ms": percentil(0.5),
+                "latencia_p95_ms": percentil(0.95),
+                "latencia_max_ms": latencias[-1] * 1000 if latencias else None,
+                "tiempo_api_s": sum(latencias),
+                "tiempo_bd_s": self.tiempo_bd,
+                "documentos": self.documentos,
+                "insertados": self.insertados,
+                "actualizados": self.actualizados,
+                "cerrados": self.cerrados,
+                "errores": len(self.errores) + self.errores_http,
+                "lenta": False,
+                "mensaje": "; ".join(self.errores)[:1000] or None,
+            }
+
+
+_run_actual = None
+
+
+def run_actual():
+    """Ejecución activa en el proceso, o None"""
+    return _run_actual
+
+
+def registrar_solicitud(latencia, error=False):
+    """Latencia de una solicitud HTTP a Alegra"""
+    run = _run_actual
+    if run is not None:
+        run.registrar_solicitud(latencia, error)
+
+
+def registrar_pagina(documentos):
+    """Una página descargada con ``documentos`` documentos"""
+    run = _run_actual
+    if run is not None:
+        run.registrar_pagina(documentos)
+
+
+def registrar_escritura(insertados=0, actualizados=0, cerrados=0, segundos=0.0):
+    """Resultado de una escritura en la BD y el tiempo que tomó"""
+    run = _run_actual
+    if run is not None:
+        run.registrar_escritura(insertados, actualizados, cerrados, segundos)
+
+
+def registrar_error(mensaje):
+    """Error que hace fallar la ejecución (la sincronización no terminó)"""
+    logger.error(mensaje)
+    run = _run_actual
+    if run is not None:
+        run.registrar_error(mensaje)
+
+
+def es_lenta(tipo, duracion):
+    """True si la duración supera el máximo absoluto o factor x la mediana de las anteriores"""
+    maximo = SYNC_WORKER_CONFIG["alerta_max_segundos"]
+    if maximo and duracion > maximo:
+        return True
+
+    anteriores = get_duraciones_sync_runs(tipo)
+    if len(anteriores) < 3:
+        return False
+    return duracion > SYNC_WORKER_CONFIG["alerta_factor"] * statistics.median(anteriores)
+
+
+@contextmanager
+def registrar_sync(tipo, id_job=None):
+    """
+    Registra una ejecución de sincronización en sync_runs.
+
+        with registrar_sync("full", id_job) as run:
+            full_sync_all()
+
+    Si el bloque lanza una excepción la ejecución queda en estado 'error'.
+    """
+    global _run_actual
+    run = SyncRun(tipo, id_job)
+    run.id_run = insert_sync_run(tipo, id_job)
+    _run_actual = run
+    try:
+        yield run
+    except Exception as e:
+        run.registrar_error(str(e))
+        raise
+    finally:
+        _run_actual = None
+        metricas = run.resumen()
+        try:
+            metricas["lenta"] = metricas["estado"] == "completado" and es_lenta(tipo, metricas["duracion_s"])
+            finalizar_sync_run(run.id_run, metricas)
+        except Exception:
+            logger.exception("No se pudieron guardar las métricas de la sincronización #%s", run.id_run)
+
+        logger.info(
+            "Sincronización %s #%s %s en %.1fs: %d páginas, %d documentos "
+            "(%d insertados, %d actualizados, %d cerrados), API %.1fs, BD %.1fs, p95 %s ms",
+            tipo, run.id_run, metricas["estado"], metricas["duracion_s"], metricas["paginas"],
+            metricas["documentos"], metricas["insertados"], metricas["actualizados"],
+            metricas["cerrados"], metricas["tiempo_api_s"], metricas["tiempo_bd_s"],
+            f"{metricas['latencia_p95_ms']:.0f}" if metricas["latencia_p95_ms"] is not None else "-"
+        )
+        if metricas["lenta"]:
+            logger.warning(
+                "Sincronización %s lenta: %.1fs (umbral: %.1fx la mediana de las anteriores)",
+                tipo, metricas["duracion_s"], SYNC_WORKER_CONFIG["alerta_factor"]
+            )
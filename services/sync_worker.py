@@ -0,0 +1,172 @@
+"""
+Worker de sincronización con Alegra, independiente de Streamlit.
+
+La interfaz solo encola trabajos en la tabla sync_jobs; este proceso los
+ejecuta y además lanza sincronizaciones programadas. Un advisory lock de
+PostgreSQL garantiza que nunca corran dos sincronizaciones a la vez, aunque
+haya varios workers o alguien ejecute una sincronización manual.
+
+Uso:
+    python -m services.sync_worker                  # ciclo: cola + programadas
+    python -m services.sync_worker --once full      # una sincronización y termina
+    python -m services.sync_worker --once incremental
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import SYNC_WORKER_CONFIG
+from data_base.connection import crear_conexion, _cerrar_silencioso
+from data_base.controler import (
+    encolar_sync_job,
+    tomar_sync_job,
+    finalizar_sync_job,
+    liberar_sync_jobs_huerfanos,
+    get_sync_job
+)
+from services.alegra_api import full_sync_all, sync_remissions, sync_invoices
+from services.sync_metrics import registrar_sync
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def sync_lock():
+    """
+    Intenta tomar el advisory lock de sincronización sin esperar.
+
+    Produce True si se obtuvo. Se usa una conexión propia (fuera del pool)
+    porque el lock es de sesión y debe vivir mientras dure la sincronización.
+    """
+    conn = crear_conexion()
+    conn.autocommit = True
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT pg_try_advisory_lock(%s)", (SYNC_WORKER_CONFIG["lock_key"],))
+        obtenido = cur.fetchone()[0]
+        cur.close()
+        yield obtenido
+    finally:
+        # Cerrar la sesión libera el lock
+        _cerrar_silencioso(conn)
+
+
+def run_sync(tipo):
+    """Ejecuta una sincronización: 'full' (documentos abiertos) o 'incremental' (documentos nuevos)"""
+    if tipo == "full":
+        full_sync_all()
+    elif tipo == "incremental":
+        sync_remissions()
+        sync_invoices()
+    else:
+        raise ValueError(f"Tipo de sincronización desconocido: {tipo}")
+
+
+def ejecutar_job(id_job, tipo):
+    """Ejecuta un trabajo ya marcado 'en_curso' y registra su resultado"""
+    logger.info("Trabajo #%s (%s) iniciado", id_job, tipo)
+    try:
+        with registrar_sync(tipo, id_job) as run:
+            run_sync(tipo)
+    except Exception as e:
+        finalizar_sync_job(id_job, "error", str(e))
+        logger.error("Trabajo #%s falló: %s", id_job, e)
+        return False
+
+    # Las funciones de sincronización reportan sus fallos sin lanzar excepción
+    if run.errores:
+        finalizar_sync_job(id_job, "error", "; ".join(run.errores)[:1000])
+        logger.error("Trabajo #%s terminó con errores", id_job)
+        return False
+    finalizar_sync_job(id_job, "completado")
+    logger.info("Trabajo #%s completado", id_job)
+    return True
+
+
+def procesar_cola():
+    """Toma el lock y ejecuta los trabajos pendientes. Retorna cuántos ejecutó"""
+    ejecutados = 0
+    with sync_lock() as obtenido:
+        if not obtenido:
+            # Otra sincronización está en curso; los pendientes esperan
+            return 0
+
+        # Con el lock tomado, cualquier trabajo 'en_curso' quedó huérfano
+        liberar_sync_jobs_huerfanos()
+
+        while True:
+            job = tomar_sync_job()
+            if job is None:
+                break
+            ejecutar_job(*job)
+            ejecutados += 1
+    return ejecutados
+
+
+def run_once(tipo, solicitado_por="cli"):
+    """Encola una sincronización y la ejecuta de inmediato (si nadie más está sincronizando)"""
+    id_job, error = encolar_sync_job(tipo, solicitado_por)
+    if error:
+        logger.error("No se pudo encolar: %s", error)
+        return None
+    procesar_cola()
+    return get_sync_job(id_job)
+
+
+def run_forever():
+    """Ciclo principal: atiende la cola y lanza las sincronizaciones programadas"""
+    poll_interval = SYNC_WORKER_CONFIG["poll_interval"]
+    programadas = {
+        "full": SYNC_WORKER_CONFIG["intervalo_full"],
+        "incremental": SYNC_WORKER_CONFIG["intervalo_incremental"],
+    }
+    ultima = {tipo: 0.0 for tipo in programadas}
+
+    logger.info("Iniciado (cola cada %ss, programadas: %s)", poll_interval, programadas)
+    while True:
+        ahora = time.monotonic()
+        for tipo, intervalo in programadas.items():
+            if intervalo and ahora - ultima[tipo] >= intervalo:
+                encolar_sync_job(tipo, "programada")
+                ultima[tipo] = ahora
+                # Una completa ya incluye el estado de los abiertos; no encolar ambas a la vez
+                break
+
+        try:
+            procesar_cola()
+        except Exception as e:
+            # Errores de conexión a la BD: reintentar en la siguiente vuelta
+            logger.error("Error procesando la cola: %s", e)
+
+        time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de sincronización con Alegra")
+    parser.add_argument(
+        "--once",
+        choices=["full", "incremental"],
+        help="Ejecuta una sola sincronización y termina"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.once:
+        job = run_once(args.once)
+        if job is not None and job[2] == "pendiente":
+            logger.info("Hay otra sincronización en curso; el trabajo quedó en cola")
+        sys.exit(0 if job is not None and job[2] in ("completado", "pendiente") else 1)
+
+    try:
+        run_forever()
+    except KeyboardInterrupt:
+        logger.info("Detenido")
+
+
+if __name__ == "__main__":
+    main()
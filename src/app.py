@@ -54,6 +54,7 @@ try:
     from src.modules.empleados import gestion_turnos
     from src.modules.configuracion import direcciones_ip
     from src.modules.configuracion import usuarios as gestion_usuarios
+    from src.modules.configuracion import grupos_negocio
     from src.modules import nomina as modulo_nomina
     print("DEBUG: modules OK")
 except Exception as e:
@@ -361,10 +362,12 @@ def render_sidebar_autenticado():
         
         if selected == "Cartera":
             st.markdown("---")
+            # Un tablero por cada grupo de negocios activo (Configuración > Grupos de Negocio)
+            grupos = kikes.get_grupos_cartera()
             submenu = option_menu(
                 menu_title="📊 Cartera",
-                options=["Todos los Clientes", "Kikes"],
-                icons=["people", "shop"],
+                options=["Todos los Clientes"] + [g['nombre_grupo'] for g in grupos],
+                icons=["people"] + ["shop"] * len(grupos),
                 default_index=0,
                 styles={
                     "container": {"padding": "0!important", "background-color": "transparent"},
@@ -426,8 +429,8 @@ def render_sidebar_autenticado():
             st.markdown("---")
             submenu = option_menu(
                 menu_title="⚙️ Configuración",
-                options=["Direcciones IP", "Usuarios", "Parámetros"],
-                icons=["hdd-network", "people-fill", "sliders"],
+                options=["Direcciones IP", "Usuarios", "Grupos de Negocio", "Parámetros"],
+                icons=["hdd-network", "people-fill", "shop", "sliders"],
                 default_index=0,
                 styles={
                     "container": {"padding": "0!important", "background-color": "transparent"},
@@ -493,8 +496,10 @@ def main():
     if menu_principal == "Cartera":
         if submenu == "Todos los Clientes":
             todos_clientes.render()
-        elif submenu == "Kikes":
-            kikes.render()
+        else:
+            grupo = next((g for g in kikes.get_grupos_cartera() if g['nombre_grupo'] == submenu), None)
+            if grupo:
+                kikes.render(grupo)
     
     elif menu_principal == "Empleados":
         if submenu == "Control de Turnos":
@@ -517,6 +522,8 @@ def main():
             direcciones_ip.render()
         elif submenu == "Usuarios":
             gestion_usuarios.render()
+        elif submenu == "Grupos de Negocio":
+            grupos_negocio.render()
         elif submenu == "Parámetros":
             st.title("⚙️ Parámetros")
             st.info("🚧 Módulo en construcción")
@@ -1,5 +1,8 @@
 """
-Módulo de Cartera - Kikes (Negocios específicos)
+Módulo de Cartera - Tablero por grupo de negocios (p. ej. Kikes)
+
+Los grupos y sus negocios se guardan en grupos_negocio / grupos_negocio_miembros
+y se administran desde Configuración > Grupos de Negocio.
 """
 import streamlit as st
 import pandas as pd
@@ -11,119 +14,128 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.utils.ui_helpers import get_db_connection, format_currency, create_metric_card, CSS_STYLES
+from data_base.controler import get_grupos_negocio
+from src.utils.cache import cache_datos, invalidar
+from src.utils.ui_helpers import get_db_connection, solicitar_sincronizacion, render_estado_sincronizacion, format_currency, create_metric_card, CSS_STYLES
 
 
 # ==================== FUNCIONES DE DATOS ====================
 
-@st.cache_data(ttl=60)
-def get_negocios_kikes():
-    """Obtiene los negocios relacionados con Kikes"""
-    return ['COMIDAS RAPIDAS KIKE', 'COMIDAS RAPIDAS KIKE 2', 'KIKES PIZZA']
+# Colores de las tarjetas y gráficos, asignados por posición del negocio en el grupo
+CARD_COLORS = ['', 'card-orange', 'card-green']
+CHART_COLORS = ['#667eea', '#f5576c', '#11998e', '#f6ad55', '#4fd1c5', '#9f7aea']
+
+# Consultas de documentos abiertos (benchmarks/explain_cartera.py verifica sus planes)
+SQL_REMISIONES_NEGOCIO = """
+    SELECT numero_remision, fecha, valor_remsion, estado_remision
+    FROM remisiones
+    WHERE nombre_negocio = %s AND estado_remision = 'open'
+    ORDER BY fecha DESC
+"""
+
+SQL_FACTURAS_NEGOCIO = """
+    SELECT numero_factura, fecha, balance_factura as valor_factura, estado_factura
+    FROM facturas
+    WHERE nombre_negocio = %s AND estado_factura = 'open'
+    ORDER BY fecha DESC
+"""
+
+SQL_EVOLUCION_GRUPO = """
+    SELECT 
+        fecha::date as dia,
+        nombre_negocio,
+        COUNT(*) as cantidad_remisiones,
+        SUM(valor_remsion) as total_remisiones
+    FROM remisiones
+    WHERE nombre_negocio IN %s AND estado_remision = 'open'
+    GROUP BY fecha::date, nombre_negocio
+    ORDER BY dia, nombre_negocio
+"""
+
+SQL_EVOLUCION_ACUMULADA_GRUPO = """
+    SELECT 
+        fecha::date as dia,
+        nombre_negocio,
+        valor_remsion,
+        numero_remision
+    FROM remisiones
+    WHERE nombre_negocio IN %s AND estado_remision = 'open'
+    ORDER BY fecha
+"""
+
+
+@cache_datos("grupos")
+def get_grupos_cartera():
+    """Obtiene los grupos de negocio activos (cada uno tiene su tablero en Cartera)"""
+    return get_grupos_negocio(solo_activos=True)
 
 
-@st.cache_data(ttl=60)
-def get_resumen_kikes():
-    """Obtiene resumen de deudas de Kikes separado por negocio"""
-    conn = get_db_connection()
-    negocios = get_negocios_kikes()
+@cache_datos("cartera", "grupos", entidades={"grupo": "id_grupo"})
+def get_resumen_grupo(id_grupo):
+    """
+    Obtiene el resumen de deudas de cada negocio del grupo en una sola consulta
+    (desde cartera_resumen). Los negocios sin deuda aparecen en cero.
+    """
+    query = """
+        SELECT 
+            m.nombre_negocio,
+            COALESCE(SUM(cr.remisiones_abiertas), 0) as remisiones_cantidad,
+            COALESCE(SUM(cr.total_remisiones), 0) as remisiones_total,
+            COALESCE(SUM(cr.facturas_abiertas), 0) as facturas_cantidad,
+            COALESCE(SUM(cr.total_facturas), 0) as facturas_total
+        FROM grupos_negocio_miembros m
+        LEFT JOIN cartera_resumen cr ON cr.nombre_negocio = m.nombre_negocio
+        WHERE m.id_grupo = %s
+        GROUP BY m.nombre_negocio, m.orden
+        ORDER BY m.orden, m.nombre_negocio
+    """
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn, params=(int(id_grupo),))
     
     resultados = {}
-    
-    for negocio in negocios:
-        # Remisiones
-        query_rem = """
-            SELECT COUNT(*) as cantidad, COALESCE(SUM(valor_remsion), 0) as total
-            FROM remisiones
-            WHERE nombre_negocio = %s AND estado_remision = 'open'
-        """
-        df_rem = pd.read_sql(query_rem, conn, params=(negocio,))
-        
-        # Facturas
-        query_fact = """
-            SELECT COUNT(*) as cantidad, COALESCE(SUM(balance_factura), 0) as total
-            FROM facturas
-            WHERE nombre_negocio = %s AND estado_factura = 'open'
-        """
-        df_fact = pd.read_sql(query_fact, conn, params=(negocio,))
-        
-        resultados[negocio] = {
-            'remisiones_cantidad': int(df_rem['cantidad'].iloc[0]),
-            'remisiones_total': float(df_rem['total'].iloc[0]),
-            'facturas_cantidad': int(df_fact['cantidad'].iloc[0]),
-            'facturas_total': float(df_fact['total'].iloc[0]),
-            'total_deuda': float(df_rem['total'].iloc[0]) + float(df_fact['total'].iloc[0])
+    for _, fila in df.iterrows():
+        remisiones_total = float(fila['remisiones_total'])
+        facturas_total = float(fila['facturas_total'])
+        resultados[fila['nombre_negocio']] = {
+            'remisiones_cantidad': int(fila['remisiones_cantidad']),
+            'remisiones_total': remisiones_total,
+            'facturas_cantidad': int(fila['facturas_cantidad']),
+            'facturas_total': facturas_total,
+            'total_deuda': remisiones_total + facturas_total
         }
     
     return resultados
 
 
-@st.cache_data(ttl=60)
+@cache_datos("cartera", entidades={"negocio": "nombre_negocio"})
 def get_remisiones_negocio(nombre_negocio):
     """Obtiene remisiones abiertas de un negocio específico"""
-    conn = get_db_connection()
-    query = """
-        SELECT numero_remision, fecha, valor_remsion, estado_remision
-        FROM remisiones
-        WHERE nombre_negocio = %s AND estado_remision = 'open'
-        ORDER BY fecha DESC
-    """
-    df = pd.read_sql(query, conn, params=(nombre_negocio,))
+    with get_db_connection() as conn:
+        df = pd.read_sql(SQL_REMISIONES_NEGOCIO, conn, params=(nombre_negocio,))
     return df
 
 
-@st.cache_data(ttl=60)
+@cache_datos("cartera", entidades={"negocio": "nombre_negocio"})
 def get_facturas_negocio(nombre_negocio):
     """Obtiene facturas abiertas de un negocio específico"""
-    conn = get_db_connection()
-    query = """
-        SELECT numero_factura, fecha, balance_factura as valor_factura, estado_factura
-        FROM facturas
-        WHERE nombre_negocio = %s AND estado_factura = 'open'
-        ORDER BY fecha DESC
-    """
-    df = pd.read_sql(query, conn, params=(nombre_negocio,))
+    with get_db_connection() as conn:
+        df = pd.read_sql(SQL_FACTURAS_NEGOCIO, conn, params=(nombre_negocio,))
     return df
 
 
-@st.cache_data(ttl=60)
-def get_evolucion_kikes():
+@cache_datos("cartera", entidades={"negocio": "negocios"})
+def get_evolucion_grupo(negocios):
     """Obtiene evolución de deudas por negocio por día"""
-    conn = get_db_connection()
-    negocios = get_negocios_kikes()
-    
-    query = """
-        SELECT 
-            fecha::date as dia,
-            nombre_negocio,
-            COUNT(*) as cantidad_remisiones,
-            SUM(valor_remsion) as total_remisiones
-        FROM remisiones
-        WHERE nombre_negocio IN %s AND estado_remision = 'open'
-        GROUP BY fecha::date, nombre_negocio
-        ORDER BY dia, nombre_negocio
-    """
-    df = pd.read_sql(query, conn, params=(tuple(negocios),))
+    with get_db_connection() as conn:
+        df = pd.read_sql(SQL_EVOLUCION_GRUPO, conn, params=(tuple(negocios),))
     return df
 
 
-@st.cache_data(ttl=60)
-def get_evolucion_acumulada_kikes():
+@cache_datos("cartera", entidades={"negocio": "negocios"})
+def get_evolucion_acumulada_grupo(negocios):
     """Obtiene evolución acumulada de remisiones por negocio"""
-    conn = get_db_connection()
-    negocios = get_negocios_kikes()
-    
-    query = """
-        SELECT 
-            fecha::date as dia,
-            nombre_negocio,
-            valor_remsion,
-            numero_remision
-        FROM remisiones
-        WHERE nombre_negocio IN %s AND estado_remision = 'open'
-        ORDER BY fecha
-    """
-    df = pd.read_sql(query, conn, params=(tuple(negocios),))
+    with get_db_connection() as conn:
+        df = pd.read_sql(SQL_EVOLUCION_ACUMULADA_GRUPO, conn, params=(tuple(negocios),))
     
     if df.empty:
         return df
@@ -296,8 +308,8 @@ KIKES_STYLES = """
 
 # ==================== PÁGINA PRINCIPAL ====================
 
-def render():
-    """Renderiza la página de Kikes"""
+def render(grupo):
+    """Renderiza el tablero de un grupo de negocios (dict de get_grupos_cartera)"""
     st.markdown(CSS_STYLES, unsafe_allow_html=True)
     st.markdown(KIKES_STYLES, unsafe_allow_html=True)
     
@@ -305,34 +317,31 @@ def render():
     col_titulo, col_btn1, col_btn2 = st.columns([4, 1, 1])
     
     with col_titulo:
-        st.markdown('<p class="main-header">🍕 Dashboard Kikes</p>', unsafe_allow_html=True)
+        st.markdown(f'<p class="main-header">{grupo["icono"]} Dashboard {grupo["nombre_grupo"]}</p>', unsafe_allow_html=True)
         st.markdown('<p class="sub-header">Control de deudas por negocio</p>', unsafe_allow_html=True)
     
     with col_btn1:
         st.write("")  # Espaciado
         if st.button("🔄 Sincronizar Alegra", key="sync_kikes", help="Actualizar datos desde Alegra"):
-            with st.spinner("Sincronizando datos desde Alegra..."):
-                try:
-                    import sys
-                    import os
-                    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
-                    from services.alegra_api import full_sync_all
-                    full_sync_all()
-                    st.cache_data.clear()
-                    st.success("✅ Sincronización completada")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"❌ Error: {str(e)}")
+            solicitar_sincronizacion()
     
     with col_btn2:
         st.write("")  # Espaciado
         if st.button("🔃 Refrescar", key="kikes_refresh"):
-            st.cache_data.clear()
+            # Solo las consultas de este grupo y sus negocios
+            invalidar(f"grupo:{grupo['id_grupo']}", *(f"negocio:{n}" for n in grupo['negocios']))
             st.rerun()
     
+    render_estado_sincronizacion()
+    
     st.markdown("---")
     
-    resumen = get_resumen_kikes()
+    resumen = get_resumen_grupo(grupo['id_grupo'])
+    negocios = list(resumen)
+    
+    if not negocios:
+        st.info("Este grupo no tiene negocios. Agrégalos en Configuración > Grupos de Negocio.")
+        return
     
     total_general = sum(datos['total_deuda'] for datos in resumen.values())
     total_remisiones = sum(datos['remisiones_cantidad'] for datos in resumen.values())
@@ -340,7 +349,7 @@ def render():
     
     st.markdown(f"""
     <div class="total-general-card">
-        <div class="total-general-title">💰 DEUDA TOTAL KIKES</div>
+        <div class="total-general-title">💰 DEUDA TOTAL {grupo['nombre_grupo'].upper()}</div>
         <div class="total-general-value">{format_currency(total_general)}</div>
         <div style="color: rgba(255,255,255,0.7); margin-top: 10px;">
             📋 {total_remisiones} remisiones | 🧾 {total_facturas} facturas
@@ -348,20 +357,15 @@ def render():
     </div>
     """, unsafe_allow_html=True)
     
-    # Cards de negocios
-    icons = ['🍔', '🍟', '🍕']
-    colors = ['', 'card-orange', 'card-green']
-    negocios = get_negocios_kikes()
-    
-    cols = st.columns(3)
+    # Cards de negocios (filas de 3)
+    colores_negocio = {n: CHART_COLORS[i % len(CHART_COLORS)] for i, n in enumerate(negocios)}
     
-    for i, negocio in enumerate(negocios):
-        with cols[i]:
-            datos = resumen.get(negocio, {
-                'remisiones_cantidad': 0, 'remisiones_total': 0,
-                'facturas_cantidad': 0, 'facturas_total': 0, 'total_deuda': 0
-            })
-            st.markdown(render_negocio_card(negocio, datos, colors[i], icons[i]), unsafe_allow_html=True)
+    for inicio in range(0, len(negocios), 3):
+        cols = st.columns(3)
+        for i, negocio in enumerate(negocios[inicio:inicio + 3]):
+            with cols[i]:
+                color = CARD_COLORS[(inicio + i) % len(CARD_COLORS)]
+                st.markdown(render_negocio_card(negocio, resumen[negocio], color, grupo['icono']), unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -409,7 +413,7 @@ def render():
             labels=df_dona['Negocio'],
             values=df_dona['Total'],
             hole=.5,
-            marker_colors=['#667eea', '#f5576c', '#11998e'],
+            marker_colors=[colores_negocio[n] for n in negocios],
             textinfo='label+percent',
             textposition='outside'
         )])
@@ -425,8 +429,8 @@ def render():
     # Evolución temporal
     st.markdown("### 📈 Comportamiento de Remisiones Pendientes por Día")
     
-    evolucion = get_evolucion_kikes()
-    evolucion_acum = get_evolucion_acumulada_kikes()
+    evolucion = get_evolucion_grupo(tuple(negocios))
+    evolucion_acum = get_evolucion_acumulada_grupo(tuple(negocios))
     
     if not evolucion.empty:
         tipo_grafico = st.radio(
@@ -443,11 +447,7 @@ def render():
                 y='total_remisiones',
                 color='nombre_negocio',
                 barmode='group',
-                color_discrete_map={
-                    'COMIDAS RAPIDAS KIKE': '#667eea',
-                    'COMIDAS RAPIDAS KIKE 2': '#f5576c',
-                    'KIKES PIZZA': '#11998e'
-                },
+                color_discrete_map=colores_negocio,
                 labels={
                     'dia': 'Fecha',
                     'total_remisiones': 'Valor ($)',
@@ -484,11 +484,7 @@ def render():
                     y='valor_acumulado',
                     color='nombre_negocio',
                     markers=True,
-                    color_discrete_map={
-                        'COMIDAS RAPIDAS KIKE': '#667eea',
-                        'COMIDAS RAPIDAS KIKE 2': '#f5576c',
-                        'KIKES PIZZA': '#11998e'
-                    },
+                    color_discrete_map=colores_negocio,
                     labels={
                         'dia': 'Fecha',
                         'valor_acumulado': 'Valor Acumulado ($)',
@@ -11,74 +11,69 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.utils.ui_helpers import get_db_connection, format_currency, create_metric_card, CSS_STYLES
+from src.utils.cache import cache_datos
+from src.utils.ui_helpers import get_db_connection, solicitar_sincronizacion, render_estado_sincronizacion, format_currency, create_metric_card, CSS_STYLES
 
 
 # ==================== FUNCIONES DE DATOS ====================
 
-@st.cache_data(ttl=60)
+@cache_datos("cartera")
 def get_clientes():
     """Obtiene lista de clientes"""
-    conn = get_db_connection()
     query = """
         SELECT DISTINCT c.id_cliente, c.nombre_cliente, c.nit_cliente
         FROM clientes c
         ORDER BY c.nombre_cliente
     """
-    df = pd.read_sql(query, conn)
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn)
     return df
 
 
-@st.cache_data(ttl=60)
+@cache_datos("cartera", entidades={"cliente": "id_cliente"})
 def get_negocios_cliente(id_cliente):
     """Obtiene negocios de un cliente"""
-    conn = get_db_connection()
     query = """
         SELECT id_negocio, nombre_negocio
         FROM negocios
         WHERE id_cliente = %s
         ORDER BY nombre_negocio
     """
-    df = pd.read_sql(query, conn, params=(int(id_cliente),))
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn, params=(int(id_cliente),))
     return df
 
 
-@st.cache_data(ttl=60)
+@cache_datos("cartera")
 def get_resumen_global():
-    """Obtiene resumen global de deudas"""
-    conn = get_db_connection()
-    
-    query_rem = """
-        SELECT COUNT(*) as cantidad, COALESCE(SUM(valor_remsion), 0) as total
-        FROM remisiones
-        WHERE estado_remision = 'open'
+    """Obtiene resumen global de deudas (desde cartera_resumen)"""
+    query = """
+        SELECT 
+            COALESCE(SUM(remisiones_abiertas), 0) as remisiones_cantidad,
+            COALESCE(SUM(total_remisiones), 0) as remisiones_total,
+            COALESCE(SUM(facturas_abiertas), 0) as facturas_cantidad,
+            COALESCE(SUM(total_facturas), 0) as facturas_total
+        FROM cartera_resumen
     """
-    df_rem = pd.read_sql(query_rem, conn)
     
-    query_fact = """
-        SELECT COUNT(*) as cantidad, COALESCE(SUM(balance_factura), 0) as total
-        FROM facturas
-        WHERE estado_factura = 'open'
-    """
-    df_fact = pd.read_sql(query_fact, conn)
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn)
     
     return {
-        'remisiones_cantidad': int(df_rem['cantidad'].iloc[0]),
-        'remisiones_total': float(df_rem['total'].iloc[0]),
-        'facturas_cantidad': int(df_fact['cantidad'].iloc[0]),
-        'facturas_total': float(df_fact['total'].iloc[0])
+        'remisiones_cantidad': int(df['remisiones_cantidad'].iloc[0]),
+        'remisiones_total': float(df['remisiones_total'].iloc[0]),
+        'facturas_cantidad': int(df['facturas_cantidad'].iloc[0]),
+        'facturas_total': float(df['facturas_total'].iloc[0])
     }
 
 
-@st.cache_data(ttl=60)
+@cache_datos("cartera", entidades={"cliente": "id_cliente"})
 def get_deudas_por_cliente(id_cliente=None):
-    """Obtiene deudas agrupadas por cliente"""
-    conn = get_db_connection()
-    
+    """Obtiene deudas agrupadas por cliente (desde cartera_resumen)"""
     where_clause = ""
     params = ()
     if id_cliente:
-        where_clause = "AND c.id_cliente = %s"
+        where_clause = "WHERE cr.id_cliente = %s"
         params = (int(id_cliente),)
     
     query = f"""
@@ -86,75 +81,55 @@ def get_deudas_por_cliente(id_cliente=None):
             c.id_cliente,
             c.nombre_cliente,
             c.nit_cliente,
-            COALESCE(rem.cantidad_remisiones, 0) as cantidad_remisiones,
-            COALESCE(rem.total_remisiones, 0) as total_remisiones,
-            COALESCE(fact.cantidad_facturas, 0) as cantidad_facturas,
-            COALESCE(fact.total_facturas, 0) as total_facturas
-        FROM clientes c
-        LEFT JOIN (
-            SELECT id_cliente, COUNT(*) as cantidad_remisiones, SUM(valor_remsion) as total_remisiones
-            FROM remisiones
-            WHERE estado_remision = 'open'
-            GROUP BY id_cliente
-        ) rem ON c.id_cliente = rem.id_cliente
-        LEFT JOIN (
-            SELECT id_cliente, COUNT(*) as cantidad_facturas, SUM(balance_factura) as total_facturas
-            FROM facturas
-            WHERE estado_factura = 'open'
-            GROUP BY id_cliente
-        ) fact ON c.id_cliente = fact.id_cliente
-        WHERE (rem.cantidad_remisiones > 0 OR fact.cantidad_facturas > 0)
+            SUM(cr.remisiones_abiertas) as cantidad_remisiones,
+            SUM(cr.total_remisiones) as total_remisiones,
+            SUM(cr.facturas_abiertas) as cantidad_facturas,
+            SUM(cr.total_facturas) as total_facturas
+        FROM cartera_resumen cr
+        JOIN clientes c ON c.id_cliente = cr.id_cliente
         {where_clause}
-        ORDER BY (COALESCE(rem.total_remisiones, 0) + COALESCE(fact.total_facturas, 0)) DESC
+        GROUP BY c.id_cliente, c.nombre_cliente, c.nit_cliente
+        HAVING SUM(cr.remisiones_abiertas) > 0 OR SUM(cr.facturas_abiertas) > 0
+        ORDER BY (SUM(cr.total_remisiones) + SUM(cr.total_facturas)) DESC
     """
-    df = pd.read_sql(query, conn, params=params if params else None)
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn, params=params if params else None)
     return df
 
 
-@st.cache_data(ttl=60)
+@cache_datos("cartera", entidades={"cliente": "id_cliente"})
 def get_deudas_por_negocio(id_cliente=None):
-    """Obtiene deudas agrupadas por negocio"""
-    conn = get_db_connection()
-    
-    where_rem = "WHERE estado_remision = 'open'"
-    where_fact = "WHERE estado_factura = 'open'"
-    
+    """Obtiene deudas agrupadas por negocio (desde cartera_resumen)"""
+    where_clause = ""
+    params = ()
     if id_cliente:
-        where_rem += f" AND id_cliente = {int(id_cliente)}"
-        where_fact += f" AND id_cliente = {int(id_cliente)}"
+        where_clause = "WHERE id_cliente = %s"
+        params = (int(id_cliente),)
     
     query = f"""
-        WITH remisiones_negocio AS (
-            SELECT nombre_negocio, COUNT(*) as cantidad, SUM(valor_remsion) as total
-            FROM remisiones
-            {where_rem}
-            GROUP BY nombre_negocio
-        ),
-        facturas_negocio AS (
-            SELECT nombre_negocio, COUNT(*) as cantidad, SUM(balance_factura) as total
-            FROM facturas
-            {where_fact}
-            GROUP BY nombre_negocio
-        )
         SELECT 
-            COALESCE(r.nombre_negocio, f.nombre_negocio) as nombre_negocio,
-            COALESCE(r.cantidad, 0) as cantidad_remisiones,
-            COALESCE(r.total, 0) as total_remisiones,
-            COALESCE(f.cantidad, 0) as cantidad_facturas,
-            COALESCE(f.total, 0) as total_facturas
-        FROM remisiones_negocio r
-        FULL OUTER JOIN facturas_negocio f ON r.nombre_negocio = f.nombre_negocio
-        ORDER BY (COALESCE(r.total, 0) + COALESCE(f.total, 0)) DESC
+            NULLIF(nombre_negocio, '') as nombre_negocio,
+            SUM(remisiones_abiertas) as cantidad_remisiones,
+            SUM(total_remisiones) as total_remisiones,
+            SUM(facturas_abiertas) as cantidad_facturas,
+            SUM(total_facturas) as total_facturas
+        FROM cartera_resumen
+        {where_clause}
+        GROUP BY nombre_negocio
+        HAVING SUM(remisiones_abiertas) > 0 OR SUM(facturas_abiertas) > 0
+        ORDER BY (SUM(total_remisiones) + SUM(total_facturas)) DESC
     """
-    df = pd.read_sql(query, conn)
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn, params=params if params else None)
     return df
 
 
-@st.cache_data(ttl=60)
-def get_remisiones_detalle(nombre_negocio=None, id_cliente=None):
-    """Obtiene detalle de remisiones"""
-    conn = get_db_connection()
+def consulta_remisiones_detalle(nombre_negocio=None, id_cliente=None):
+    """
+    Arma la consulta de remisiones abiertas con los filtros dados.
     
+    Retorna (query, params); benchmarks/explain_cartera.py verifica su plan.
+    """
     conditions = ["estado_remision = 'open'"]
     params = []
     
@@ -173,15 +148,24 @@ def get_remisiones_detalle(nombre_negocio=None, id_cliente=None):
         WHERE {where_clause}
         ORDER BY fecha DESC
     """
-    df = pd.read_sql(query, conn, params=params if params else None)
+    return query, params
+
+
+@cache_datos("cartera", entidades={"negocio": "nombre_negocio", "cliente": "id_cliente"})
+def get_remisiones_detalle(nombre_negocio=None, id_cliente=None):
+    """Obtiene detalle de remisiones"""
+    query, params = consulta_remisiones_detalle(nombre_negocio, id_cliente)
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn, params=params if params else None)
     return df
 
 
-@st.cache_data(ttl=60)
-def get_facturas_detalle(nombre_negocio=None, id_cliente=None):
-    """Obtiene detalle de facturas"""
-    conn = get_db_connection()
+def consulta_facturas_detalle(nombre_negocio=None, id_cliente=None):
+    """
+    Arma la consulta de facturas abiertas con los filtros dados.
     
+    Retorna (query, params); benchmarks/explain_cartera.py verifica su plan.
+    """
     conditions = ["estado_factura = 'open'"]
     params = []
     
@@ -200,7 +184,15 @@ def get_facturas_detalle(nombre_negocio=None, id_cliente=None):
         WHERE {where_clause}
         ORDER BY fecha DESC
     """
-    df = pd.read_sql(query, conn, params=params if params else None)
+    return query, params
+
+
+@cache_datos("cartera", entidades={"negocio": "nombre_negocio", "cliente": "id_cliente"})
+def get_facturas_detalle(nombre_negocio=None, id_cliente=None):
+    """Obtiene detalle de facturas"""
+    query, params = consulta_facturas_detalle(nombre_negocio, id_cliente)
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn, params=params if params else None)
     return df
 
 
@@ -220,18 +212,9 @@ def render():
     with col_btn:
         st.write("")  # Espaciado
         if st.button("🔄 Sincronizar con Alegra", key="sync_cartera_todos", help="Actualizar datos desde Alegra"):
-            with st.spinner("Sincronizando datos desde Alegra..."):
-                try:
-                    import sys
-                    import os
-                    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
-                    from services.alegra_api import full_sync_all
-                    full_sync_all()
-                    st.cache_data.clear()
-                    st.success("✅ Sincronización completada exitosamente")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"❌ Error al sincronizar: {str(e)}")
+            solicitar_sincronizacion()
+    
+    render_estado_sincronizacion()
     
     # Resumen global
     resumen = get_resumen_global()
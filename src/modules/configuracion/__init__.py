@@ -3,3 +3,4 @@ Módulo de Configuración
 """
 from . import direcciones_ip
 from . import usuarios
+from . import grupos_negocio
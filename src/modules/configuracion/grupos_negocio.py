@@ -0,0 +1,154 @@
+"""
+Módulo de Configuración - Grupos de negocio de Cartera
+"""
+import streamlit as st
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from data_base.controler import (
+    get_grupos_negocio,
+    get_nombres_negocio,
+    insert_grupo_negocio,
+    update_grupo_negocio,
+    delete_grupo_negocio
+)
+from src.utils.cache import invalidar
+from src.utils.ui_helpers import CSS_STYLES
+
+
+def render():
+    """Renderiza la gestión de grupos de negocio"""
+    st.markdown(CSS_STYLES, unsafe_allow_html=True)
+    
+    st.title("🏪 Grupos de Negocio")
+    st.markdown("Cada grupo activo tiene su propio tablero en **Cartera** con la deuda de sus negocios.")
+    st.markdown("---")
+    
+    tab1, tab2 = st.tabs(["📋 Grupos Registrados", "➕ Nuevo Grupo"])
+    
+    with tab1:
+        render_lista_grupos()
+    
+    with tab2:
+        render_formulario_agregar()
+
+
+def _validar(nombre_grupo, negocios, id_grupo=None):
+    """Retorna la lista de errores del formulario"""
+    errores = []
+    if not nombre_grupo or nombre_grupo.strip() == "":
+        errores.append("El nombre del grupo es obligatorio")
+    elif nombre_grupo.strip() == "Todos los Clientes":
+        errores.append("Ese nombre está reservado")
+    elif any(g['nombre_grupo'] == nombre_grupo.strip() and g['id_grupo'] != id_grupo for g in get_grupos_negocio()):
+        errores.append("Ya existe un grupo con ese nombre")
+    if not negocios:
+        errores.append("Seleccione al menos un negocio")
+    return errores
+
+
+def render_lista_grupos():
+    """Renderiza los grupos existentes con sus opciones de edición"""
+    grupos = get_grupos_negocio()
+    
+    if not grupos:
+        st.info("📭 No hay grupos registrados. Crea uno en la pestaña 'Nuevo Grupo'.")
+        return
+    
+    nombres_negocio = get_nombres_negocio()
+    
+    for grupo in grupos:
+        estado = "✅" if grupo['activo'] else "❌"
+        with st.expander(f"{grupo['icono']} {grupo['nombre_grupo']} {estado} ({len(grupo['negocios'])} negocios)"):
+            with st.form(key=f"form_grupo_{grupo['id_grupo']}"):
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    nombre_grupo = st.text_input("Nombre del grupo *", value=grupo['nombre_grupo'])
+                with col2:
+                    icono = st.text_input("Ícono", value=grupo['icono'], max_chars=10)
+                
+                # Los negocios del grupo pueden no existir aún en la BD
+                opciones = list(dict.fromkeys(grupo['negocios'] + nombres_negocio))
+                negocios = st.multiselect(
+                    "Negocios (en el orden en que se muestran)",
+                    options=opciones,
+                    default=grupo['negocios']
+                )
+                activo = st.checkbox("Activo", value=grupo['activo'])
+                
+                guardar = st.form_submit_button("💾 Guardar cambios", type="primary")
+            
+            if guardar:
+                errores = _validar(nombre_grupo, negocios, grupo['id_grupo'])
+                if errores:
+                    for error in errores:
+                        st.error(f"❌ {error}")
+                else:
+                    success, error = update_grupo_negocio(
+                        grupo['id_grupo'],
+                        nombre_grupo=nombre_grupo.strip(),
+                        negocios=negocios,
+                        icono=icono.strip() or '🏪',
+                        activo=activo
+                    )
+                    if success:
+                        invalidar("grupos")
+                        st.success("Grupo actualizado")
+                        st.rerun()
+                    else:
+                        st.error(f"Error: {error}")
+            
+            if st.button("🗑️ Eliminar grupo", key=f"delete_grupo_{grupo['id_grupo']}"):
+                success, error = delete_grupo_negocio(grupo['id_grupo'])
+                if success:
+                    invalidar("grupos")
+                    st.success("Grupo eliminado")
+                    st.rerun()
+                else:
+                    st.error(f"Error: {error}")
+
+
+def render_formulario_agregar():
+    """Renderiza el formulario para crear un grupo"""
+    st.subheader("➕ Crear Grupo")
+    
+    if 'grupo_mensaje' not in st.session_state:
+        st.session_state.grupo_mensaje = None
+    
+    if st.session_state.grupo_mensaje:
+        st.success(st.session_state.grupo_mensaje)
+        st.session_state.grupo_mensaje = None
+    
+    with st.form(key="form_agregar_grupo", clear_on_submit=True):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            nombre_grupo = st.text_input("🏷️ Nombre del grupo *", placeholder="Ej: Kikes")
+        with col2:
+            icono = st.text_input("Ícono", value="🏪", max_chars=10)
+        
+        negocios = st.multiselect(
+            "🏪 Negocios *",
+            options=get_nombres_negocio(),
+            help="Se muestran en el tablero en el orden en que se seleccionan"
+        )
+        
+        submit = st.form_submit_button("💾 Crear Grupo", use_container_width=True, type="primary")
+        
+        if submit:
+            errores = _validar(nombre_grupo, negocios)
+            if errores:
+                for error in errores:
+                    st.error(f"❌ {error}")
+            else:
+                id_grupo, error = insert_grupo_negocio(nombre_grupo.strip(), negocios, icono.strip() or '🏪')
+                if error:
+                    st.error(f"❌ Error al crear: {error}")
+                else:
+                    invalidar("grupos")
+                    st.session_state.grupo_mensaje = f"✅ Grupo '{nombre_grupo.strip()}' creado exitosamente"
+                    st.rerun()
+    
+    st.markdown("---")
+    st.caption("* Campos obligatorios")
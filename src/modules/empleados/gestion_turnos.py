@@ -21,10 +21,22 @@ from data_base.controler import (
     delete_turno,
     get_turnos_abiertos,
     get_historial_turnos,
-    get_turno_by_id
+    get_turno_by_id,
+    COLUMNAS_HISTORIAL_TURNOS
 )
 from src.utils.ui_helpers import CSS_STYLES
 
+# Turnos por página del historial
+TURNOS_POR_PAGINA_HISTORIAL = 100
+
+# Posiciones en cada fila del historial de las columnas del cursor (hora_inicio, id_turno)
+_CURSOR_HISTORIAL = (COLUMNAS_HISTORIAL_TURNOS.index('hora_inicio'), COLUMNAS_HISTORIAL_TURNOS.index('id_turno'))
+
+
+def _cursor_historial(fila):
+    """Cursor (hora_inicio, id_turno) de una fila de get_historial_turnos"""
+    return tuple(fila[i] for i in _CURSOR_HISTORIAL)
+
 
 # ==================== ESTILOS ====================
 
@@ -369,23 +381,53 @@ def render_historial():
     
     st.markdown("---")
     
-    # Obtener historial
+    # Página actual: cursor (hora_inicio, id_turno) del borde y dirección.
+    # Vuelve a la primera página al cambiar los filtros o al buscar
     id_empleado_filtro = opciones_empleados[empleado_filtro]
-    historial = get_historial_turnos(
+    filtros = (fecha_desde, fecha_hasta, id_empleado_filtro)
+    
+    if buscar or st.session_state.get('hist_filtros') != filtros:
+        st.session_state.hist_filtros = filtros
+        st.session_state.hist_pagina = {'cursor': None, 'direccion': 'siguiente', 'numero': 1}
+    
+    pagina = st.session_state.hist_pagina
+    
+    # Obtener historial
+    filas, hay_mas = get_historial_turnos(
         fecha_inicio=fecha_desde,
         fecha_fin=fecha_hasta,
         id_empleado=id_empleado_filtro,
-        limit=200
+        limit=TURNOS_POR_PAGINA_HISTORIAL,
+        cursor=pagina['cursor'],
+        direccion=pagina['direccion']
     )
     
-    if not historial:
+    hay_recientes = pagina['cursor'] is not None
+    hay_antiguos = hay_mas if pagina['direccion'] == 'siguiente' else True
+    
+    # Al volver hacia atrás sin más turnos recientes se está en la primera página
+    if pagina['direccion'] == 'anterior' and not hay_mas:
+        pagina.update(cursor=None, direccion='siguiente', numero=1)
+        hay_recientes = False
+        
+        # Página incompleta (p. ej. se borraron turnos): se recarga la primera completa
+        if len(filas) < TURNOS_POR_PAGINA_HISTORIAL:
+            filas, hay_antiguos = get_historial_turnos(
+                fecha_inicio=fecha_desde,
+                fecha_fin=fecha_hasta,
+                id_empleado=id_empleado_filtro,
+                limit=TURNOS_POR_PAGINA_HISTORIAL
+            )
+    
+    if not filas:
         st.info("📭 No se encontraron turnos con los filtros seleccionados")
         return
     
-    st.markdown(f"**Total:** {len(historial)} turno(s) encontrado(s)")
+    desde_fila = (pagina['numero'] - 1) * TURNOS_POR_PAGINA_HISTORIAL + 1
+    st.markdown(f"**Página {pagina['numero']}:** turnos {desde_fila} a {desde_fila + len(filas) - 1}")
     
     # Crear DataFrame para mostrar
-    df = pd.DataFrame(historial)
+    df = pd.DataFrame.from_records(filas, columns=COLUMNAS_HISTORIAL_TURNOS)
     df['hora_inicio'] = df['hora_inicio'].apply(
         lambda x: x.astimezone(TZ_COLOMBIA).strftime("%d/%m/%Y %I:%M %p") if pd.notna(x) else "—"
     )
@@ -398,6 +440,19 @@ def render_historial():
     
     st.dataframe(df_display, use_container_width=True, hide_index=True)
     
+    # Navegación: el cursor es el primer o el último turno de la página
+    col_anterior, col_space, col_siguiente = st.columns([1, 4, 1])
+    
+    with col_anterior:
+        if st.button("⬅️ Más recientes", disabled=not hay_recientes, key="hist_pagina_anterior"):
+            pagina.update(cursor=_cursor_historial(filas[0]), direccion='anterior', numero=pagina['numero'] - 1)
+            st.rerun()
+    
+    with col_siguiente:
+        if st.button("Más antiguos ➡️", disabled=not hay_antiguos, key="hist_pagina_siguiente"):
+            pagina.update(cursor=_cursor_historial(filas[-1]), direccion='siguiente', numero=pagina['numero'] + 1)
+            st.rerun()
+    
     # Sección de edición
     st.markdown("---")
     st.subheader("✏️ Editar Turno")
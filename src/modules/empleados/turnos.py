@@ -9,14 +9,7 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from data_base.controler import (
-    get_empleado_by_cedula,
-    get_turno_abierto_hoy,
-    get_turno_completo_hoy,
-    registrar_entrada,
-    registrar_salida,
-    get_turnos_empleado_hoy
-)
+from data_base.controler import get_estado_turno_hoy, fichar_turno
 from src.utils.ui_helpers import CSS_STYLES
 
 
@@ -114,6 +107,25 @@ TURNOS_STYLES = """
 """
 
 
+def registrar_resultado_fichaje(resultado):
+    """Guarda en session_state el mensaje del fichaje para mostrarlo después del rerun"""
+    tz = pytz.timezone('America/Bogota')
+    turno = resultado['turno']
+    
+    if resultado['accion'] == 'salida':
+        hora_salida = turno['hora_salida'].astimezone(tz).strftime("%I:%M:%S %p")
+        st.session_state.turno_mensaje = f"✅ ¡Salida registrada exitosamente a las {hora_salida}!"
+        st.session_state.turno_tipo = 'salida'
+    elif resultado['accion'] == 'entrada':
+        hora_entrada = turno['hora_inicio'].astimezone(tz).strftime("%I:%M:%S %p")
+        st.session_state.turno_mensaje = f"✅ ¡Entrada registrada exitosamente a las {hora_entrada}!"
+        st.session_state.turno_tipo = 'entrada'
+    else:
+        # Otro fichaje (doble clic u otro equipo) se registró primero
+        st.session_state.turno_mensaje = "ℹ️ Este fichaje ya estaba registrado; se muestra el estado actual."
+        st.session_state.turno_tipo = 'sin_cambio'
+
+
 def render():
     """Renderiza el módulo de control de turnos"""
     st.markdown(CSS_STYLES, unsafe_allow_html=True)
@@ -137,6 +149,8 @@ def render():
         elif st.session_state.turno_tipo == 'salida':
             st.success(st.session_state.turno_mensaje)
             st.balloons()
+        else:
+            st.info(st.session_state.turno_mensaje)
         # Limpiar mensaje después de mostrarlo
         st.session_state.turno_mensaje = None
         st.session_state.turno_tipo = None
@@ -161,15 +175,13 @@ def render():
     # Lógica de búsqueda
     if buscar or cedula:
         if cedula and cedula.strip():
-            empleado = get_empleado_by_cedula(cedula.strip())
+            # Empleado y turnos de hoy en una sola consulta
+            estado = get_estado_turno_hoy(cedula.strip())
             
-            if empleado:
+            if estado:
                 # Empleado encontrado - verificar estado de turno
-                id_empleado = empleado['id_empleado']
-                nombre = empleado['nombre_empleado']
-                
-                turno_abierto = get_turno_abierto_hoy(id_empleado)
-                turno_completo = get_turno_completo_hoy(id_empleado)
+                nombre = estado['empleado']['nombre_empleado']
+                turno_abierto = estado['turno_abierto']
                 
                 with contenido_placeholder.container():
                     st.markdown("---")
@@ -194,14 +206,11 @@ def render():
                         col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
                         with col_btn2:
                             if st.button("🔴 Registrar Salida", use_container_width=True, type="primary", key="btn_salida"):
-                                resultado, error = registrar_salida(turno_abierto['id_turno'])
+                                resultado, error = fichar_turno(cedula.strip(), 'salida')
                                 if error:
                                     st.error(f"❌ Error al registrar salida: {error}")
                                 else:
-                                    tz = pytz.timezone('America/Bogota')
-                                    hora_salida = resultado['hora_salida'].astimezone(tz).strftime("%I:%M:%S %p")
-                                    st.session_state.turno_mensaje = f"✅ ¡Salida registrada exitosamente a las {hora_salida}!"
-                                    st.session_state.turno_tipo = 'salida'
+                                    registrar_resultado_fichaje(resultado)
                                     st.rerun()
                     
                     # CASO 3: No tiene turno hoy - puede marcar ENTRADA
@@ -221,13 +230,11 @@ def render():
                         col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
                         with col_btn2:
                             if st.button("🟢 Registrar Entrada", use_container_width=True, type="primary", key="btn_entrada"):
-                                resultado, error = registrar_entrada(id_empleado)
+                                resultado, error = fichar_turno(cedula.strip(), 'entrada')
                                 if error:
                                     st.error(f"❌ Error al registrar entrada: {error}")
                                 else:
-                                    hora_entrada = resultado['hora_inicio'].strftime("%H:%M:%S")
-                                    st.session_state.turno_mensaje = f"✅ ¡Entrada registrada exitosamente a las {hora_entrada}!"
-                                    st.session_state.turno_tipo = 'entrada'
+                                    registrar_resultado_fichaje(resultado)
                                     st.rerun()
             else:
                 # Empleado NO encontrado
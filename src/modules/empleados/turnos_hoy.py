@@ -9,7 +9,9 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from src.utils.ui_helpers import get_db_connection, CSS_STYLES, format_currency
+from config.settings import DB_LISTEN_CONFIG
+from src.utils.cache import cache_datos, invalidar
+from src.utils.ui_helpers import get_db_connection, get_escucha_turnos, CSS_STYLES, format_currency
 
 
 # ==================== ESTILOS ====================
@@ -68,10 +70,13 @@ TURNOS_HOY_STYLES = """
 
 # ==================== FUNCIONES DE DATOS ====================
 
-@st.cache_data(ttl=30)
-def get_turnos_hoy():
-    """Obtiene todos los turnos del día de hoy con información del empleado - Zona horaria Colombia"""
-    conn = get_db_connection()
+def _consultar_turnos_hoy(hoy):
+    """
+    Obtiene los turnos del día hoy (fecha en Colombia) y su resumen en una sola consulta.
+    
+    Los contadores se calculan con agregados de ventana sobre las mismas filas,
+    así detalle y resumen siempre coinciden. Retorna (df_turnos, resumen).
+    """
     query = """
         SELECT 
             t.id_turno,
@@ -82,50 +87,47 @@ def get_turnos_hoy():
             CASE 
                 WHEN t.hora_salida IS NULL THEN 'En curso'
                 ELSE 'Completado'
-            END as estado
+            END as estado,
+            COUNT(*) OVER () as total,
+            COUNT(*) FILTER (WHERE t.hora_salida IS NULL) OVER () as activos,
+            COUNT(*) FILTER (WHERE t.hora_salida IS NOT NULL) OVER () as completados
         FROM turnos t
         INNER JOIN empleados e ON t.id_empleado = e.id_empleado
-        WHERE DATE(t.hora_inicio AT TIME ZONE 'America/Bogota') = (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE
+        WHERE t.hora_inicio >= inicio_dia_local(%(hoy)s)
+          AND t.hora_inicio < inicio_dia_local(%(hoy)s + 1)
         ORDER BY t.hora_inicio DESC
     """
-    df = pd.read_sql(query, conn)
-    return df
-
-
-@st.cache_data(ttl=30)
-def get_resumen_turnos_hoy():
-    """Obtiene resumen de turnos del día - Zona horaria Colombia"""
-    conn = get_db_connection()
+    with get_db_connection() as conn:
+        df = pd.read_sql(query, conn, params={'hoy': hoy})
     
-    # Total turnos
-    query_total = """
-        SELECT COUNT(*) as total
-        FROM turnos
-        WHERE DATE(hora_inicio AT TIME ZONE 'America/Bogota') = (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE
-    """
-    df_total = pd.read_sql(query_total, conn)
+    if df.empty:
+        resumen = {'total': 0, 'activos': 0, 'completados': 0}
+    else:
+        resumen = {
+            'total': int(df['total'].iloc[0]),
+            'activos': int(df['activos'].iloc[0]),
+            'completados': int(df['completados'].iloc[0])
+        }
     
-    # Turnos activos (sin salida)
-    query_activos = """
-        SELECT COUNT(*) as activos
-        FROM turnos
-        WHERE DATE(hora_inicio AT TIME ZONE 'America/Bogota') = (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE AND hora_salida IS NULL
+    df = df.drop(columns=['total', 'activos', 'completados'])
+    return df, resumen
+
+
+@cache_datos("turnos", ttl=None, max_entries=10)
+def get_snapshot_turnos_hoy(version, hoy):
     """
-    df_activos = pd.read_sql(query_activos, conn)
+    Turnos de hoy con la escucha de avisos activa: sin TTL.
     
-    # Turnos completados
-    query_completados = """
-        SELECT COUNT(*) as completados
-        FROM turnos
-        WHERE DATE(hora_inicio AT TIME ZONE 'America/Bogota') = (CURRENT_TIMESTAMP AT TIME ZONE 'America/Bogota')::DATE AND hora_salida IS NOT NULL
+    version y hoy solo forman parte de la llave de la caché: version cambia
+    cuando la BD avisa que hubo cambios en turnos y hoy cambia a medianoche.
     """
-    df_completados = pd.read_sql(query_completados, conn)
-    
-    return {
-        'total': int(df_total['total'].iloc[0]),
-        'activos': int(df_activos['activos'].iloc[0]),
-        'completados': int(df_completados['completados'].iloc[0])
-    }
+    return _consultar_turnos_hoy(hoy)
+
+
+@cache_datos("turnos", ttl=30)
+def get_snapshot_turnos_hoy_respaldo(hoy):
+    """Turnos de hoy sin escucha de avisos (desactivada o caída): se refrescan por TTL"""
+    return _consultar_turnos_hoy(hoy)
 
 
 # ==================== PÁGINA PRINCIPAL ====================
@@ -145,11 +147,31 @@ def render():
     col_space, col_btn = st.columns([5, 1])
     with col_btn:
         if st.button("🔄 Actualizar", key="refresh_turnos_hoy"):
-            st.cache_data.clear()
+            invalidar("turnos")
             st.rerun()
     
-    # Resumen
-    resumen = get_resumen_turnos_hoy()
+    render_tablero()
+
+
+@st.fragment(run_every=DB_LISTEN_CONFIG["refresco_tablero"])
+def render_tablero():
+    """
+    Resumen y detalle de los turnos del día.
+    
+    Se vuelve a ejecutar solo (sin recargar la página) cada pocos segundos. Con
+    la escucha de avisos activa, la consulta a la BD se repite únicamente
+    cuando cambió la versión de turnos o el día; sin ella, cada 30 s.
+    """
+    import pytz
+    tz = pytz.timezone('America/Bogota')
+    hoy = datetime.now(tz).date()
+    
+    # Detalle y resumen del día (una sola consulta)
+    escucha = get_escucha_turnos()
+    if escucha is not None and escucha.activa:
+        df_turnos, resumen = get_snapshot_turnos_hoy(escucha.version, hoy)
+    else:
+        df_turnos, resumen = get_snapshot_turnos_hoy_respaldo(hoy)
     
     col1, col2, col3 = st.columns(3)
     
@@ -184,14 +206,13 @@ def render():
     with col_filtro1:
         filtro_estado = st.selectbox(
             "Filtrar por estado:",
-            ["Todos", "En curso", "Completado"]
+            ["Todos", "En curso", "Completado"],
+            key="filtro_estado_turnos_hoy"
         )
     
     # Tabla de turnos
     st.subheader("📋 Detalle de Turnos")
     
-    df_turnos = get_turnos_hoy()
-    
     if not df_turnos.empty:
         # Aplicar filtro
         if filtro_estado != "Todos":
@@ -200,8 +221,6 @@ def render():
         if not df_turnos.empty:
             # Formatear columnas
             df_display = df_turnos.copy()
-            import pytz
-            tz = pytz.timezone('America/Bogota')
             df_display['hora_inicio'] = df_display['hora_inicio'].apply(
                 lambda x: x.astimezone(tz).strftime("%I:%M:%S %p") if pd.notna(x) else "—"
             )
@@ -9,13 +9,9 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from data_base.controler import (
-    get_horas_extra,
-    get_resumen_horas_extra_por_empleado,
-    get_all_empleados_activos,
-    sincronizar_horas_extra,
-    sincronizar_total_horas
-)
+from config.settings import NOMINA_CONFIG
+from data_base.controler import get_all_empleados_activos
+from services.reglas_horas import get_horas_extra, resumir_horas_extra
 from src.utils.ui_helpers import CSS_STYLES
 
 
@@ -65,14 +61,15 @@ def render():
     st.markdown(HORAS_EXTRA_STYLES, unsafe_allow_html=True)
     
     st.markdown("### ⏰ Horas Extra")
-    st.markdown("Registro de turnos con más de 8 horas trabajadas")
+    tope_semanal = f" o {NOMINA_CONFIG['horas_semana']:g} horas ordinarias en la semana" if NOMINA_CONFIG["horas_semana"] > 0 else ""
+    st.markdown(f"Turnos que pasan de {NOMINA_CONFIG['horas_jornada']:g} horas trabajadas en el día{tope_semanal}")
     st.markdown("---")
     
     # ==================== FILTROS ====================
     with st.container():
         st.markdown("#### 🔍 Filtros")
         
-        col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+        col1, col2, col3 = st.columns(3)
         
         with col1:
             fecha_inicio = st.date_input(
@@ -101,19 +98,6 @@ def render():
             )
             id_empleado = opciones_empleados[empleado_seleccionado]
         
-        with col4:
-            st.write("")
-            st.write("")
-            if st.button("🔄 Sincronizar", help="Sincronizar horas extra", key="sync_extra"):
-                # Primero sincronizar total_horas
-                cant_horas, err_horas = sincronizar_total_horas()
-                # Luego sincronizar horas_extra
-                cantidad, error = sincronizar_horas_extra()
-                if error:
-                    st.error(f"Error: {error}")
-                else:
-                    st.success(f"✅ {cantidad} horas extra sincronizadas")
-                    st.rerun()
     
     st.markdown("---")
     
@@ -124,12 +108,12 @@ def render():
         id_empleado=id_empleado
     )
     
-    if not turnos_extra:
+    if turnos_extra.empty:
         st.info("📭 No se encontraron turnos con horas extra para los filtros seleccionados.")
         return
     
     # ==================== MÉTRICAS RESUMEN ====================
-    total_horas_extra = sum(t['horas_extra'] for t in turnos_extra)
+    total_horas_extra = turnos_extra['horas_extra'].sum()
     total_turnos = len(turnos_extra)
     promedio_extra = total_horas_extra / total_turnos if total_turnos > 0 else 0
     
@@ -164,7 +148,7 @@ def render():
     # ==================== TABLA DE HORAS EXTRA ====================
     st.markdown("#### 📋 Detalle de Horas Extra")
     
-    df = pd.DataFrame(turnos_extra)
+    df = turnos_extra.copy()
     
     # Formatear columnas
     df['fecha'] = pd.to_datetime(df['fecha']).dt.strftime('%Y-%m-%d')
@@ -172,6 +156,7 @@ def render():
     df['hora_salida'] = pd.to_datetime(df['hora_salida']).dt.strftime('%I:%M %p')
     df['total_horas'] = df['total_horas'].apply(lambda x: f"{x:.2f}h")
     df['horas_extra'] = df['horas_extra'].apply(lambda x: f"{x:.2f}h")
+    df['horas_extra_nocturnas'] = df['horas_extra_nocturnas'].apply(lambda x: f"{x:.2f}h")
     
     # Renombrar columnas
     df_display = df.rename(columns={
@@ -180,11 +165,12 @@ def render():
         'hora_entrada': 'Entrada',
         'hora_salida': 'Salida',
         'total_horas': 'Total Horas',
-        'horas_extra': 'Horas Extra'
+        'horas_extra': 'Horas Extra',
+        'horas_extra_nocturnas': 'Extra Nocturnas'
     })
     
     # Columnas a mostrar (sin cédula según solicitado)
-    columnas_mostrar = ['Empleado', 'Fecha', 'Entrada', 'Salida', 'Total Horas', 'Horas Extra']
+    columnas_mostrar = ['Empleado', 'Fecha', 'Entrada', 'Salida', 'Total Horas', 'Horas Extra', 'Extra Nocturnas']
     
     st.dataframe(
         df_display[columnas_mostrar],
@@ -197,23 +183,22 @@ def render():
         st.markdown("---")
         st.markdown("#### 👥 Resumen por Empleado")
         
-        resumen = get_resumen_horas_extra_por_empleado(
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin
-        )
+        # Mismo detalle ya calculado: no vuelve a consultar la BD
+        df_resumen = resumir_horas_extra(turnos_extra)
         
-        if resumen:
-            df_resumen = pd.DataFrame(resumen)
+        if not df_resumen.empty:
             df_resumen['total_horas_extra'] = df_resumen['total_horas_extra'].apply(lambda x: f"{x:.2f}h")
+            df_resumen['horas_extra_nocturnas'] = df_resumen['horas_extra_nocturnas'].apply(lambda x: f"{x:.2f}h")
             
             df_resumen_display = df_resumen.rename(columns={
                 'nombre_empleado': 'Empleado',
                 'total_turnos_extra': 'Turnos con Extra',
-                'total_horas_extra': 'Total Horas Extra'
+                'total_horas_extra': 'Total Horas Extra',
+                'horas_extra_nocturnas': 'Extra Nocturnas'
             })
             
             st.dataframe(
-                df_resumen_display[['Empleado', 'Turnos con Extra', 'Total Horas Extra']],
+                df_resumen_display[['Empleado', 'Turnos con Extra', 'Total Horas Extra', 'Extra Nocturnas']],
                 use_container_width=True,
                 hide_index=True
             )
@@ -0,0 +1,181 @@
+"""
+Módulo de Nómina - Liquidación por periodo
+"""
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timedelta
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from data_base.controler import get_periodos_nomina, get_periodo_cerrado_solapado
+from services.nomina import liquidar_periodo, cerrar_periodo, get_liquidacion_guardada
+from src.utils.ui_helpers import CSS_STYLES, format_currency, create_metric_card
+
+
+def _quincena_actual():
+    """Fechas de inicio y fin de la quincena en curso (1-15 o 16-fin de mes)"""
+    hoy = datetime.now().date()
+    if hoy.day <= 15:
+        return hoy.replace(day=1), hoy.replace(day=15)
+    siguiente_mes = (hoy.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return hoy.replace(day=16), siguiente_mes - timedelta(days=1)
+
+
+def render():
+    """Renderiza la liquidación de nómina de un periodo"""
+    st.markdown(CSS_STYLES, unsafe_allow_html=True)
+    
+    st.title("💵 Liquidación de Nómina")
+    st.markdown("Pago por empleado según sus turnos: horas ordinarias, extra, recargo nocturno y dominical.")
+    st.markdown("---")
+    
+    if 'nomina_mensaje' not in st.session_state:
+        st.session_state.nomina_mensaje = None
+    
+    if st.session_state.nomina_mensaje:
+        st.success(st.session_state.nomina_mensaje)
+        st.session_state.nomina_mensaje = None
+    
+    # ==================== PERIODO ====================
+    inicio_defecto, fin_defecto = _quincena_actual()
+    
+    col1, col2, col3 = st.columns([2, 2, 1])
+    
+    with col1:
+        fecha_inicio = st.date_input("Fecha inicio", value=inicio_defecto, key="fecha_inicio_nomina")
+    
+    with col2:
+        fecha_fin = st.date_input("Fecha fin", value=fin_defecto, key="fecha_fin_nomina")
+    
+    if fecha_fin < fecha_inicio:
+        st.error("❌ La fecha fin debe ser posterior a la fecha inicio")
+        return
+    
+    df = get_liquidacion_guardada(fecha_inicio, fecha_fin)
+    cerrado = not df.empty and bool(df['cerrado'].all())
+    
+    # Un rango que comparte días con otro periodo cerrado pagaría otra vez esos turnos
+    solapado = None if cerrado else get_periodo_cerrado_solapado(fecha_inicio, fecha_fin)
+    
+    with col3:
+        st.write("")
+        st.write("")
+        if st.button("🧮 Liquidar", type="primary", use_container_width=True, disabled=cerrado or solapado is not None, key="liquidar_nomina"):
+            df, error = liquidar_periodo(fecha_inicio, fecha_fin)
+            if error:
+                st.error(f"❌ Error al liquidar: {error}")
+            else:
+                st.session_state.nomina_mensaje = f"✅ Periodo liquidado: {len(df)} empleados"
+                st.rerun()
+    
+    if solapado:
+        st.warning(
+            f"⚠️ Este rango se cruza con el periodo cerrado {solapado[0]:%d/%m/%Y} - {solapado[1]:%d/%m/%Y}: "
+            "sus turnos ya se pagaron. Elija fechas que no lo incluyan."
+        )
+    
+    if df.empty:
+        if not solapado:
+            st.info("📭 Este periodo no se ha liquidado. Presione **Liquidar** para calcularlo con los turnos registrados.")
+        render_periodos()
+        return
+    
+    if cerrado:
+        st.info(f"🔒 Periodo cerrado el {df['cerrado_at'].max():%d/%m/%Y %H:%M}; no se vuelve a calcular.")
+    
+    # ==================== MÉTRICAS ====================
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown(create_metric_card("Total a Pagar", format_currency(df['total_pagar'].sum()), "💵", "metric-card-green"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(create_metric_card("Empleados", len(df), "👥"), unsafe_allow_html=True)
+    with col3:
+        horas_extra = df['horas_extra_diurnas'].sum() + df['horas_extra_nocturnas'].sum()
+        st.markdown(create_metric_card("Horas Extra", f"{horas_extra:,.1f}h", "⏰", "metric-card-orange"), unsafe_allow_html=True)
+    with col4:
+        recargos = df['recargo_nocturno'].sum() + df['recargo_dominical'].sum()
+        st.markdown(create_metric_card("Recargos", format_currency(recargos), "🌙", "metric-card-blue"), unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # ==================== DETALLE POR EMPLEADO ====================
+    st.markdown("### 👥 Detalle por Empleado")
+    
+    columnas = {
+        'nombre_empleado': 'Empleado',
+        'cedula_empleado': 'Cédula',
+        'turnos': 'Turnos',
+        'horas_ordinarias': 'H. Ordinarias',
+        'horas_nocturnas': 'H. Nocturnas',
+        'horas_dominicales': 'H. Dominicales',
+        'horas_extra_diurnas': 'H. Extra Diurnas',
+        'horas_extra_nocturnas': 'H. Extra Nocturnas',
+        'pago_ordinario': 'Pago Ordinario',
+        'recargo_nocturno': 'Recargo Nocturno',
+        'recargo_dominical': 'Recargo Dominical',
+        'pago_extra': 'Pago Extra',
+        'total_pagar': 'Total a Pagar'
+    }
+    df_display = df[list(columnas)].rename(columns=columnas)
+    
+    st.dataframe(
+        df_display.style.format({
+            **{c: "{:.2f}" for c in ['H. Ordinarias', 'H. Nocturnas', 'H. Dominicales', 'H. Extra Diurnas', 'H. Extra Nocturnas']},
+            **{c: format_currency for c in ['Pago Ordinario', 'Recargo Nocturno', 'Recargo Dominical', 'Pago Extra', 'Total a Pagar']}
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    col_export, col_cerrar = st.columns([1, 1])
+    
+    with col_export:
+        st.download_button(
+            label="📥 Exportar CSV",
+            data=df_display.to_csv(index=False).encode('utf-8'),
+            file_name=f"nomina_{fecha_inicio}_{fecha_fin}.csv",
+            mime="text/csv"
+        )
+    
+    # ==================== CIERRE ====================
+    if not cerrado and not solapado:
+        with col_cerrar:
+            confirmar = st.checkbox("Confirmo que este periodo ya se pagó", key="confirmar_cierre_nomina")
+            if st.button("🔒 Cerrar periodo", disabled=not confirmar, key="cerrar_nomina"):
+                cantidad, error = cerrar_periodo(fecha_inicio, fecha_fin)
+                if error:
+                    st.error(f"❌ Error al cerrar: {error}")
+                else:
+                    st.session_state.nomina_mensaje = f"🔒 Periodo cerrado ({cantidad} empleados)"
+                    st.rerun()
+    
+    render_periodos()
+
+
+def render_periodos():
+    """Lista de los últimos periodos liquidados"""
+    periodos = get_periodos_nomina()
+    if not periodos:
+        return
+    
+    st.markdown("---")
+    st.markdown("### 📅 Periodos Liquidados")
+    
+    df = pd.DataFrame(periodos)
+    df['total_pagar'] = df['total_pagar'].apply(lambda x: format_currency(float(x)))
+    df['cerrado'] = df['cerrado'].map({True: '🔒 Cerrado', False: '📝 Abierto'})
+    
+    st.dataframe(
+        df.rename(columns={
+            'fecha_inicio': 'Inicio',
+            'fecha_fin': 'Fin',
+            'empleados': 'Empleados',
+            'total_pagar': 'Total',
+            'cerrado': 'Estado'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
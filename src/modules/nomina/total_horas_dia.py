@@ -12,8 +12,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from data_base.controler import (
     get_total_horas_por_fecha,
     get_resumen_horas_por_empleado,
-    get_all_empleados_activos,
-    sincronizar_total_horas
+    get_all_empleados_activos
 )
 from src.utils.ui_helpers import CSS_STYLES
 
@@ -83,7 +82,7 @@ def render():
     with st.container():
         st.markdown("### 🔍 Filtros")
         
-        col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+        col1, col2, col3 = st.columns(3)
         
         with col1:
             # Filtro por rango de fechas
@@ -114,16 +113,6 @@ def render():
             )
             id_empleado = opciones_empleados[empleado_seleccionado]
         
-        with col4:
-            st.write("")
-            st.write("")
-            if st.button("🔄 Sincronizar", help="Sincronizar turnos con la tabla de horas"):
-                cantidad, error = sincronizar_total_horas()
-                if error:
-                    st.error(f"Error: {error}")
-                else:
-                    st.success(f"✅ {cantidad} turnos sincronizados")
-                    st.rerun()
     
     st.markdown("---")
     
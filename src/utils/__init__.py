@@ -1,8 +1,12 @@
 """
 Módulo de utilidades
 """
+from src.utils.cache import cache_datos, invalidar
 from src.utils.ui_helpers import (
     get_db_connection,
+    get_db_pool_stats,
+    solicitar_sincronizacion,
+    render_estado_sincronizacion,
     format_currency,
     create_metric_card,
     CSS_STYLES,
@@ -10,7 +14,12 @@ from src.utils.ui_helpers import (
 )
 
 __all__ = [
+    'cache_datos',
+    'invalidar',
     'get_db_connection',
+    'get_db_pool_stats',
+    'solicitar_sincronizacion',
+    'render_estado_sincronizacion',
     'format_currency',
     'create_metric_card',
     'CSS_STYLES',
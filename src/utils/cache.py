@@ -0,0 +1,95 @@
+"""
+Caché de consultas con etiquetas
+
+Envuelve st.cache_data y permite invalidar solo las entradas de un dominio
+(cartera, turnos, grupos, ...) o de una entidad (negocio:<nombre>,
+cliente:<id>, grupo:<id>) en lugar de vaciar toda la caché con
+st.cache_data.clear(), que afecta a todos los módulos y a todos los usuarios.
+
+    @cache_datos("cartera", entidades={"negocio": "nombre_negocio"})
+    def get_remisiones_negocio(nombre_negocio): ...
+
+    invalidar("cartera")                  # todo lo de cartera
+    invalidar("negocio:KIKES PIZZA")      # solo lo de ese negocio
+
+Cada etiqueta tiene un número de generación que forma parte de la llave de la
+caché; invalidar una etiqueta aumenta su generación, así la siguiente llamada
+vuelve a consultar la BD y las entradas viejas salen por su TTL. Las
+generaciones son del proceso, igual que st.cache_data: se comparten entre
+sesiones.
+"""
+import functools
+import inspect
+import threading
+from collections import defaultdict
+
+import streamlit as st
+
+_generaciones = defaultdict(int)
+_lock = threading.Lock()
+
+
+def _etiquetas_llamada(etiquetas, entidades, firma, args, kwargs):
+    """Etiquetas de una llamada: las del dominio más una por entidad según los argumentos"""
+    resultado = list(etiquetas)
+    if entidades:
+        argumentos = firma.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+        for tipo, parametro in entidades.items():
+            valor = argumentos.arguments.get(parametro)
+            if valor is None:
+                # Consulta sobre todas las entidades de ese tipo
+                resultado.append(f"{tipo}:*")
+            elif isinstance(valor, (list, tuple, set, frozenset)):
+                resultado.extend(f"{tipo}:{v}" for v in valor)
+            else:
+                resultado.append(f"{tipo}:{valor}")
+    return resultado
+
+
+def cache_datos(*etiquetas, entidades=None, ttl=60, **opciones):
+    """
+    Decorador equivalente a st.cache_data(ttl=...) con etiquetas de invalidación.
+
+    etiquetas: dominios de los que depende el resultado (p. ej. "cartera").
+    entidades: {tipo: parametro}; agrega la etiqueta "tipo:valor" con el valor
+        de ese parámetro en cada llamada (una por elemento si es una lista, o
+        "tipo:*" si es None).
+    opciones: se pasan tal cual a st.cache_data (max_entries, show_spinner...).
+    """
+    def decorador(func):
+        firma = inspect.signature(func)
+
+        # functools.wraps conserva nombre y código de func, que st.cache_data
+        # usa para distinguir la caché de cada función
+        @st.cache_data(ttl=ttl, **opciones)
+        @functools.wraps(func)
+        def cargar(generaciones, *args, **kwargs):
+            return func(*args, **kwargs)
+
+        @functools.wraps(func)
+        def envoltura(*args, **kwargs):
+            etiquetas_llamada = _etiquetas_llamada(etiquetas, entidades, firma, args, kwargs)
+            generaciones = tuple(_generaciones[e] for e in etiquetas_llamada)
+            return cargar(generaciones, *args, **kwargs)
+
+        envoltura.etiquetas = etiquetas
+        envoltura.clear = cargar.clear
+        return envoltura
+
+    return decorador
+
+
+def invalidar(*etiquetas):
+    """
+    Invalida las entradas con alguna de las etiquetas dadas.
+
+    Invalidar "tipo:valor" también invalida las consultas de ese tipo hechas
+    sin filtro ("tipo:*"), que incluyen a esa entidad.
+    """
+    with _lock:
+        for etiqueta in etiquetas:
+            _generaciones[etiqueta] += 1
+            tipo, separador, _ = etiqueta.partition(":")
+            if separador:
+                _generaciones[f"{tipo}:*"] += 1
@@ -2,25 +2,123 @@
 Utilidades compartidas para la interfaz de usuario
 """
 import streamlit as st
-import psycopg2
 import sys
 import os
 
 # Agregar el directorio raíz al path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.settings import DB_CONFIG
+from config.settings import DB_LISTEN_CONFIG
+from data_base.connection import get_pool, get_connection
+from data_base.notificaciones import EscuchaCambios, CANAL_TURNOS
+from src.utils.cache import invalidar
+from data_base.controler import encolar_sync_job, get_sync_job, get_ultimo_sync_job, get_ultimo_sync_run
+
+
+@st.cache_resource
+def get_db_pool():
+    """
+    Pool de conexiones compartido por todas las sesiones de Streamlit.
+
+    Es el mismo pool del proceso que usa data_base.controler; se cachea como
+    recurso para que sobreviva a los reruns y no dependa de la sesión.
+    """
+    return get_pool()
 
 
 def get_db_connection():
-    """Crea una nueva conexión a la base de datos cada vez (no cacheada para evitar conexiones cerradas)"""
-    return psycopg2.connect(
-        host=DB_CONFIG["host"],
-        database=DB_CONFIG["database"],
-        user=DB_CONFIG["user"],
-        password=DB_CONFIG["password"],
-        port=DB_CONFIG["port"]
+    """
+    Presta una conexión del pool compartido; usar siempre con ``with``:
+
+        with get_db_connection() as conn:
+            df = pd.read_sql(query, conn)
+
+    La conexión vuelve al pool al salir del bloque.
+    """
+    get_db_pool()
+    return get_connection()
+
+
+def get_db_pool_stats():
+    """Métricas del pool (conexiones prestadas, libres, fugas detectadas...)"""
+    return get_db_pool().stats()
+
+
+@st.cache_resource
+def get_escucha_turnos():
+    """
+    Escucha de avisos de cambios en turnos compartida por todas las sesiones.
+
+    Retorna None si está desactivada (DB_LISTEN_ENABLED=false). Mientras no haya
+    escucha activa (desactivada o reconectando) las vistas de turnos se
+    actualizan por el TTL de su caché.
+    """
+    if not DB_LISTEN_CONFIG["habilitado"]:
+        return None
+    return EscuchaCambios(CANAL_TURNOS).iniciar()
+
+
+def solicitar_sincronizacion(tipo="full"):
+    """
+    Encola una sincronización con Alegra para el worker (services/sync_worker.py).
+
+    No bloquea la sesión: el estado se consulta con render_estado_sincronizacion().
+    """
+    id_job, error = encolar_sync_job(tipo, "interfaz")
+    if error:
+        st.error(f"❌ No se pudo solicitar la sincronización: {error}")
+        return None
+    st.session_state.sync_job_id = id_job
+    return id_job
+
+
+def render_estado_sincronizacion():
+    """Muestra el estado de la última sincronización e invalida la caché de cartera cuando termina la solicitada"""
+    id_job = st.session_state.get("sync_job_id")
+    job = get_sync_job(id_job) if id_job else get_ultimo_sync_job()
+    if job is None:
+        return
+
+    _, tipo, estado, mensaje, create_at, inicio_at, fin_at = job
+
+    if estado in ("pendiente", "en_curso"):
+        if estado == "pendiente":
+            st.info("⏳ Sincronización en cola; el worker la iniciará en unos segundos.")
+        else:
+            st.info(f"🔄 Sincronizando con Alegra desde las {inicio_at:%H:%M:%S}...")
+        if st.button("🔃 Ver avance", key="sync_estado_refresh"):
+            st.rerun()
+    elif id_job:
+        # Terminó la sincronización que pidió esta sesión
+        st.session_state.sync_job_id = None
+        invalidar("cartera")
+        if estado == "completado":
+            st.success("✅ Sincronización completada")
+        else:
+            st.error(f"❌ Error al sincronizar: {mensaje}")
+    else:
+        render_ultima_sincronizacion()
+
+
+def render_ultima_sincronizacion():
+    """Duración y velocidad de la última sincronización registrada en sync_runs"""
+    run = get_ultimo_sync_run()
+    if run is None:
+        return
+
+    tipo, estado, _, fin_at, duracion_s, documentos, paginas, latencia_p95_ms, lenta = run
+    icono = "✅" if estado == "completado" else "❌"
+    duracion = float(duracion_s or 0)
+    velocidad = documentos / duracion if duracion else 0
+    texto = (
+        f"{icono} Última sincronización ({tipo}): {fin_at:%d/%m/%Y %H:%M} · "
+        f"{duracion:.0f}s · {documentos:,} documentos en {paginas:,} páginas ({velocidad:,.0f}/s)"
     )
+    if latencia_p95_ms is not None:
+        texto += f" · p95 {float(latencia_p95_ms):.0f} ms"
+    if lenta:
+        texto += " · ⚠️ más lenta de lo habitual"
+    st.caption(texto)
 
 
 def format_currency(value):